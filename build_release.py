@@ -1,7 +1,13 @@
+import argparse
+import asyncio
+import json
 import os
 import shutil
+import statistics
 import subprocess
 import sys
+import tempfile
+import time
 import zipfile
 from datetime import datetime
 import importlib.util
@@ -12,6 +18,33 @@ version_module = importlib.util.module_from_spec(spec)
 spec.loader.exec_module(version_module)
 VERSION = version_module.__version__
 
+# onefile: one UPX-compressed EXE that unpacks itself on every launch (the default release)
+# onedir: a folder with the EXE and its runtime, nothing to unpack at launch
+PROFILES = ("onefile", "onedir")
+EXE_NAME = "queueBot.exe" if sys.platform == "win32" else "queueBot"
+
+# Passed to benchmark launches with --config so they never open the setup window
+BENCH_CONFIG = {
+    "webhook_url": "",
+    "user_id": "",
+    "desktop_notifications": False,
+    "allowed_queue_ids": [],
+}
+# How long a launch may take to connect and accept before it counts as failed
+BENCH_TIMEOUT = 60.0
+# Extra arguments per launch mode; headless skips the tray, console window and GUI stack
+BENCH_MODES = {"tray": [], "headless": ["--headless"]}
+
+def dist_dir(profile):
+    """Where PyInstaller puts a profile's output. onedir gets its own folder so both can coexist."""
+    return "dist" if profile == "onefile" else os.path.join("dist", profile)
+
+def artifact_path(profile):
+    """Path of the executable a profile builds."""
+    if profile == "onefile":
+        return os.path.join(dist_dir(profile), EXE_NAME)
+    return os.path.join(dist_dir(profile), "queueBot", EXE_NAME)
+
 def clean_build_dirs():
     """Removes 'dist' and 'build' directories if they exist."""
     print("Cleanings 'dist' and 'build' directories...")
@@ -24,30 +57,33 @@ def clean_build_dirs():
                 print(f"Error removing {d}: {e}")
                 sys.exit(1)
 
-def run_pyinstaller():
+def run_pyinstaller(profile):
     """Runs PyInstaller using the current Python interpreter."""
-    print("Running PyInstaller...")
+    print(f"Running PyInstaller ({profile})...")
     try:
         # Using sys.executable ensures we use the same python environment
-        cmd = [sys.executable, "-m", "PyInstaller", "queueBot.spec"]
-        subprocess.check_call(cmd)
+        cmd = [sys.executable, "-m", "PyInstaller", "queueBot.spec",
+               "--distpath", dist_dir(profile), "--workpath", os.path.join("build", profile)]
+        # queueBot.spec reads the profile from the environment
+        env = dict(os.environ, QUEUEBOT_BUILD_PROFILE=profile)
+        subprocess.check_call(cmd, env=env)
         print("PyInstaller finished successfully.")
     except subprocess.CalledProcessError as e:
         print(f"PyInstaller failed with exit code {e.returncode}")
         sys.exit(e.returncode)
 
-def create_zip_release():
-    """Zips the built executable into the releases directory."""
+def create_zip_release(profile):
+    """Zips the built executable (or the onedir folder) into the releases directory."""
     releases_dir = "releases"
     if not os.path.exists(releases_dir):
         os.makedirs(releases_dir)
         print(f"Created '{releases_dir}' directory.")
 
-    zip_name = f"queueBot-v{VERSION}.zip"
+    suffix = "" if profile == "onefile" else f"-{profile}"
+    zip_name = f"queueBot-v{VERSION}{suffix}.zip"
     zip_path = os.path.join(releases_dir, zip_name)
     
-    exe_name = "queueBot.exe" if sys.platform == "win32" else "queueBot"
-    source_file = os.path.join("dist", exe_name)
+    source_file = artifact_path(profile)
     
     if not os.path.exists(source_file):
         print(f"Error: Source file '{source_file}' does not exist.")
@@ -56,17 +92,188 @@ def create_zip_release():
     print(f"Zipping release to {zip_path}...")
     try:
         with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            zipf.write(source_file, arcname=exe_name)
+            if profile == "onefile":
+                zipf.write(source_file, arcname=EXE_NAME)
+            else:
+                # Keep the queueBot/ folder so users extract one directory, not dozens of DLLs
+                app_dir = os.path.dirname(source_file)
+                for root, _, files in os.walk(app_dir):
+                    for name in files:
+                        path = os.path.join(root, name)
+                        zipf.write(path, arcname=os.path.relpath(path, os.path.dirname(app_dir)))
         print(f"Done! Release created at {zip_path}")
     except Exception as e:
         print(f"Error creating zip file: {e}")
         sys.exit(1)
 
+# --- Startup Benchmark ---
+
+def process_tree_rss(pid):
+    """Resident memory of a process and its children, in MB (onefile runs as bootloader + child)."""
+    import psutil
+    try:
+        parent = psutil.Process(pid)
+        processes = [parent] + parent.children(recursive=True)
+    except psutil.NoSuchProcess:
+        return None
+    total = 0
+    for process in processes:
+        try:
+            total += process.memory_info().rss
+        except psutil.NoSuchProcess:
+            pass
+    return total / (1024 * 1024)
+
+def kill_process_tree(pid):
+    import psutil
+    try:
+        parent = psutil.Process(pid)
+    except psutil.NoSuchProcess:
+        return
+    processes = parent.children(recursive=True) + [parent]
+    for process in processes:
+        try:
+            process.kill()
+        except psutil.NoSuchProcess:
+            pass
+    psutil.wait_procs(processes, timeout=5)
+
+async def launch_once(command):
+    """
+    Launches a queueBot command against a fresh fake client and times it:
+    ready_ms is launch to the ready-check subscription (monitoring), first_accept_ms is launch
+    to the accept POST for a ready check fired as soon as it is ready.
+    """
+    from fake_lcu import FakeLeagueClient, READY_CHECK_URI
+
+    client = await FakeLeagueClient().start()
+    decoy = client.spawn_ux_process()
+    process = None
+    try:
+        started = time.perf_counter()
+        process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        deadline = started + BENCH_TIMEOUT
+        while client.listening_since(READY_CHECK_URI) is None:
+            if process.poll() is not None:
+                raise RuntimeError(f"{command[0]} exited with code {process.returncode} (is queueBot already running?)")
+            if time.perf_counter() > deadline:
+                raise RuntimeError(f"{command[0]} did not connect within {BENCH_TIMEOUT:.0f}s")
+            await asyncio.sleep(0.005)
+        ready_ms = (client.listening_since(READY_CHECK_URI) - started) * 1000
+
+        _, accepted = await client.pop()
+        accepted_at = await asyncio.wait_for(accepted, timeout=max(deadline - time.perf_counter(), 1.0))
+        return {
+            "ready_ms": ready_ms,
+            "first_accept_ms": (accepted_at - started) * 1000,
+            "rss_mb": process_tree_rss(process.pid),
+        }
+    finally:
+        if process is not None:
+            kill_process_tree(process.pid)
+        decoy.kill()
+        decoy.wait()
+        await client.stop()
+
+def summarize_launches(launches):
+    """The first launch is reported as cold, the rest as warm (medians and worst case)."""
+    summary = {"cold": launches[0]}
+    warm = launches[1:]
+    if warm:
+        summary["warm"] = {
+            key: {
+                "median": statistics.median(run[key] for run in warm),
+                "max": max(run[key] for run in warm),
+            }
+            for key in ("ready_ms", "first_accept_ms", "rss_mb")
+        }
+    return summary
+
+def benchmark_startup(profiles, runs, modes=tuple(BENCH_MODES), source=False):
+    """
+    Launches each profile's artifact (and, with source=True, src/main.py) `runs` times
+    per mode against the fake client and reports time-to-ready and resident memory.
+    The first launch after a build is the cold one; for a truly cold file cache, run
+    this right after a reboot with --benchmark-only.
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    sys.path.insert(0, os.path.join(here, "tests"))
+    results = {"version": VERSION, "runs": runs, "targets": {}}
+
+    targets = {}
+    for profile in profiles:
+        exe = artifact_path(profile)
+        if os.path.exists(exe):
+            targets[profile] = [os.path.abspath(exe)]
+        else:
+            print(f"Skipping {profile}: '{exe}' has not been built.")
+    if source:
+        targets["source"] = [sys.executable, os.path.join(here, "src", "main.py")]
+
+    config_dir = tempfile.mkdtemp(prefix="queueBot-bench-")
+    config_path = os.path.join(config_dir, "config.json")
+    with open(config_path, "w") as f:
+        json.dump(BENCH_CONFIG, f)
+    try:
+        for target, command in targets.items():
+            target_results = results["targets"][target] = {}
+            for mode in modes:
+                launches = []
+                for i in range(runs):
+                    launch = asyncio.run(launch_once(command + ["--config", config_path] + BENCH_MODES[mode]))
+                    launches.append(launch)
+                    print(f"{target} ({mode}) #{i + 1}: ready {launch['ready_ms']:.0f} ms, "
+                          f"first accept {launch['first_accept_ms']:.0f} ms, RSS {launch['rss_mb']:.1f} MB")
+                target_results[mode] = summarize_launches(launches)
+
+            if "tray" in target_results and "headless" in target_results:
+                # Typical (warm) footprint of each mode, or the only launch with --runs 1
+                rss = {
+                    mode: summary["warm"]["rss_mb"]["median"] if "warm" in summary else summary["cold"]["rss_mb"]
+                    for mode, summary in target_results.items()
+                }
+                target_results["headless_rss_saved_mb"] = rss["tray"] - rss["headless"]
+    finally:
+        shutil.rmtree(config_dir, ignore_errors=True)
+
+    return results
+
 def main():
-    print("🔨 Building queueBot...")
-    clean_build_dirs()
-    run_pyinstaller()
-    create_zip_release()
+    parser = argparse.ArgumentParser(description=f"Build queueBot {VERSION} release artifacts")
+    parser.add_argument("--profile", choices=PROFILES + ("all",), default="onefile",
+                        help="Build profile (default: onefile)")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="After building, time launches of each artifact against the fake client")
+    parser.add_argument("--benchmark-only", action="store_true",
+                        help="Benchmark the artifacts already in dist/ without rebuilding")
+    parser.add_argument("--runs", type=int, default=5, help="Launches per profile and mode (the first is the cold one)")
+    parser.add_argument("--modes", default=",".join(BENCH_MODES),
+                        help="Comma-separated launch modes to benchmark (default: tray,headless)")
+    parser.add_argument("--source", action="store_true", help="Also benchmark src/main.py with this Python")
+    parser.add_argument("--output", help="Write benchmark JSON to this file instead of stdout")
+    args = parser.parse_args()
+
+    profiles = PROFILES if args.profile == "all" else (args.profile,)
+
+    if not args.benchmark_only:
+        print("🔨 Building queueBot...")
+        clean_build_dirs()
+        for profile in profiles:
+            run_pyinstaller(profile)
+            create_zip_release(profile)
+
+    if args.benchmark or args.benchmark_only:
+        print("⏱️ Benchmarking startup...")
+        modes = [mode.strip() for mode in args.modes.split(",") if mode.strip()]
+        unknown = [mode for mode in modes if mode not in BENCH_MODES]
+        if unknown:
+            parser.error(f"unknown mode(s): {', '.join(unknown)}")
+        output = json.dumps(benchmark_startup(profiles, max(args.runs, 1), modes, args.source), indent=2)
+        if args.output:
+            with open(args.output, "w") as f:
+                f.write(output)
+        else:
+            print(output)
 
 if __name__ == "__main__":
     main()
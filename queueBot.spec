@@ -1,39 +1,87 @@
 # -*- mode: python ; coding: utf-8 -*-
+import os
+
 from PyInstaller.utils.hooks import collect_submodules
 
+# Build profile, set by build_release.py:
+#   onefile  single UPX-compressed EXE; unpacks itself to a temp dir on every launch
+#   onedir   EXE plus its runtime in a folder; nothing to unpack, so launches are faster
+PROFILE = os.environ.get('QUEUEBOT_BUILD_PROFILE', 'onefile')
+
+if PROFILE == 'onedir':
+    # Only the Windows notification backend is ever loaded (plyer picks it at runtime,
+    # so it has to be listed by hand). tkinter stays: the settings window imports it lazily.
+    hiddenimports = ['rich', 'pystray', 'PIL', 'plyer.platforms.win.notification']
+    excludes = [
+        'plyer.platforms.android', 'plyer.platforms.ios', 'plyer.platforms.macosx', 'plyer.platforms.linux',
+        'PIL.ImageQt', 'PIL.ImageTk', 'psutil.tests', 'lib2to3', 'pydoc_data', 'test',
+    ]
+else:
+    hiddenimports = ['rich', 'pystray', 'PIL'] + collect_submodules('plyer')
+    excludes = []
+
 a = Analysis(
     ['src/main.py'],
     pathex=['src'],
     binaries=[],
     datas=[('assets/gnome-thresh.ico', 'assets')],
-    hiddenimports=['rich', 'pystray', 'PIL'] + collect_submodules('plyer'),
+    hiddenimports=hiddenimports,
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    excludes=excludes,
     noarchive=False,
     optimize=0,
 )
 pyz = PYZ(a.pure)
 
-exe = EXE(
-    pyz,
-    a.scripts,
-    a.binaries,
-    a.datas,
-    [],
-    name='queueBot',
-    debug=False,
-    bootloader_ignore_signals=False,
-    strip=False,
-    upx=True,
-    upx_exclude=[],
-    runtime_tmpdir=None,
-    console=False,
-    disable_windowed_traceback=False,
-    argv_emulation=False,
-    target_arch=None,
-    codesign_identity=None,
-    entitlements_file=None,
-    icon=['assets/gnome-thresh.ico'],
-)
\ No newline at end of file
+if PROFILE == 'onedir':
+    exe = EXE(
+        pyz,
+        a.scripts,
+        [],
+        exclude_binaries=True,
+        name='queueBot',
+        debug=False,
+        bootloader_ignore_signals=False,
+        strip=False,
+        # Decompressing DLLs on every load costs more than the disk space saves
+        upx=False,
+        console=False,
+        disable_windowed_traceback=False,
+        argv_emulation=False,
+        target_arch=None,
+        codesign_identity=None,
+        entitlements_file=None,
+        icon=['assets/gnome-thresh.ico'],
+    )
+    coll = COLLECT(
+        exe,
+        a.binaries,
+        a.datas,
+        strip=False,
+        upx=False,
+        name='queueBot',
+    )
+else:
+    exe = EXE(
+        pyz,
+        a.scripts,
+        a.binaries,
+        a.datas,
+        [],
+        name='queueBot',
+        debug=False,
+        bootloader_ignore_signals=False,
+        strip=False,
+        upx=True,
+        upx_exclude=[],
+        runtime_tmpdir=None,
+        console=False,
+        disable_windowed_traceback=False,
+        argv_emulation=False,
+        target_arch=None,
+        codesign_identity=None,
+        entitlements_file=None,
+        icon=['assets/gnome-thresh.ico'],
+    )
@@ -0,0 +1,214 @@
+"""
+Record-and-replay of LCU websocket event streams.
+
+A capture is newline-delimited JSON, one record per received event:
+    {"t": <monotonic seconds>, "uri": ..., "type": ..., "data": ...}
+
+Replay feeds a capture back through the same handlers LCU registers with lcu_driver,
+at original speed, scaled speed, or as fast as possible (speed=0).
+
+Usage:
+    python capture.py replay session.ndjson [--speed 0] [--profile]
+"""
+import argparse
+import asyncio
+import cProfile
+import io
+import json
+import os
+import pstats
+import time
+
+from lcu_driver.events.responses import WebsocketEventResponse
+
+import config
+
+# Flush the capture file after this many records so a crash loses little
+FLUSH_EVERY = 32
+
+
+class EventRecorder:
+    """Appends every websocket event it sees to a capture file."""
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        self._file = open(path, "a", encoding="utf-8")
+
+    async def on_event(self, connection, event):
+        self.write(event.uri, event.type, event.data)
+
+    def write(self, uri, event_type, data, timestamp=None):
+        record = {
+            "t": time.monotonic() if timestamp is None else timestamp,
+            "uri": uri,
+            "type": event_type,
+            "data": data,
+        }
+        self._file.write(json.dumps(record, separators=(",", ":")) + "\n")
+        self.count += 1
+        if self.count % FLUSH_EVERY == 0:
+            self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+
+def read_capture(path):
+    """Yields capture records in file order, skipping a torn final line."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+def matching_handlers(connector, uri, event_type):
+    """Handlers lcu_driver would run for this event, using the same matching rules."""
+    handlers = []
+    for registration in connector.ws.registered_uris:
+        registered = registration['uri']
+        if registered == uri or (registered.endswith('/') and uri.startswith(registered)):
+            if event_type.upper() in registration['event_types']:
+                handlers.append(registration['coroutine_or_callable'])
+    return handlers
+
+
+class ReplayResponse:
+    def __init__(self, status, payload=None):
+        self.status = status
+        self._payload = payload
+
+    async def json(self):
+        return self._payload
+
+    def release(self):
+        pass
+
+
+class ReplayConnection:
+    """
+    Stands in for lcu_driver's Connection during replay.
+    REST calls are answered from the capture (e.g. the last lobby seen) and recorded.
+    """
+
+    def __init__(self):
+        self.lobby = None
+        self.requests = {}
+
+    async def request(self, method, endpoint, **kwargs):
+        key = f"{method.upper()} {endpoint}"
+        self.requests[key] = self.requests.get(key, 0) + 1
+        if method.lower() == 'get' and endpoint == '/lol-lobby/v2/lobby':
+            if self.lobby is None:
+                return ReplayResponse(404, {"message": "LOBBY_NOT_FOUND"})
+            return ReplayResponse(200, self.lobby)
+        return ReplayResponse(204)
+
+
+class EventReplayer:
+    """
+    Feeds a capture into the handlers of a ClientMonitor registered on the LCU.
+    speed=1.0 keeps original timing, 2.0 is twice as fast, 0 disables sleeping entirely.
+    """
+
+    def __init__(self, lcu, path, speed=1.0):
+        self.lcu = lcu
+        self.monitor = lcu.create_monitor()
+        self.path = path
+        self.speed = speed
+        self.connection = ReplayConnection()
+        self.events = 0
+        self.per_uri = {}
+
+    async def run(self):
+        """Replays the whole capture and waits for every handler it started. Returns stats."""
+        tasks = []
+        skip = {self.lcu.recorder.on_event} if self.lcu.recorder else set()
+        first_t = None
+        started = time.perf_counter()
+        cpu_started = time.process_time()
+
+        for record in read_capture(self.path):
+            if first_t is None:
+                first_t = record["t"]
+            if self.speed:
+                target = started + (record["t"] - first_t) / self.speed
+                delay = target - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+            uri, event_type, data = record["uri"], record["type"], record["data"]
+            if uri == '/lol-lobby/v2/lobby':
+                self.connection.lobby = None if event_type.upper() == 'DELETE' else data
+
+            self.events += 1
+            self.per_uri[uri] = self.per_uri.get(uri, 0) + 1
+            for handler in matching_handlers(self.monitor.connector, uri, event_type):
+                if handler in skip:
+                    continue
+                event = WebsocketEventResponse(event_type=event_type, uri=uri, data=data)
+                tasks.append(asyncio.create_task(handler(self.connection, event)))
+            # Let handlers run between events, as they would between websocket frames
+            await asyncio.sleep(0)
+
+        await asyncio.gather(*tasks, return_exceptions=True)
+        wall = time.perf_counter() - started
+        return {
+            "events": self.events,
+            "wall_seconds": wall,
+            "cpu_seconds": time.process_time() - cpu_started,
+            "events_per_sec": self.events / wall if wall else None,
+            "rest_calls": dict(self.connection.requests),
+            "per_uri": dict(sorted(self.per_uri.items(), key=lambda item: -item[1])),
+        }
+
+
+def replay_settings(settings):
+    """
+    The user's accept rules with every notification sink switched off. A replayed pop
+    must not post to real webhooks or show toasts; replay has no side effects.
+    """
+    return {**settings, "webhook_url": "", "sinks": [], "desktop_notifications": False}
+
+
+def replay_lcu(settings):
+    """An LCU for replay: the user's accept rules, no sinks, toasts or metrics endpoint."""
+    from lcu import LCU
+    return LCU(config=replay_settings(settings), desktop_notifications=False, metrics_port=0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a captured LCU event stream")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    replay = subparsers.add_parser("replay", help="Feed a capture through queueBot's handlers")
+    replay.add_argument("path", help="Capture file written by --capture")
+    replay.add_argument("--speed", type=float, default=1.0, help="1 = original timing, 0 = as fast as possible")
+    replay.add_argument("--profile", action="store_true", help="Print the top handler hotspots")
+    args = parser.parse_args()
+
+    config.init_console()
+    # Don't pop the setup window just to replay; an empty config accepts every queue
+    settings = config.load_or_create_config() if os.path.exists(config.CONFIG_FILE) else {}
+    lcu = replay_lcu(settings)
+    replayer = EventReplayer(lcu, args.path, speed=args.speed)
+
+    profiler = cProfile.Profile() if args.profile else None
+    if profiler:
+        profiler.enable()
+    stats = lcu.loop.run_until_complete(replayer.run())
+    if profiler:
+        profiler.disable()
+    lcu.loop.run_until_complete(lcu.shutdown())
+
+    config.console.print_json(data=stats)
+    if profiler:
+        output = io.StringIO()
+        pstats.Stats(profiler, stream=output).sort_stats("cumulative").print_stats(25)
+        config.console.print(output.getvalue(), markup=False, highlight=False)
+
+
+if __name__ == "__main__":
+    main()
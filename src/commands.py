@@ -0,0 +1,209 @@
+"""
+Commands: the only way other threads change the running LCU.
+
+The LCU's state (clients, pause flags, config, sinks, counters) belongs to its
+event loop. The tray, the settings window and signal handlers don't touch it
+directly; they submit a command to the CommandChannel and get back a
+concurrent.futures.Future. One task on the loop runs commands in the order they
+were submitted, so a command always sees the effects of the ones before it.
+
+    lcu.commands.submit(TogglePause())             # fire and forget
+    status = lcu.commands.call(StatusQuery())      # wait for the result (not from the loop)
+"""
+import asyncio
+import concurrent.futures
+import threading
+
+import config
+
+# How long call() waits for the loop before giving up
+COMMAND_TIMEOUT = 2.0
+
+
+class Command:
+    """A request for the LCU loop. run() executes there and may be a coroutine."""
+
+    def run(self, lcu):
+        raise NotImplementedError
+
+    def __repr__(self):
+        fields = ", ".join(f"{key}={value!r}" for key, value in vars(self).items())
+        return f"{type(self).__name__}({fields})"
+
+
+class _PauseCommand(Command):
+    """client is an LCU.clients key; None applies to every client at once."""
+
+    def __init__(self, client=None):
+        self.client = client
+
+    def target(self, lcu):
+        if self.client is None:
+            return lcu
+        monitor = lcu.clients.get(self.client)
+        if monitor is None:
+            raise KeyError(f"No client {self.client!r}")
+        return monitor
+
+    def set(self, lcu, paused):
+        target = self.target(lcu)
+        target.paused = paused
+        state = "Paused" if paused else "Resumed"
+        if self.client is None:
+            config.console.log(f"[info]Monitoring has been {state}.[/]")
+        else:
+            config.console.log(f"[info]{target.tag}: monitoring has been {state}.[/]")
+        lcu.clients_changed()
+        return paused
+
+
+class Pause(_PauseCommand):
+    def run(self, lcu):
+        return self.set(lcu, True)
+
+
+class Resume(_PauseCommand):
+    def run(self, lcu):
+        return self.set(lcu, False)
+
+
+class TogglePause(_PauseCommand):
+    """Flips the pause flag. Decided on the loop, so two quick toggles never race."""
+
+    def run(self, lcu):
+        return self.set(lcu, not self.target(lcu).paused)
+
+
+class ApplyConfig(Command):
+    """Swaps in new settings (e.g. from the settings window). Returns the snapshot's version."""
+
+    def __init__(self, data):
+        self.data = data
+
+    def run(self, lcu):
+        snapshot = lcu.config_store.replace(self.data)
+        for error in snapshot.errors:
+            config.console.log(f"[danger]Ignoring invalid accept rule: {error}[/]")
+        return snapshot.version
+
+
+class ReloadConfig(Command):
+    """Re-reads the config file. Returns the new version, or None if it was unchanged."""
+
+    def run(self, lcu):
+        snapshot = lcu.config_store.reload_if_changed(force=True)
+        if snapshot is None:
+            config.console.log("[info]config.json is unchanged.[/]")
+            return None
+        config.console.log(f"[info]Reloaded config.json (version {snapshot.version}).[/]")
+        for error in snapshot.errors:
+            config.console.log(f"[danger]Ignoring invalid accept rule: {error}[/]")
+        return snapshot.version
+
+
+class StatusQuery(Command):
+    """Returns LCU.status(): a plain dict that is safe to read on any thread."""
+
+    def run(self, lcu):
+        return lcu.status()
+
+
+class SessionStats(Command):
+    """Returns this session's pop stats from the journal as lines, or None without a journal."""
+
+    async def run(self, lcu):
+        journal = lcu.journal
+        if journal is None:
+            return None
+
+        def read():
+            # Include pops still waiting in the writer's queue
+            journal.flush()
+            return journal.format_stats()
+        # SQLite reads block, so they run off the loop
+        return await lcu.loop.run_in_executor(None, read)
+
+
+class WatchClients(Command):
+    """Sets the callback run on the loop whenever a client connects, disconnects or changes state."""
+
+    def __init__(self, callback):
+        self.callback = callback
+
+    def run(self, lcu):
+        lcu.on_clients_changed = self.callback
+        lcu.clients_changed()
+
+
+class ExportLatency(Command):
+    """Writes the latency report to path. Returns the path."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def run(self, lcu):
+        return lcu.latency.dump_json(self.path)
+
+
+class Shutdown(Command):
+    """Disconnects, drains notifications for up to drain_timeout, then stops the loop."""
+
+    def __init__(self, drain_timeout=None):
+        self.drain_timeout = drain_timeout
+
+    async def run(self, lcu):
+        await lcu.shutdown(drain_timeout=self.drain_timeout)
+
+
+class CommandChannel:
+    """Thread-safe queue of Commands, served by one task on the LCU loop."""
+
+    def __init__(self, lcu):
+        self.lcu = lcu
+        self.executed = 0
+        self._queue = asyncio.Queue()
+        self._loop_thread = None
+
+    def submit(self, command):
+        """Queues a command from any thread. Returns a concurrent.futures.Future with its result."""
+        future = concurrent.futures.Future()
+        try:
+            self.lcu.loop.call_soon_threadsafe(self._queue.put_nowait, (command, future))
+        except RuntimeError:
+            # The loop has already been closed
+            future.set_exception(RuntimeError(f"LCU loop is not running; {command!r} was not run"))
+        return future
+
+    def call(self, command, timeout=COMMAND_TIMEOUT):
+        """Submits a command and waits for its result. Raises on timeout or if the command failed."""
+        if threading.get_ident() == self._loop_thread:
+            raise RuntimeError("call() would block the LCU loop; use submit() there")
+        return self.submit(command).result(timeout)
+
+    async def serve(self):
+        """Runs queued commands one at a time until cancelled."""
+        self._loop_thread = threading.get_ident()
+        while True:
+            command, future = await self._queue.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                result = command.run(self.lcu)
+                if asyncio.iscoroutine(result):
+                    result = await result
+            except asyncio.CancelledError:
+                # The loop is being torn down mid-command (e.g. stop() gave up waiting)
+                future.set_exception(RuntimeError(f"LCU stopped while running {command!r}"))
+                raise
+            except Exception as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+            self.executed += 1
+
+    def cancel_pending(self):
+        """Fails commands still queued when the loop stops, so nobody waits on them."""
+        while not self._queue.empty():
+            command, future = self._queue.get_nowait()
+            if future.set_running_or_notify_cancel():
+                future.set_exception(RuntimeError(f"LCU stopped before running {command!r}"))
@@ -1,10 +1,13 @@
 import json
 import os
 import sys
-from rich.console import Console
-from rich.theme import Theme
-from rich.panel import Panel
-from rich.prompt import Prompt
+import tempfile
+import threading
+from collections.abc import Mapping
+from types import MappingProxyType
+
+import policy
+from logbuffer import BufferedConsole, PlainConsole
 
 # Ensure we find config.json relative to this script, not the CWD
 if getattr(sys, 'frozen', False):
@@ -15,30 +18,195 @@ else:
     BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
 CONFIG_FILE = os.path.join(BASE_DIR, "config.json")
+# Console output is mirrored here (rotated at 1 MB, 3 backups kept)
+LOG_FILE = os.path.join(BASE_DIR, "queueBot.log")
+# SQLite journal of every ready check (see journal.py)
+JOURNAL_FILE = os.path.join(BASE_DIR, "queueBot.db")
+# The client's queue list, refetched once per client version (see queues.py)
+QUEUE_CACHE_FILE = os.path.join(BASE_DIR, "queues.json")
+# League install directories found so far, whose lockfiles discovery watches (see discovery.py)
+DISCOVERY_FILE = os.path.join(BASE_DIR, "clients.json")
 
 # --- RICH THEME SETUP ---
-custom_theme = Theme({
+# rich is imported in init_console so importing config stays cheap
+THEME_STYLES = {
     "info": "cyan",
     "success": "bold green",
     "warning": "bold yellow",
     "danger": "bold red",
     "highlight": "bold magenta"
-})
+}
 # Defer initialization until we are sure we have a valid output stream
 console = None
 
-def init_console():
-    """Initializes the Rich console object. Must be called after AllocConsole."""
+def init_console(file=None, plain=False):
+    """
+    Initializes the console object. Must be called after AllocConsole.
+    Pass a file to send output somewhere other than stdout (e.g. to silence it in benchmarks).
+    plain=True uses PlainConsole instead, so rich is never imported (headless mode).
+    Output is rendered on a background thread (see logbuffer), so printing never blocks.
+    """
     global console
-    console = Console(theme=custom_theme, force_terminal=True)
-
-# Queue ID Translation Map
-QUEUE_ID_MAP = {
-    1090: "TFT Normal", 1100: "TFT Ranked", 1130: "TFT Hyper Roll",
-    1160: "TFT Double Up", 420: "Ranked Solo/Duo", 440: "Ranked Flex",
-    400: "Draft Pick", 430: "Blind Pick", 450: "ARAM", 1700: "Arena",
-    1220: "Tocker's Trials"
-}
+    if plain:
+        console = BufferedConsole(PlainConsole(file=file))
+        return
+    from rich.console import Console
+    from rich.theme import Theme
+    console = BufferedConsole(Console(theme=Theme(THEME_STYLES), force_terminal=file is None, file=file))
+
+def print_panel(body, title, **options):
+    """Prints body in a rich Panel (options go to Panel), or as plain lines on a PlainConsole."""
+    console.panel(body, title, **options)
+
+# --- Config Snapshots ---
+# How often the LCU loop checks config.json for edits made outside the app
+CONFIG_POLL_INTERVAL = 2.0
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+def _thaw(value):
+    if isinstance(value, Mapping):
+        return {key: _thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(item) for item in value]
+    return value
+
+class ConfigSnapshot(Mapping):
+    """
+    One immutable, numbered version of the config. Reads like a dict (nested lists
+    become tuples); use to_dict() for an editable copy.
+    Invalid accept rules are dropped (listed in .errors), and the compiled accept
+    policies (global, and per client from "client_rules") are built once here
+    rather than on every pop.
+    """
+
+    def __init__(self, data, version=1):
+        clean, self.errors = policy.sanitize(dict(data))
+        self.version = version
+        self.policy = policy.compile_policy(clean)
+        self.client_policies = self._compile_client_rules(clean)
+        self._data = _freeze(clean)
+
+    def _compile_client_rules(self, clean):
+        """
+        client_rules maps a client's Riot ID ("Name#TAG") to rules that override the
+        global ones for that account only.
+        """
+        rules = clean.get("client_rules") or {}
+        if not isinstance(rules, dict):
+            self.errors.append("client_rules must map Riot IDs to accept rules.")
+            clean.pop("client_rules")
+            return {}
+        policies = {}
+        for client, overrides in rules.items():
+            if not isinstance(overrides, dict):
+                self.errors.append(f"client_rules for {client} must be an object of accept rules.")
+                continue
+            merged, errors = policy.sanitize({**clean, **overrides})
+            self.errors.extend(f"{client}: {error}" for error in errors)
+            policies[client] = policy.compile_policy(merged)
+        return policies
+
+    def policy_for(self, client):
+        """The accept policy for a client tag, falling back to the global rules."""
+        return self.client_policies.get(client, self.policy)
+
+    def __getitem__(self, key):
+        return self._data[key]
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def to_dict(self):
+        return _thaw(self._data)
+
+class ConfigStore:
+    """
+    Holds the current ConfigSnapshot. Any thread may read .current; replace() builds
+    the next version and swaps the reference under a lock, so readers get the old or
+    the new version, never a mix of both.
+    With a path, reload_if_changed() picks up edits to that file by its mtime and size.
+    """
+
+    def __init__(self, data=None, path=None):
+        self.path = path
+        self._lock = threading.Lock()
+        self._stamp = self._file_stamp()
+        self.current = ConfigSnapshot(data or {})
+
+    def replace(self, data):
+        """Makes data the current config. Returns the current snapshot (unchanged if data is the same)."""
+        with self._lock:
+            snapshot = ConfigSnapshot(data, version=self.current.version + 1)
+            if snapshot == self.current:
+                return self.current
+            self.current = snapshot
+            return snapshot
+
+    def _file_stamp(self):
+        try:
+            stat = os.stat(self.path) if self.path else None
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size) if stat else None
+
+    def reload_if_changed(self, force=False):
+        """Re-reads the config file if it changed (or always, with force). Returns the new snapshot, or None."""
+        stamp = self._file_stamp()
+        if stamp is None or (stamp == self._stamp and not force):
+            return None
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            # Mid-write by an editor that doesn't replace the file atomically; retry next poll
+            return None
+        self._stamp = stamp
+        previous = self.current
+        snapshot = self.replace(data)
+        return snapshot if snapshot is not previous else None
+
+def write_json_atomic(path, data, indent=4):
+    """Writes JSON to a temp file in the same folder, then renames it over path, so readers never see half a file."""
+    fd, temp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}-", suffix=".tmp", dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=indent, separators=None if indent else (",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+def save_config(data, path=None):
+    """Writes the config atomically, so the LCU thread never reads a half-written config.json."""
+    write_json_atomic(path or CONFIG_FILE, data)
+
+def load_config():
+    """
+    Loads config.json without any UI. Returns None if it is missing.
+    Raises json.JSONDecodeError if it is corrupted.
+    """
+    if not os.path.exists(CONFIG_FILE):
+        return None
+    with open(CONFIG_FILE, "r") as f:
+        config = json.load(f)
+
+    # Invalid accept rules are dropped so the rest of the policy still compiles
+    config, errors = policy.sanitize(config)
+    for error in errors:
+        console.print(f"[warning]Ignoring invalid accept rule: {error}[/]")
+    return config
 
 def load_or_create_config():
     """
@@ -49,17 +217,16 @@ def load_or_create_config():
     if console is None:
         init_console()
 
-    if os.path.exists(CONFIG_FILE):
-        try:
-            with open(CONFIG_FILE, "r") as f:
-                config = json.load(f)
-                return config
-        except json.JSONDecodeError:
-            console.print("[danger]Config file is corrupted. Recreating...[/]")
+    try:
+        config = load_config()
+        if config is not None:
+            return config
+    except json.JSONDecodeError:
+        console.print("[danger]Config file is corrupted. Recreating...[/]")
     
     return open_settings_ui()
 
-def open_settings_ui(current_config=None, on_save_callback=None):
+def open_settings_ui(current_config=None, on_save_callback=None, catalog=None):
     """
     Launches the GUI for configuration.
     """
@@ -71,14 +238,18 @@ def open_settings_ui(current_config=None, on_save_callback=None):
             "webhook_url": "",
             "user_id": "",
             "desktop_notifications": True,
-            "allowed_queue_ids": []
+            "allowed_queue_ids": [],
+            "accept_windows": [],
+            "max_pops_per_hour": 0,
+            "max_party_size": 0,
+            "allowed_roles": []
         }
 
     # This callback updates the in-memory config if needed, though usually the caller reloads it
     # or the app restarts. For now, we return the new config if we can, but since the GUI is blocking
     # and writes to file, we can just reload from file after it closes.
     
-    gui.open_settings(current_config, on_save_callback=on_save_callback)
+    gui.open_settings(current_config, on_save_callback=on_save_callback, catalog=catalog)
     
     # Reload to confirm what was saved
     if os.path.exists(CONFIG_FILE):
@@ -0,0 +1,295 @@
+"""
+Client discovery: finds League clients as they start, without scanning the process
+list every half second while none is running.
+
+The client writes a lockfile (name:pid:port:password:protocol) into its install
+directory when its API comes up and deletes it on exit. Discovery stats that file
+in every known install directory, so a client is picked up as soon as the file
+appears. Install directories come from the platform default, config.json's
+"league_path" and every client ever found by a process scan (remembered in
+clients.json).
+
+A process scan still runs for clients installed elsewhere and for extra clients,
+but it backs off to SCAN_INTERVAL_MAX while nothing changes. Both intervals start
+at the fast end and reset to it when a lockfile changes or a client goes away.
+After a client goes away its lockfile is polled at the fast interval for a minute,
+so restarts and patches reconnect quickly.
+"""
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import deque
+
+import psutil
+from lcu_driver.utils import parse_cmdline_args
+
+import config
+
+LOCKFILE_NAME = "lockfile"
+DEFAULT_INSTALL_DIRS = {
+    "win32": [r"C:\Riot Games\League of Legends"],
+    "darwin": ["/Applications/League of Legends.app/Contents/LoL"],
+}
+UX_PROCESS_NAMES = ("LeagueClientUx.exe", "LeagueClientUx")
+
+# --- Adaptive Polling ---
+# Each idle poll multiplies the interval by BACKOFF, up to the max
+LOCKFILE_INTERVAL_MIN = 0.25
+LOCKFILE_INTERVAL_MAX = 2.0
+SCAN_INTERVAL_MIN = 1.0
+SCAN_INTERVAL_MAX = 30.0
+BACKOFF = 1.5
+# After a client goes away its lockfile is polled at the fast interval this long, covering restarts and patches
+RESTART_WINDOW = 60.0
+# Connect measurements kept for status lines and the metrics endpoint
+CONNECTS_KEPT = 20
+
+
+def parse_lockfile(text):
+    """Returns (pid, port, password) from a lockfile's contents, or None if it's malformed."""
+    parts = text.strip().split(":")
+    if len(parts) != 5:
+        return None
+    try:
+        return int(parts[1]), int(parts[2]), parts[3]
+    except ValueError:
+        return None
+
+
+def find_client_processes():
+    """
+    Running LeagueClientUx processes as {pid: (process, command-line args)}.
+    Blocking (psutil), so run it off the event loop.
+    """
+    clients = {}
+    for process in psutil.process_iter(attrs=["name", "cmdline"]):
+        cmdline = process.info.get("cmdline") or []
+        # Under wine the process name differs, but the command line still names the executable
+        if process.info.get("name") in UX_PROCESS_NAMES or (cmdline and cmdline[0].endswith(UX_PROCESS_NAMES[0])):
+            clients[process.pid] = (process, parse_cmdline_args(cmdline))
+    return clients
+
+
+class Lockfile:
+    """One install directory's lockfile and the last state discovery saw it in."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.path = os.path.join(directory, LOCKFILE_NAME)
+        # (mtime_ns, size) of the version last acted on; None while there is no file
+        self.stamp = None
+        self.port = None
+
+    def check(self):
+        """Stats the file. Returns True if it appeared or was rewritten since the last check."""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            self.stamp = None
+            self.port = None
+            return False
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        if stamp == self.stamp:
+            return False
+        self.stamp = stamp
+        return True
+
+    def read(self):
+        """Parses the lockfile, or returns None if it can't be read or its client has exited."""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                parsed = parse_lockfile(f.read())
+        except OSError:
+            return None
+        # A crashed client leaves its lockfile behind
+        if parsed is None or not psutil.pid_exists(parsed[0]):
+            return None
+        return parsed
+
+
+class ClientDiscovery:
+    """
+    Attaches a ClientMonitor to every League client that appears, until cancelled.
+    Runs on the LCU loop; only the process scan goes to the executor.
+    """
+
+    def __init__(self, lcu, state_path=None):
+        self.lcu = lcu
+        self.state_path = state_path
+        self.lockfiles = {}
+        self.lockfile_interval = LOCKFILE_INTERVAL_MIN
+        self.scan_interval = SCAN_INTERVAL_MIN
+        self._next_scan = 0.0
+        self._fast_until = 0.0
+        self._wakeup = asyncio.Event()
+        # --- Measurements ---
+        self.wakeups = 0
+        self._recent_wakeups = deque()
+        self.scans = 0
+        self.scan_cpu_seconds = 0.0
+        self.connects = deque(maxlen=CONNECTS_KEPT)
+
+        for directory in DEFAULT_INSTALL_DIRS.get(sys.platform, []):
+            self.add_install_dir(directory, save=False)
+        for directory in self.load_install_dirs():
+            self.add_install_dir(directory, save=False)
+
+    # --- Install Directories ---
+
+    def load_install_dirs(self):
+        if not self.state_path:
+            return []
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                return [d for d in json.load(f).get("install_dirs", []) if isinstance(d, str)]
+        except FileNotFoundError:
+            return []
+        except (OSError, ValueError, AttributeError) as e:
+            config.console.log(f"[yellow]Ignoring {self.state_path}: {e}[/]")
+            return []
+
+    def save_install_dirs(self):
+        """Remembers learned install directories; blocking, so called through the executor."""
+        config.write_json_atomic(self.state_path, {"install_dirs": sorted(self.lockfiles)})
+
+    def add_install_dir(self, directory, save=True):
+        """Starts watching a directory's lockfile. Returns True if it wasn't watched yet."""
+        if not directory:
+            return False
+        directory = os.path.normpath(directory)
+        if directory in self.lockfiles:
+            return False
+        self.lockfiles[directory] = Lockfile(directory)
+        if save and self.state_path:
+            self.lcu.loop.run_in_executor(None, self.save_install_dirs)
+        return True
+
+    # --- Polling ---
+
+    def wake(self):
+        """Resets both intervals and polls now, e.g. after a client went away. Call on the LCU loop."""
+        self.lockfile_interval = LOCKFILE_INTERVAL_MIN
+        self.scan_interval = SCAN_INTERVAL_MIN
+        self._next_scan = 0.0
+        self._fast_until = time.monotonic() + RESTART_WINDOW
+        self._wakeup.set()
+
+    def _attached_ports(self):
+        return {monitor.port for monitor in self.lcu.clients.values() if monitor.port is not None}
+
+    def check_lockfiles(self):
+        """Attaches clients whose lockfile appeared or changed. Returns True if any did."""
+        changed = False
+        ports = self._attached_ports()
+        league_path = self.lcu.config.get("league_path")
+        if league_path:
+            self.add_install_dir(league_path, save=False)
+        for lockfile in self.lockfiles.values():
+            if not lockfile.check():
+                continue
+            changed = True
+            found_at = time.time()
+            parsed = lockfile.read()
+            if parsed is None:
+                continue
+            pid, port, password = parsed
+            lockfile.port = port
+            if port in ports:
+                continue
+            # mtime_ns is when the client wrote the file; the gap is our detection delay
+            detect_delay = max(found_at - lockfile.stamp[0] / 1e9, 0.0)
+            self.lcu.attach(f"{pid}:{pid}:{port}:{password}", port=port, lockfile=lockfile,
+                            discovered=("lockfile", detect_delay))
+            ports.add(port)
+        return changed
+
+    async def scan_processes(self):
+        """Attaches clients found in the process list; learns their install directories."""
+        def scan():
+            started = time.thread_time()
+            try:
+                return find_client_processes()
+            finally:
+                self.scan_cpu_seconds += time.thread_time() - started
+
+        processes = await self.lcu.loop.run_in_executor(None, scan)
+        self.scans += 1
+        found = False
+        ports = self._attached_ports()
+        for pid, (process, args) in processes.items():
+            if self.add_install_dir(args.get("install-directory")):
+                found = True
+            port = int(args["app-port"]) if args.get("app-port", "").isdigit() else None
+            if pid in self.lcu.clients or (port is not None and port in ports):
+                continue
+            self.lcu.attach(process, pid=pid, port=port, discovered=("process scan", None))
+            found = True
+        for monitor in list(self.lcu.clients.values()):
+            # A client that exits before its API comes up never fires close
+            if monitor.pid is not None and monitor.pid not in processes and not monitor.connected:
+                monitor.task.cancel()
+        return found
+
+    def drop_stale(self):
+        """Cancels lockfile-attached monitors still connecting to a client whose lockfile went away."""
+        for monitor in list(self.lcu.clients.values()):
+            lockfile = monitor.lockfile
+            if lockfile is not None and not monitor.connected and lockfile.port != monitor.port:
+                monitor.task.cancel()
+
+    async def run(self):
+        while True:
+            self._count_wakeup()
+            if self.check_lockfiles() or time.monotonic() < self._fast_until:
+                self.lockfile_interval = LOCKFILE_INTERVAL_MIN
+            else:
+                self.lockfile_interval = min(self.lockfile_interval * BACKOFF, LOCKFILE_INTERVAL_MAX)
+            self.drop_stale()
+
+            now = time.monotonic()
+            if now >= self._next_scan:
+                if await self.scan_processes():
+                    self.scan_interval = SCAN_INTERVAL_MIN
+                else:
+                    self.scan_interval = min(self.scan_interval * BACKOFF, SCAN_INTERVAL_MAX)
+                now = time.monotonic()
+                self._next_scan = now + self.scan_interval
+
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), min(self.lockfile_interval, self._next_scan - now))
+            except asyncio.TimeoutError:
+                pass
+
+    # --- Measurements ---
+
+    def _count_wakeup(self):
+        now = time.monotonic()
+        self.wakeups += 1
+        self._recent_wakeups.append(now)
+        while self._recent_wakeups[0] < now - 60:
+            self._recent_wakeups.popleft()
+
+    def wakeups_per_minute(self):
+        return len(self._recent_wakeups)
+
+    def record_connect(self, monitor):
+        """Called when a monitor's API comes up; logs how long discovery and connecting took."""
+        if monitor.discovered is None:
+            return
+        source, detect_delay = monitor.discovered
+        connect_seconds = time.monotonic() - monitor.attached_at
+        self.connects.append({"source": source, "detect_s": detect_delay, "connect_s": connect_seconds})
+        detail = f"found by {source}"
+        if detect_delay is not None:
+            detail += f" {detect_delay * 1000:.0f}ms after it started"
+        config.console.log(f"[info]{monitor.prefix}API ready {connect_seconds * 1000:.0f}ms after discovery ({detail}).[/]")
+
+    def format_stats(self):
+        return (
+            f"Discovery: watching {len(self.lockfiles)} lockfile location(s), "
+            f"{self.wakeups_per_minute()} wakeup(s) in the last minute, "
+            f"{self.scans} process scan(s) ({self.scan_cpu_seconds * 1000:.0f}ms CPU)"
+        )
@@ -0,0 +1,182 @@
+"""
+Prometheus metrics endpoint, served from the LCU event loop on localhost.
+
+Enable it with "metrics_port" in config.json (or --metrics-port), then scrape
+http://127.0.0.1:<port>/metrics. The accept path only bumps counters it already
+owns; everything else is read from existing state when a scrape arrives.
+"""
+import asyncio
+import math
+
+import config
+
+METRICS_HOST = "127.0.0.1"
+# How often the loop-lag probe wakes up
+LAG_PROBE_INTERVAL = 1.0
+
+
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{escape_label(value)}"' for key, value in labels.items()) + "}"
+
+
+def format_bound(bound):
+    return "+Inf" if bound == math.inf else repr(bound)
+
+
+class MetricsText:
+    """Builds a Prometheus text-format (0.0.4) exposition, one metric family at a time."""
+
+    def __init__(self):
+        self.lines = []
+
+    def family(self, name, kind, help_text, samples):
+        """samples is a list of (labels dict, value); families without samples still get HELP/TYPE."""
+        self.lines.append(f"# HELP {name} {help_text}")
+        self.lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            self.lines.append(f"{name}{format_labels(labels)} {value}")
+
+    def histogram(self, name, help_text, histogram):
+        self.lines.append(f"# HELP {name} {help_text}")
+        self.lines.append(f"# TYPE {name} histogram")
+        for bound, count in histogram.cumulative():
+            self.lines.append(f'{name}_bucket{{le="{format_bound(bound)}"}} {count}')
+        self.lines.append(f"{name}_sum {histogram.sum}")
+        self.lines.append(f"{name}_count {histogram.count}")
+
+    def render(self):
+        return "\n".join(self.lines) + "\n"
+
+
+class MetricsExporter:
+    """Serves /metrics for an LCU and probes its event-loop lag. Start and stop it on the LCU loop."""
+
+    def __init__(self, lcu, port, host=METRICS_HOST):
+        self.lcu = lcu
+        self.port = port
+        self.host = host
+        self.loop_lag = 0.0
+        self.loop_lag_max = 0.0
+        self.scrapes = 0
+        self._runner = None
+        self._lag_probe = None
+
+    async def start(self):
+        # Only pulled in when the endpoint is enabled
+        from aiohttp import web
+
+        app = web.Application()
+        app.router.add_get("/metrics", self.handle_metrics)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        try:
+            await web.TCPSite(self._runner, self.host, self.port).start()
+        except OSError:
+            await self._runner.cleanup()
+            self._runner = None
+            raise
+        self._lag_probe = asyncio.create_task(self.probe_loop_lag())
+        config.console.log(f"[info]Metrics at http://{self.host}:{self.port}/metrics[/]")
+
+    async def stop(self):
+        if self._lag_probe is not None:
+            self._lag_probe.cancel()
+            self._lag_probe = None
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def probe_loop_lag(self):
+        """Measures how late a timer fires: time the loop spent busy with other callbacks."""
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(LAG_PROBE_INTERVAL)
+            self.loop_lag = max(loop.time() - started - LAG_PROBE_INTERVAL, 0.0)
+            self.loop_lag_max = max(self.loop_lag_max, self.loop_lag)
+
+    async def handle_metrics(self, request):
+        from aiohttp import web
+
+        self.scrapes += 1
+        return web.Response(text=self.render(), content_type="text/plain", charset="utf-8",
+                            headers={"X-Content-Type-Options": "nosniff"})
+
+    def render(self):
+        lcu = self.lcu
+        text = MetricsText()
+
+        pops, accepts, failures, skips = {}, {}, {}, {}
+        for (queue, decision, accepted), count in lcu.pop_counts.items():
+            pops[queue] = pops.get(queue, 0) + count
+            if decision == "accept":
+                target = accepts if accepted else failures
+                target[queue] = target.get(queue, 0) + count
+            else:
+                key = (queue, decision.partition(":")[2] or decision)
+                skips[key] = skips.get(key, 0) + count
+
+        text.family("queuebot_pops_total", "counter", "Ready checks seen, by queue.",
+                    [({"queue": queue}, count) for queue, count in sorted(pops.items())])
+        text.family("queuebot_accepts_total", "counter", "Ready checks accepted, by queue.",
+                    [({"queue": queue}, count) for queue, count in sorted(accepts.items())])
+        text.family("queuebot_accept_failures_total", "counter", "Ready checks the client never took an accept for.",
+                    [({"queue": queue}, count) for queue, count in sorted(failures.items())])
+        text.family("queuebot_skips_total", "counter", "Ready checks skipped, by queue and reason.",
+                    [({"queue": queue, "reason": reason}, count) for (queue, reason), count in sorted(skips.items())])
+        text.family("queuebot_accept_retries_total", "counter", "Accept POSTs re-sent after a failed attempt.",
+                    [({}, lcu.client_counts["accept_retries"])])
+        text.family("queuebot_accept_new_connections_total", "counter",
+                    "Accepts that had to open a new connection to the client instead of reusing a pooled one.",
+                    [({}, lcu.client_counts["accept_new_connections"])])
+        text.histogram("queuebot_accept_latency_seconds", "Websocket event to accept acknowledged.",
+                       lcu.accept_latency)
+
+        clients = list(lcu.clients.values())
+        text.family("queuebot_clients", "gauge", "League clients being monitored, by state.", [
+            ({"state": "connected"}, sum(1 for monitor in clients if monitor.connected)),
+            ({"state": "connecting"}, sum(1 for monitor in clients if not monitor.connected)),
+        ])
+        text.family("queuebot_client_connects_total", "counter", "Client API connections established.",
+                    [({}, lcu.client_counts["connects"])])
+        text.family("queuebot_client_disconnects_total", "counter", "Client API connections lost.",
+                    [({}, lcu.client_counts["disconnects"])])
+        discovery = lcu.discovery
+        text.family("queuebot_discovery_wakeups_total", "counter", "Times client discovery woke up to poll.",
+                    [({}, discovery.wakeups)])
+        text.family("queuebot_discovery_process_scans_total", "counter", "Process-list scans for League clients.",
+                    [({}, discovery.scans)])
+        text.family("queuebot_discovery_scan_cpu_seconds_total", "counter", "CPU time spent scanning the process list.",
+                    [({}, discovery.scan_cpu_seconds)])
+        last_connect = discovery.connects[-1] if discovery.connects else None
+        text.family("queuebot_client_connect_seconds", "gauge", "Discovery to API ready, for the last client found.",
+                    [({"source": last_connect["source"]}, last_connect["connect_s"])] if last_connect else [])
+        text.family("queuebot_ws_events_total", "counter", "Websocket events decoded, by handled endpoint (other: the rest).",
+                    [({"uri": uri}, count) for uri, count in sorted(lcu.ws_events.items())])
+
+        text.family("queuebot_event_loop_lag_seconds", "gauge", "Delay of the last loop-lag probe timer.",
+                    [({}, self.loop_lag)])
+        text.family("queuebot_event_loop_lag_max_seconds", "gauge", "Largest loop lag seen since start.",
+                    [({}, self.loop_lag_max)])
+
+        dispatcher = lcu.dispatcher
+        text.family("queuebot_notification_queue_depth", "gauge", "Notifications waiting for delivery, by sink.",
+                    [({"sink": name}, dispatcher.queue_depth(name)) for name in sorted(dispatcher.sinks)])
+        text.family("queuebot_notifications_total", "counter", "Notification deliveries, by sink and outcome.", [
+            ({"sink": name, "outcome": outcome}, count)
+            for name, stats in sorted(dispatcher.stats.items())
+            for outcome, count in stats.items()
+        ])
+        text.family("queuebot_sink_circuit_open", "gauge", "1 while a sink's circuit breaker is open.",
+                    [({"sink": name}, int(dispatcher.breakers[name].is_open)) for name in sorted(dispatcher.sinks)])
+        text.family("queuebot_paused", "gauge", "1 while monitoring is paused for every client.",
+                    [({}, int(lcu.paused))])
+        text.family("queuebot_config_version", "gauge", "Version of the active config snapshot.",
+                    [({}, lcu.config.version)])
+        return text.render()
@@ -1,20 +1,38 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
-import json
 import os
 import sys
 
-# Import config to access QUEUE_ID_MAP and CONFIG_FILE
+# Import config to access CONFIG_FILE
 # Note: In a larger app, I'd separate constants, but circular import risk is low if we import inside func or careful structure.
 # Here we will pass constants in or just import config module.
 import config
+import policy
+from notifications import MAX_SINK_CONCURRENCY, SINK_TYPES, sink_target, validate_sinks
+from queues import QueueCatalog, unknown_name
+
+# Label for the target field of each sink type in SinkDialog
+SINK_TARGET_LABELS = {"discord": "Webhook URL:", "http": "URL:", "command": "Command:", "socket": "Address (host:port or unix:/path):"}
+
+# Queue checkboxes drawn per idle callback while the list fills in
+QUEUE_BATCH_SIZE = 40
+
+# Settings window size. The sections scroll, so it fits 768p screens with a taskbar.
+WINDOW_WIDTH = 450
+WINDOW_HEIGHT = 680
+WINDOW_MIN_HEIGHT = 400
+# Height of the queue list inside the scrolling sections
+QUEUE_LIST_HEIGHT = 220
 
 class SettingsApp:
-    def __init__(self, root, current_config, on_save_callback):
+    def __init__(self, root, current_config, on_save_callback, catalog=None):
         self.root = root
+        # Queue names: the LCU's live catalog, or the on-disk cache when opened without one
+        self.catalog = catalog or QueueCatalog(config.QUEUE_CACHE_FILE)
         self.root.title("queueBot Settings")
-        self.root.geometry("450x600")
-        self.root.resizable(False, False)
+        # Size and position are set by open_settings(), which fits them to the screen
+        self.root.minsize(WINDOW_WIDTH, WINDOW_MIN_HEIGHT)
+        self.root.resizable(False, True)
         
         self.config = self._normalize_config(current_config)
         self.on_save_callback = on_save_callback
@@ -26,9 +44,31 @@ class SettingsApp:
         self.style.configure("TButton", padding=5)
         self.style.configure("TCheckbutton", padding=2)
 
+        # --- Footer ---
+        # Packed first so it stays on screen however short the window is
+        footer_frame = ttk.Frame(root, padding=(10, 0))
+        footer_frame.pack(side=tk.BOTTOM, fill=tk.X, pady=10)
+
+        ttk.Button(footer_frame, text="Cancel", command=self.root.destroy).pack(side=tk.RIGHT, padx=5)
+        ttk.Button(footer_frame, text="Apply", command=self.apply_settings).pack(side=tk.RIGHT, padx=5)
+        ttk.Button(footer_frame, text="Save & Close", command=self.save_settings).pack(side=tk.RIGHT)
+
         # --- Main Container ---
-        main_frame = ttk.Frame(root, padding="10")
-        main_frame.pack(fill=tk.BOTH, expand=True)
+        # The sections scroll as one, above the footer
+        sections_canvas = tk.Canvas(root, highlightthickness=0)
+        sections_scrollbar = ttk.Scrollbar(root, orient="vertical", command=sections_canvas.yview)
+        main_frame = ttk.Frame(sections_canvas, padding="10")
+        main_frame.bind(
+            "<Configure>",
+            lambda e: sections_canvas.configure(scrollregion=sections_canvas.bbox("all"))
+        )
+        main_window = sections_canvas.create_window((0, 0), window=main_frame, anchor="nw")
+        # Sections stretch to the canvas width, like a packed frame would
+        sections_canvas.bind("<Configure>", lambda e: sections_canvas.itemconfigure(main_window, width=e.width))
+        sections_canvas.configure(yscrollcommand=sections_scrollbar.set)
+
+        sections_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        sections_canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
 
         # --- Discord Section ---
         discord_frame = ttk.LabelFrame(main_frame, text="Discord Integration", padding="10")
@@ -49,14 +89,71 @@ class SettingsApp:
         self.desktop_notif_var = tk.BooleanVar(value=self.config.get("desktop_notifications", True))
         ttk.Checkbutton(notif_frame, text="Enable Windows Notifications", variable=self.desktop_notif_var).pack(anchor=tk.W)
 
+        # --- Extra Sinks Section ---
+        sinks_frame = ttk.LabelFrame(main_frame, text="More Notification Sinks", padding="10")
+        sinks_frame.pack(fill=tk.X, pady=5)
+
+        self.sinks = [dict(spec) for spec in self.config["sinks"]]
+        self.sinks_list = tk.Listbox(sinks_frame, height=4, activestyle="none")
+        self.sinks_list.pack(fill=tk.X)
+        self.sinks_list.bind("<Double-Button-1>", lambda e: self.edit_sink())
+        sink_buttons = ttk.Frame(sinks_frame)
+        sink_buttons.pack(fill=tk.X, pady=(5, 0))
+        ttk.Button(sink_buttons, text="Add...", command=self.add_sink).pack(side=tk.LEFT)
+        ttk.Button(sink_buttons, text="Edit...", command=self.edit_sink).pack(side=tk.LEFT, padx=5)
+        ttk.Button(sink_buttons, text="Enable/Disable", command=self.toggle_sink).pack(side=tk.LEFT)
+        ttk.Button(sink_buttons, text="Remove", command=self.remove_sink).pack(side=tk.LEFT, padx=5)
+        self._refresh_sinks()
+
+        # --- Accept Rules Section ---
+        rules_frame = ttk.LabelFrame(main_frame, text="Accept Rules (blank or 0 = no limit)", padding="10")
+        rules_frame.pack(fill=tk.X, pady=5)
+        rules_frame.columnconfigure(1, weight=1)
+
+        ttk.Label(rules_frame, text="Accept windows:").grid(row=0, column=0, sticky=tk.W)
+        self.windows_var = tk.StringVar(value=self._format_windows(self.config["accept_windows"]))
+        ttk.Entry(rules_frame, textvariable=self.windows_var).grid(row=0, column=1, sticky=tk.EW)
+        ttk.Label(rules_frame, text="e.g. 18:00-23:30, 07:00-08:00", foreground="gray").grid(
+            row=1, column=1, sticky=tk.W)
+
+        ttk.Label(rules_frame, text="Max pops per hour:").grid(row=2, column=0, sticky=tk.W)
+        self.max_pops_var = tk.StringVar(value=str(self.config["max_pops_per_hour"]))
+        ttk.Spinbox(rules_frame, from_=0, to=60, width=5, textvariable=self.max_pops_var).grid(
+            row=2, column=1, sticky=tk.W)
+
+        ttk.Label(rules_frame, text="Max party size:").grid(row=3, column=0, sticky=tk.W)
+        self.max_party_var = tk.StringVar(value=str(self.config["max_party_size"]))
+        ttk.Spinbox(rules_frame, from_=0, to=5, width=5, textvariable=self.max_party_var).grid(
+            row=3, column=1, sticky=tk.W)
+
+        ttk.Label(rules_frame, text="Only when I picked:").grid(row=4, column=0, sticky=tk.W)
+        roles_frame = ttk.Frame(rules_frame)
+        roles_frame.grid(row=4, column=1, sticky=tk.W)
+        self.role_vars = {}
+        for index, role in enumerate(policy.ROLES):
+            var = tk.BooleanVar(value=role in self.config["allowed_roles"])
+            self.role_vars[role] = var
+            ttk.Checkbutton(roles_frame, text=role.capitalize(), variable=var).grid(
+                row=index // 3, column=index % 3, sticky=tk.W)
+
         # --- Queues Section ---
         queue_frame = ttk.LabelFrame(main_frame, text="Allowed Queues (Auto-Accept)", padding="10")
-        queue_frame.pack(fill=tk.BOTH, expand=True, pady=5)
+        queue_frame.pack(fill=tk.X, pady=5)
         
         ttk.Label(queue_frame, text="Uncheck all to accept ANY queue.").pack(anchor=tk.W, pady=(0, 5))
 
+        filter_frame = ttk.Frame(queue_frame)
+        filter_frame.pack(fill=tk.X, pady=(0, 5))
+        ttk.Label(filter_frame, text="Search:").pack(side=tk.LEFT)
+        self.queue_filter_var = tk.StringVar()
+        ttk.Entry(filter_frame, textvariable=self.queue_filter_var, width=18).pack(side=tk.LEFT)
+        self.show_unavailable_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(filter_frame, text="Show unavailable", variable=self.show_unavailable_var,
+                        command=self._populate_queues).pack(side=tk.LEFT, padx=5)
+        self.queue_filter_var.trace_add("write", lambda *args: self._populate_queues())
+
         # Scrollable Canvas for Queues
-        canvas = tk.Canvas(queue_frame, highlightthickness=0)
+        canvas = tk.Canvas(queue_frame, height=QUEUE_LIST_HEIGHT, highlightthickness=0)
         scrollbar = ttk.Scrollbar(queue_frame, orient="vertical", command=canvas.yview)
         self.scrollable_frame = ttk.Frame(canvas)
 
@@ -71,57 +168,160 @@ class SettingsApp:
         canvas.pack(side="left", fill="both", expand=True)
         scrollbar.pack(side="right", fill="y")
         
-        # Populate Queue Checkboxes
-        self.queue_vars = {}
-        allowed_ids = self.config.get("allowed_queue_ids", [])
-        
-        # If list is empty, it means ALL are allowed (logic in main app).
-        # But for UI, checking all is clearer? Or checking none?
-        # Logic in config.py says: "Leave blank to accept all".
-        # So if empty, we leave all unchecked? Or check all?
-        # Let's interpret "Empty List" as "All Allowed" internally, but in UI:
-        # If list is empty, show ALL unchecked (visually "All" or "None").
-        # Actually, "Select which game modes to auto-accept" implies whitelist.
-        # If whitelist is empty -> Accept All.
-        # Let's stick to: If empty, all are unchecked visually, and we add a label saying "If none selected, ALL are accepted".
-        
-        for q_id, q_name in config.QUEUE_ID_MAP.items():
-            # Check if this ID is in the allowed list
-            is_checked = q_id in allowed_ids
-            var = tk.BooleanVar(value=is_checked)
-            self.queue_vars[q_id] = var
-            ttk.Checkbutton(self.scrollable_frame, text=q_name, variable=var).pack(anchor=tk.W, fill=tk.X)
-
-        # --- Footer ---
-        footer_frame = ttk.Frame(main_frame)
-        footer_frame.pack(fill=tk.X, pady=10)
-        
-        ttk.Button(footer_frame, text="Cancel", command=self.root.destroy).pack(side=tk.RIGHT, padx=5)
-        ttk.Button(footer_frame, text="Apply", command=self.apply_settings).pack(side=tk.RIGHT, padx=5)
-        ttk.Button(footer_frame, text="Save & Close", command=self.save_settings).pack(side=tk.RIGHT)
+        # Checkboxes are created in batches after the window opens; the client knows hundreds of queues.
+        # Selection lives in this set, so queues filtered out or not yet drawn keep their state.
+        # An empty selection means every queue is accepted.
+        self.selected_queue_ids = set(self.config["allowed_queue_ids"])
+        self._queue_widgets = []
+        self._pending_queues = []
+        self._queue_job = None
+        self._populate_queues()
 
     def _normalize_config(self, config_data):
         if config_data is None:
             config_data = {}
 
         allowed_ids = config_data.get("allowed_queue_ids", [])
+        # Keys this window doesn't edit (client_rules, metrics_port, ...) are kept as they are
         return {
+            **config_data,
             "webhook_url": (config_data.get("webhook_url") or "").strip(),
             "user_id": (config_data.get("user_id") or "").strip(),
             "desktop_notifications": bool(config_data.get("desktop_notifications", True)),
             "allowed_queue_ids": sorted(allowed_ids),
+            "accept_windows": list(config_data.get("accept_windows") or []),
+            "max_pops_per_hour": config_data.get("max_pops_per_hour") or 0,
+            "max_party_size": config_data.get("max_party_size") or 0,
+            "allowed_roles": [role for role in policy.ROLES if role in (config_data.get("allowed_roles") or [])],
+            "sinks": [dict(spec) for spec in (config_data.get("sinks") or [])],
         }
 
-    def _build_config_from_ui(self):
-        selected_ids = [
-            q_id for q_id, var in self.queue_vars.items() if var.get()
+    # --- Queue List ---
+
+    def _queue_entries(self):
+        """Catalog entries matching the search box, plus any selected IDs the catalog doesn't know."""
+        text = self.queue_filter_var.get().strip().lower()
+        show_unavailable = self.show_unavailable_var.get()
+        entries = self.catalog.entries()
+        known = {queue_id for queue_id, _, _ in entries}
+        entries += [(queue_id, unknown_name(queue_id), False)
+                    for queue_id in sorted(self.selected_queue_ids - known)]
+        return [
+            (queue_id, name, available) for queue_id, name, available in entries
+            if (available or show_unavailable or queue_id in self.selected_queue_ids)
+            and (not text or text in name.lower() or text == str(queue_id))
         ]
 
+    def _populate_queues(self):
+        """Clears the checkbox list and starts drawing the matching queues in batches."""
+        if self._queue_job is not None:
+            self.root.after_cancel(self._queue_job)
+            self._queue_job = None
+        for widget, _ in self._queue_widgets:
+            widget.destroy()
+        self._queue_widgets = []
+        self._pending_queues = self._queue_entries()
+        self._draw_queue_batch()
+
+    def _draw_queue_batch(self):
+        batch = self._pending_queues[:QUEUE_BATCH_SIZE]
+        del self._pending_queues[:QUEUE_BATCH_SIZE]
+        for queue_id, name, available in batch:
+            var = tk.BooleanVar(value=queue_id in self.selected_queue_ids)
+            var.trace_add("write", lambda *args, queue_id=queue_id, var=var: self._set_queue(queue_id, var.get()))
+            text = name if available else f"{name} (unavailable)"
+            widget = ttk.Checkbutton(self.scrollable_frame, text=text, variable=var)
+            widget.pack(anchor=tk.W, fill=tk.X)
+            # The variable must outlive this call or Tk forgets the check state
+            self._queue_widgets.append((widget, var))
+        self._queue_job = self.root.after_idle(self._draw_queue_batch) if self._pending_queues else None
+
+    def _set_queue(self, queue_id, selected):
+        if selected:
+            self.selected_queue_ids.add(queue_id)
+        else:
+            self.selected_queue_ids.discard(queue_id)
+
+    # --- Sink List ---
+
+    def _refresh_sinks(self):
+        self.sinks_list.delete(0, tk.END)
+        for spec in self.sinks:
+            name = spec.get("name") or spec.get("type")
+            state = "" if spec.get("enabled", True) else " (disabled)"
+            self.sinks_list.insert(tk.END, f"{name} [{spec.get('type')}]{state}: {sink_target(spec)}")
+
+    def _selected_sink(self):
+        selection = self.sinks_list.curselection()
+        return selection[0] if selection else None
+
+    def add_sink(self):
+        spec = SinkDialog(self.root, {"type": "discord"}).result
+        if spec:
+            self.sinks.append(spec)
+            self._refresh_sinks()
+
+    def edit_sink(self):
+        index = self._selected_sink()
+        if index is None:
+            return
+        spec = SinkDialog(self.root, self.sinks[index]).result
+        if spec:
+            self.sinks[index] = spec
+            self._refresh_sinks()
+
+    def toggle_sink(self):
+        index = self._selected_sink()
+        if index is None:
+            return
+        spec = self.sinks[index]
+        spec["enabled"] = not spec.get("enabled", True)
+        self._refresh_sinks()
+
+    def remove_sink(self):
+        index = self._selected_sink()
+        if index is not None:
+            del self.sinks[index]
+            self._refresh_sinks()
+
+    def _format_windows(self, windows):
+        return ", ".join(f"{window['start']}-{window['end']}" for window in windows)
+
+    def _parse_windows(self, text):
+        """Turns '18:00-23:30, 07:00-08:00' into accept_windows entries. Validation happens on save."""
+        windows = []
+        for part in text.split(","):
+            part = part.strip()
+            if not part:
+                continue
+            start, _, end = part.partition("-")
+            windows.append({"start": start.strip(), "end": end.strip()})
+        return windows
+
+    def _parse_count(self, text):
+        """Spinbox text to int; anything unparsable is left for validation to reject."""
+        text = text.strip()
+        if not text:
+            return 0
+        try:
+            return int(text)
+        except ValueError:
+            return text
+
+    def _build_config_from_ui(self):
+        selected_ids = sorted(self.selected_queue_ids)
+
         return self._normalize_config({
+            **self.config,
             "webhook_url": self.webhook_var.get().strip(),
             "user_id": self.userid_var.get().strip(),
             "desktop_notifications": self.desktop_notif_var.get(),
             "allowed_queue_ids": selected_ids,
+            "accept_windows": self._parse_windows(self.windows_var.get()),
+            "max_pops_per_hour": self._parse_count(self.max_pops_var.get()),
+            "max_party_size": self._parse_count(self.max_party_var.get()),
+            "allowed_roles": [role for role, var in self.role_vars.items() if var.get()],
+            "sinks": self.sinks,
         })
 
     def _is_dirty(self):
@@ -146,11 +346,19 @@ class SettingsApp:
 
     def save_settings(self, close_after=True):
         new_config = self._build_config_from_ui()
+
+        errors = policy.validate(new_config)
+        if errors:
+            messagebox.showerror("Invalid accept rules", "\n".join(errors))
+            return
+        errors = validate_sinks(new_config["sinks"])
+        if errors:
+            messagebox.showerror("Invalid notification sinks", "\n".join(errors))
+            return
         
-        # Save to file
+        # Save to file (atomically, so the app never reads a half-written config)
         try:
-            with open(config.CONFIG_FILE, "w") as f:
-                json.dump(new_config, f, indent=4)
+            config.save_config(new_config)
             
             # Notify app
             if self.on_save_callback:
@@ -165,21 +373,120 @@ class SettingsApp:
         except Exception as e:
             messagebox.showerror("Error", f"Failed to save settings: {e}")
 
-def open_settings(current_config, on_save_callback=None):
+class SinkDialog:
+    """Modal editor for one notification sink. result is the new entry, or None if cancelled."""
+
+    def __init__(self, parent, spec):
+        self.spec = dict(spec)
+        self.result = None
+        self.top = tk.Toplevel(parent)
+        self.top.title("Notification Sink")
+        self.top.resizable(False, False)
+        self.top.transient(parent)
+
+        frame = ttk.Frame(self.top, padding="10")
+        frame.pack(fill=tk.BOTH, expand=True)
+        frame.columnconfigure(1, weight=1)
+
+        ttk.Label(frame, text="Type:").grid(row=0, column=0, sticky=tk.W)
+        self.type_var = tk.StringVar(value=self.spec.get("type", "discord"))
+        type_box = ttk.Combobox(frame, textvariable=self.type_var, values=list(SINK_TYPES), state="readonly", width=12)
+        type_box.grid(row=0, column=1, sticky=tk.W)
+        type_box.bind("<<ComboboxSelected>>", lambda e: self._update_labels())
+
+        ttk.Label(frame, text="Name:").grid(row=1, column=0, sticky=tk.W)
+        self.name_var = tk.StringVar(value=self.spec.get("name", ""))
+        ttk.Entry(frame, textvariable=self.name_var, width=40).grid(row=1, column=1, sticky=tk.EW)
+
+        self.target_label = ttk.Label(frame)
+        self.target_label.grid(row=2, column=0, columnspan=2, sticky=tk.W)
+        self.target_var = tk.StringVar(value=sink_target(self.spec))
+        ttk.Entry(frame, textvariable=self.target_var, width=50).grid(row=3, column=0, columnspan=2, sticky=tk.EW)
+
+        self.user_label = ttk.Label(frame, text="Discord User ID (for pings):")
+        self.user_var = tk.StringVar(value=self.spec.get("user_id") or "")
+        self.user_entry = ttk.Entry(frame, textvariable=self.user_var)
+
+        ttk.Label(frame, text="Timeout (seconds):").grid(row=6, column=0, sticky=tk.W)
+        self.timeout_var = tk.StringVar(value=str(self.spec.get("timeout") or ""))
+        ttk.Entry(frame, textvariable=self.timeout_var, width=8).grid(row=6, column=1, sticky=tk.W)
+
+        ttk.Label(frame, text="Concurrent deliveries:").grid(row=7, column=0, sticky=tk.W)
+        self.concurrency_var = tk.StringVar(value=str(self.spec.get("concurrency") or ""))
+        ttk.Spinbox(frame, from_=1, to=MAX_SINK_CONCURRENCY, width=5, textvariable=self.concurrency_var).grid(
+            row=7, column=1, sticky=tk.W)
+        ttk.Label(frame, text="Leave timeout and concurrency blank for the defaults.", foreground="gray").grid(
+            row=8, column=0, columnspan=2, sticky=tk.W)
+
+        buttons = ttk.Frame(frame)
+        buttons.grid(row=9, column=0, columnspan=2, sticky=tk.E, pady=(10, 0))
+        ttk.Button(buttons, text="Cancel", command=self.top.destroy).pack(side=tk.RIGHT, padx=5)
+        ttk.Button(buttons, text="OK", command=self.ok).pack(side=tk.RIGHT)
+
+        self._update_labels()
+        self.top.grab_set()
+        self.top.wait_window()
+
+    def _update_labels(self):
+        kind = self.type_var.get()
+        self.target_label.configure(text=SINK_TARGET_LABELS[kind])
+        if kind == "discord":
+            self.user_label.grid(row=4, column=0, columnspan=2, sticky=tk.W)
+            self.user_entry.grid(row=5, column=0, columnspan=2, sticky=tk.EW)
+        else:
+            self.user_label.grid_remove()
+            self.user_entry.grid_remove()
+
+    def _parse_number(self, text, kind):
+        """Blank means default; anything unparsable is left for validation to reject."""
+        text = text.strip()
+        if not text:
+            return None
+        try:
+            return kind(text)
+        except ValueError:
+            return text
+
+    def ok(self):
+        kind = self.type_var.get()
+        # Keep keys the dialog doesn't show (e.g. http headers) unless the type changed
+        spec = dict(self.spec) if kind == self.spec.get("type") else {}
+        for key in ("url", "command", "address", "user_id", "name", "timeout", "concurrency"):
+            spec.pop(key, None)
+        spec["type"] = kind
+        spec[SINK_TYPES[kind][0]] = self.target_var.get().strip()
+        if self.name_var.get().strip():
+            spec["name"] = self.name_var.get().strip()
+        if kind == "discord" and self.user_var.get().strip():
+            spec["user_id"] = self.user_var.get().strip()
+        for key, parse in (("timeout", float), ("concurrency", int)):
+            value = self._parse_number(getattr(self, f"{key}_var").get(), parse)
+            if value is not None:
+                spec[key] = value
+
+        errors = validate_sinks([spec])
+        if errors:
+            messagebox.showerror("Invalid notification sink", "\n".join(errors), parent=self.top)
+            return
+        self.result = spec
+        self.top.destroy()
+
+
+def open_settings(current_config, on_save_callback=None, catalog=None):
     """
     Opens the settings window. Blocking call.
     """
     root = tk.Tk()
-    # Center window
-    window_width = 450
-    window_height = 600
+    # Center window, leaving room for the taskbar on short screens
+    window_width = WINDOW_WIDTH
     screen_width = root.winfo_screenwidth()
     screen_height = root.winfo_screenheight()
+    window_height = max(min(WINDOW_HEIGHT, screen_height - 100), WINDOW_MIN_HEIGHT)
     x = (screen_width // 2) - (window_width // 2)
-    y = (screen_height // 2) - (window_height // 2)
+    y = max((screen_height // 2) - (window_height // 2), 0)
     root.geometry(f"{window_width}x{window_height}+{x}+{y}")
     
-    app = SettingsApp(root, current_config, on_save_callback)
+    app = SettingsApp(root, current_config, on_save_callback, catalog=catalog)
     
     # Set icon if available (for the window title bar)
     try:
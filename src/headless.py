@@ -0,0 +1,111 @@
+"""
+Headless daemon mode: just the LCU loop and notification dispatcher.
+
+No tray icon, PIL, tkinter, console window or rich rendering is loaded; output is
+plain lines on stdout and desktop toasts are off. config.json must already exist.
+
+Control it with signals:
+    SIGINT / SIGTERM   shut down (a second one exits immediately)
+    SIGHUP             reload config.json now
+    SIGUSR1            pause / resume every client
+    SIGUSR2            log a status line and this session's pop stats
+On Windows only Ctrl+C and Ctrl+Break exist; both shut down.
+"""
+import json
+import os
+import signal
+
+import config
+from commands import ReloadConfig, SessionStats, Shutdown, StatusQuery, TogglePause
+
+
+class SignalController:
+    """Turns process signals into commands for the LCU loop. Handlers run on the main thread."""
+
+    def __init__(self, lcu):
+        self.lcu = lcu
+        self.stopping = False
+
+    def install(self):
+        handlers = {
+            "SIGINT": self.request_shutdown,
+            "SIGTERM": self.request_shutdown,
+            "SIGBREAK": self.request_shutdown,
+            "SIGHUP": self.request_reload,
+            "SIGUSR1": self.toggle_pause,
+            "SIGUSR2": self.log_status,
+        }
+        for name, handler in handlers.items():
+            signum = getattr(signal, name, None)
+            if signum is not None:
+                signal.signal(signum, handler)
+
+    # Signal handlers may interrupt the loop mid-step, so they only ever submit commands
+
+    def request_shutdown(self, signum, frame):
+        if self.stopping:
+            raise SystemExit(1)
+        self.stopping = True
+        config.console.print("[warning]Shutting down...[/]")
+        self.lcu.commands.submit(Shutdown())
+
+    def request_reload(self, signum, frame):
+        self.lcu.commands.submit(ReloadConfig())
+
+    def toggle_pause(self, signum, frame):
+        self.lcu.commands.submit(TogglePause())
+
+    def log_status(self, signum, frame):
+        self.lcu.commands.submit(StatusQuery()).add_done_callback(self._log_status)
+
+    def _log_status(self, future):
+        # Runs on the LCU loop once the query has been answered
+        if future.exception() is not None:
+            return
+        status = future.result()
+        clients = ", ".join(f"{client['tag']} ({client['status']})" for client in status["clients"]) or "none"
+        config.console.log(f"[info]Clients: {clients}[/]")
+        config.console.log(f"[info]{status['discovery']}[/]")
+        config.console.log(f"[info]{status['latency']}[/]")
+        config.console.log(f"[info]Notification delivery: {status['notifications']}[/]")
+        self.lcu.commands.submit(SessionStats()).add_done_callback(self._log_session_stats)
+
+    def _log_session_stats(self, future):
+        if future.exception() is not None:
+            config.console.log(f"[yellow]Session stats failed: {future.exception()}[/]")
+            return
+        for line in future.result() or []:
+            config.console.log(f"[info]Session: {line}[/]")
+
+
+def run(capture_path=None, profiler=None, metrics_port=None):
+    """
+    Runs queueBot without any UI until a shutdown signal. Returns the exit code.
+    Pass a StartupProfiler to print and save its timings once monitoring starts.
+    """
+    config.init_console(plain=True)
+    config.console.open_log_file(config.LOG_FILE)
+    try:
+        settings = config.load_config()
+    except json.JSONDecodeError as e:
+        config.console.print(f"[danger]{config.CONFIG_FILE} is not valid JSON: {e}[/]")
+        return 1
+    if settings is None:
+        config.console.print(
+            f"[danger]No config at {config.CONFIG_FILE}. Run queueBot once with --update "
+            f"(or write the file by hand) before using --headless.[/]"
+        )
+        return 1
+
+    from lcu import LCU
+    lcu = LCU(config=settings, capture_path=capture_path, config_path=config.CONFIG_FILE,
+              desktop_notifications=False, journal_path=config.JOURNAL_FILE, metrics_port=metrics_port,
+              queue_cache_path=config.QUEUE_CACHE_FILE, discovery_state_path=config.DISCOVERY_FILE)
+    SignalController(lcu).install()
+    if profiler:
+        profiler.mark("monitoring started")
+        profiler.report(config.console)
+        profiler.dump_json(os.path.join(config.BASE_DIR, "startup-profile.json"))
+    lcu.start()
+    config.console.print("Application has been shut down.")
+    return 0
@@ -0,0 +1,279 @@
+"""
+Pop journal: every ready check and notification outcome, kept in SQLite.
+
+record_pop() and record_notification() only queue a row. A writer thread inserts
+the rows in batches, one transaction per batch, on its own connection, so the LCU
+loop never touches disk. The database is in WAL mode, so stats queries (from the
+tray or a status signal) read alongside the writer without blocking it.
+"""
+import math
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import closing
+
+import config
+
+# Rows are inserted once this many are queued, or BATCH_WINDOW seconds after the first
+BATCH_SIZE = 64
+BATCH_WINDOW = 0.5
+CLOSE_TIMEOUT = 2.0
+
+# Ready-check stages stored as columns (milliseconds since the event arrived)
+SPAN_COLUMNS = ("queue_resolved", "decided", "accept_sent", "accept_acked", "accept_verified")
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS pops (
+    id INTEGER PRIMARY KEY,
+    uid TEXT NOT NULL UNIQUE,
+    time REAL NOT NULL,
+    client TEXT,
+    check_id INTEGER,
+    queue_id INTEGER,
+    queue_name TEXT,
+    decision TEXT NOT NULL,
+    accepted INTEGER NOT NULL,
+    attempts INTEGER,
+    verified INTEGER,
+    queue_time_s REAL,
+    {", ".join(f"{stage}_ms REAL" for stage in SPAN_COLUMNS)}
+);
+CREATE INDEX IF NOT EXISTS pops_time ON pops (time);
+CREATE INDEX IF NOT EXISTS pops_queue ON pops (time, queue_id);
+-- Percentiles walk accept_acked_ms in order and filter on time from the index itself
+CREATE INDEX IF NOT EXISTS pops_acked ON pops (accept_acked_ms, time) WHERE accept_acked_ms IS NOT NULL;
+CREATE TABLE IF NOT EXISTS notifications (
+    pop_uid TEXT NOT NULL REFERENCES pops (uid),
+    time REAL NOT NULL,
+    sink TEXT NOT NULL,
+    outcome TEXT NOT NULL,
+    latency_ms REAL
+);
+CREATE INDEX IF NOT EXISTS notifications_time ON notifications (time, sink, outcome);
+"""
+
+INSERT_POP = (
+    f"INSERT INTO pops (uid, time, client, check_id, queue_id, queue_name, decision, accepted, "
+    f"attempts, verified, queue_time_s, {', '.join(f'{stage}_ms' for stage in SPAN_COLUMNS)}) "
+    f"VALUES ({', '.join('?' * (11 + len(SPAN_COLUMNS)))})"
+)
+INSERT_NOTIFICATION = "INSERT INTO notifications (pop_uid, time, sink, outcome, latency_ms) VALUES (?, ?, ?, ?, ?)"
+
+
+def format_duration(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    return f"{minutes}m {seconds:02d}s" if minutes else f"{seconds}s"
+
+
+class PopJournal:
+    """
+    Append-only SQLite log of ready checks. Opening creates the schema; the writer
+    thread starts on the first record. Safe to call from any thread.
+    Several queueBot processes may share one database: SQLite assigns pop ids, and
+    notification rows point at their pop by a uid made when the pop is recorded.
+    """
+
+    def __init__(self, path, batch_size=BATCH_SIZE, batch_window=BATCH_WINDOW):
+        self.path = path
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        # Session stats cover pops since this journal was opened
+        self.session_started = time.time()
+        self.written = 0
+        self.failed = 0
+        with closing(self._connect()) as db:
+            db.executescript(SCHEMA)
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        # With WAL, NORMAL only syncs at checkpoints; a crash can lose the last batch at most
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    # --- Recording (any thread, never blocks) ---
+
+    def _put(self, item):
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="Pop journal", daemon=True)
+                    self._thread.start()
+        self._queue.put(item)
+
+    def record_pop(self, trace):
+        """Queues a finished ready check (a metrics.PopTrace). Returns the pop's journal uid."""
+        info = trace.info
+        # Made up front so notification rows can point at a pop still in the queue
+        pop_uid = uuid.uuid4().hex
+        info["journal_uid"] = pop_uid
+        verified = info.get("accept_verified")
+        self._put(("pop", (
+            pop_uid, trace.wall_time, info.get("client"), info.get("check_id"),
+            info.get("queue_id"), info.get("queue_name"), info.get("decision", "unknown"),
+            int(bool(info.get("accepted"))), info.get("accept_attempts"),
+            None if verified is None else int(verified), info.get("queue_time_s"),
+            *(trace.spans.get(stage) for stage in SPAN_COLUMNS),
+        )))
+        return pop_uid
+
+    def record_notification(self, pop_uid, sink, outcome, latency_ms=None):
+        """Queues a notification outcome (sent, failed, dropped or expired) for a pop."""
+        self._put(("notification", (pop_uid, time.time(), sink, outcome, latency_ms)))
+
+    def flush(self, timeout=CLOSE_TIMEOUT):
+        """Waits until everything recorded so far is committed. Returns False on timeout."""
+        if self._thread is None:
+            return True
+        done = threading.Event()
+        self._queue.put(("flush", done))
+        return done.wait(timeout)
+
+    def close(self, timeout=CLOSE_TIMEOUT):
+        """Commits what is queued and stops the writer."""
+        if self._thread is None:
+            return
+        self._queue.put(("stop", None))
+        self._thread.join(timeout)
+        self._thread = None
+
+    # --- Writer thread ---
+
+    def _run(self):
+        db = self._connect()
+        try:
+            while True:
+                batch = [self._queue.get()]
+                deadline = time.monotonic() + self.batch_window
+                # Linger briefly so a pop and its notifications share one transaction
+                while len(batch) < self.batch_size and batch[-1][0] in ("pop", "notification"):
+                    remaining = deadline - time.monotonic()
+                    try:
+                        batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                if not self._write(db, batch):
+                    return
+        finally:
+            db.close()
+
+    def _write(self, db, batch):
+        """
+        Inserts a batch in one transaction. If that fails, retries row by row so one
+        bad row doesn't discard the rest. Returns False once a stop request is seen.
+        """
+        pops = [row for kind, row in batch if kind == "pop"]
+        notifications = [row for kind, row in batch if kind == "notification"]
+        if pops or notifications:
+            try:
+                with db:
+                    db.executemany(INSERT_POP, pops)
+                    db.executemany(INSERT_NOTIFICATION, notifications)
+                self.written += len(pops) + len(notifications)
+            except sqlite3.Error:
+                self._write_rows(db, [(INSERT_POP, row) for row in pops]
+                                 + [(INSERT_NOTIFICATION, row) for row in notifications])
+
+        running = True
+        for kind, row in batch:
+            if kind == "flush":
+                row.set()
+            elif kind == "stop":
+                running = False
+        return running
+
+    def _write_rows(self, db, rows):
+        errors = []
+        for statement, row in rows:
+            try:
+                with db:
+                    db.execute(statement, row)
+                self.written += 1
+            except sqlite3.Error as e:
+                self.failed += 1
+                errors.append(e)
+        if errors:
+            config.console.log(f"[yellow]Pop journal write failed for {len(errors)} row(s): {errors[0]}[/]")
+
+    # --- Queries ---
+
+    def _read(self):
+        return closing(sqlite3.connect(self.path, timeout=5.0))
+
+    def session_stats(self, since=None):
+        """
+        Aggregates pops since `since` (default: this session) with indexed queries.
+        Returns {"pops", "accepted", "avg_queue_time_s", "per_queue", "accept_latency_ms", "notifications"}.
+        """
+        since = self.session_started if since is None else since
+        with self._read() as db:
+            pops, accepted, avg_queue_time = db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(accepted), 0), AVG(queue_time_s) FROM pops WHERE time >= ?",
+                (since,),
+            ).fetchone()
+            per_queue = [
+                {"queue_id": queue_id, "queue_name": name, "pops": count, "accepted": accepts}
+                for queue_id, name, count, accepts in db.execute(
+                    "SELECT queue_id, MAX(queue_name), COUNT(*), SUM(accepted) FROM pops "
+                    "WHERE time >= ? GROUP BY queue_id ORDER BY COUNT(*) DESC",
+                    (since,),
+                )
+            ]
+            notifications = {}
+            for sink, outcome, count in db.execute(
+                "SELECT sink, outcome, COUNT(*) FROM notifications WHERE time >= ? GROUP BY sink, outcome",
+                (since,),
+            ):
+                notifications.setdefault(sink, {})[outcome] = count
+            latency = self._latency_percentiles(db, since)
+        return {
+            "since": since,
+            "pops": pops,
+            "accepted": accepted,
+            "avg_queue_time_s": avg_queue_time,
+            "per_queue": per_queue,
+            "accept_latency_ms": latency,
+            "notifications": notifications,
+        }
+
+    def _latency_percentiles(self, db, since):
+        """Nearest-rank p50/p95/p99 of accept_acked, read straight off the pops_acked index."""
+        where = "FROM pops WHERE time >= ? AND accept_acked_ms IS NOT NULL"
+        count = db.execute(f"SELECT COUNT(*) {where}", (since,)).fetchone()[0]
+        if not count:
+            return {}
+        result = {"count": count}
+        for pct in (50, 95, 99):
+            rank = max(math.ceil(pct / 100 * count), 1)
+            result[f"p{pct}"] = db.execute(
+                f"SELECT accept_acked_ms {where} ORDER BY accept_acked_ms LIMIT 1 OFFSET ?", (since, rank - 1)
+            ).fetchone()[0]
+        return result
+
+    def recent_pops(self, limit=20):
+        """The newest pops as dicts, newest first."""
+        with self._read() as db:
+            db.row_factory = sqlite3.Row
+            rows = db.execute("SELECT * FROM pops ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def format_stats(self, stats=None):
+        """Session stats as short lines for the tray and console."""
+        stats = stats or self.session_stats()
+        if not stats["pops"]:
+            return ["No pops this session"]
+        lines = [f"Pops: {stats['pops']} ({stats['accepted']} accepted)"]
+        if stats["avg_queue_time_s"] is not None:
+            lines.append(f"Avg queue time: {format_duration(stats['avg_queue_time_s'])}")
+        latency = stats["accept_latency_ms"]
+        if latency:
+            lines.append(f"Accept latency: p50 {latency['p50']:.1f}ms / p95 {latency['p95']:.1f}ms / p99 {latency['p99']:.1f}ms")
+        lines.append(", ".join(
+            f"{entry['queue_name'] or 'Unknown'}: {entry['pops']}" for entry in stats["per_queue"]
+        ))
+        return lines
@@ -1,38 +1,402 @@
 import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+import aiohttp
 from lcu_driver import Connector
-from rich.panel import Panel
+from lcu_driver.connection import Connection
 
 import config
-from notifications import send_discord_ping, send_desktop_notification
+from config import ConfigStore
+from capture import EventRecorder
+from commands import CommandChannel, Shutdown
+from discovery import ClientDiscovery
+from exporter import MetricsExporter
+from journal import PopJournal
+from metrics import ACCEPT_LATENCY_BUCKETS, Histogram, LatencyRecorder
+from policy import REASONS, new_accept_history
+from queues import QueueCatalog
+from readycheck import AcceptExecutor, ReadyCheckTracker
+from rest import LCURestSession
+from notifications import (
+    DesktopNotifier, DesktopSink, Notification, NotificationClient,
+    NotificationDispatcher, create_sink, sink_specs, validate_sink,
+)
 
-class LCU:
-    def __init__(self, config):
-        self.loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(self.loop)
-        self.connector = Connector(loop=self.loop)
-        self.config = config
-        self.accepting_match = False
+# --- Pop Latency Budget ---
+# The accept decision may wait at most this long for the lobby lookup before
+# falling back to "Unknown Mode". Nothing else is awaited before the accept POST.
+QUEUE_LOOKUP_TIMEOUT = 1.0
+# Detached background work (e.g. webhook warm-up) gets this long before it is cancelled.
+NOTIFICATION_TIMEOUT = 10.0
+# Pop alerts older than this are dropped instead of retried.
+NOTIFICATION_MAX_AGE = 60.0
+
+# --- Shutdown Budget ---
+# Clients get this long to disconnect before their tasks are cancelled
+MONITOR_STOP_TIMEOUT = 1.0
+# Queued and in-flight notifications get this long to be delivered
+NOTIFICATION_DRAIN_TIMEOUT = 3.0
+# stop() waits this long for the loop to exit before cancelling whatever is left
+SHUTDOWN_TIMEOUT = 8.0
+
+# --- Websocket Subscriptions ---
+# The client publishes each endpoint on its own WAMP topic; this one carries every event.
+FIREHOSE_TOPIC = "OnJsonApiEvent"
+# Same limit lcu_driver uses for a single websocket frame
+MAX_WS_MSG_SIZE = 8 * 1024 * 1024
+
+logger = logging.getLogger('queueBot')
+
+
+# Events counted under this uri label: anything not registered as an exact handler URI,
+# so firehose capture can't grow the counter (and the metrics' label set) without bound
+OTHER_URIS = "other"
+
+
+def topic_for_uri(uri):
+    """WAMP topic the client publishes an endpoint's events on."""
+    return FIREHOSE_TOPIC + uri.replace('/', '_')
+
+
+class SubscriptionFilter:
+    """
+    Decides which WAMP topics to subscribe to from the handlers registered on a connector,
+    and drops unwanted event frames with a substring check before paying for json.loads.
+
+    Prefix registrations (URIs ending in '/') can't be expressed as topics, so they
+    fall back to the firehose and disable pre-filtering.
+    """
+
+    def __init__(self, ws_manager):
+        self.ws_manager = ws_manager
+        self.exact_uris = frozenset()
+        self.firehose = False
+        self._needles = ()
+        # Decoded events by registered endpoint; the LCU shares one Counter across all its clients
+        self.events = Counter()
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.decoded = 0
+        self.decoded_bytes = 0
+        self.decode_seconds = 0.0
+        self.skipped = 0
+        self.skipped_bytes = 0
+
+    def refresh(self):
+        """Rebuilds the topic set from the currently registered handlers."""
+        uris = [registration['uri'] for registration in self.ws_manager.registered_uris]
+        self.firehose = any(uri.endswith('/') for uri in uris)
+        self.exact_uris = frozenset(uri for uri in uris if not uri.endswith('/'))
+        # The URI appears as a quoted JSON string in every frame for that endpoint
+        self._needles = tuple(json.dumps(uri) for uri in self.exact_uris)
+
+    def topics(self):
+        if self.firehose:
+            return [FIREHOSE_TOPIC]
+        return sorted(topic_for_uri(uri) for uri in self.exact_uris)
+
+    def decode(self, raw):
+        """Returns the event payload of a wanted EVENT frame, or None if it can be skipped."""
+        # WAMP EVENT frames are [8, topic, payload]; welcome and other opcodes carry no events
+        if not raw.startswith('[8'):
+            return None
+        if not self.firehose and not any(needle in raw for needle in self._needles):
+            self.skipped += 1
+            self.skipped_bytes += len(raw)
+            return None
+
+        started = time.perf_counter()
+        payload = json.loads(raw)[2]
+        self.decode_seconds += time.perf_counter() - started
+        self.decoded += 1
+        self.decoded_bytes += len(raw)
+        uri = payload.get('uri')
+        self.events[uri if uri in self.exact_uris else OTHER_URIS] += 1
+        return payload
+
+    def estimated_seconds_saved(self):
+        """Decode time the skipped frames would have cost, at the measured per-byte rate."""
+        if not self.decoded_bytes:
+            return 0.0
+        return self.skipped_bytes * (self.decode_seconds / self.decoded_bytes)
+
+    def format_stats(self):
+        return (
+            f"{len(self.topics())} topic(s), decoded {self.decoded} frame(s), "
+            f"skipped {self.skipped} ({self.skipped_bytes / 1024:.0f} KiB), "
+            f"~{self.estimated_seconds_saved() * 1000:.0f}ms decode CPU saved"
+        )
+
+
+class LCUConnection(Connection):
+    """
+    lcu_driver Connection that subscribes only to the topics our handlers need and
+    sends REST calls through a keep-alive LCURestSession.
+    """
+
+    def __init__(self, connector, process_or_string):
+        super().__init__(connector, process_or_string)
+        self.rest = LCURestSession(self._port, self._auth_key)
+
+    async def init(self):
+        try:
+            await super().init()
+        finally:
+            await self.rest.close()
+
+    async def _wait_api_ready(self):
+        # Polls through the pooled session, so the connection it opens is still there for the first pop
+        await self.rest.wait_until_ready()
+
+    async def request(self, method, endpoint, **kwargs):
+        """Same contract as lcu_driver's request(); the response also carries a .timing."""
+        return await self.rest.request(method, endpoint, **kwargs)
+
+    async def run_ws(self):
+        subscriptions = self._connector.subscriptions
+        subscriptions.refresh()
+
+        local_session = aiohttp.ClientSession(auth=aiohttp.BasicAuth('riot', self._auth_key),
+                                              headers={'Content-Type': 'application/json',
+                                                       'Accept': 'application/json'})
+        try:
+            self._ws = await local_session.ws_connect(self.ws_address, ssl=False, max_msg_size=MAX_WS_MSG_SIZE)
+            for topic in subscriptions.topics():
+                await self._ws.send_json([5, topic])
+
+            while not self.closed:
+                msg = await self._ws.receive()
+                if msg.type == aiohttp.WSMsgType.TEXT:
+                    try:
+                        data = subscriptions.decode(msg.data)
+                    except (ValueError, IndexError):
+                        logger.warning('Error decoding websocket frame: %s', msg.data[:200])
+                        continue
+                    if data is not None:
+                        self._connector.ws.match_event(self._connector, self, data)
+                elif msg.type in (aiohttp.WSMsgType.CLOSE, aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                    break
+            await self._ws.close()
+        finally:
+            await local_session.close()
+
+    async def close(self):
+        """Ends the connection: run_ws returns once the websocket closes, then init() runs _close()."""
+        if self._ws is not None and not self._ws.closed:
+            await self._ws.close()
+
+
+class LCUConnector(Connector):
+    """lcu_driver Connector whose LCUConnections use topic-filtered websockets."""
+
+    connection_class = LCUConnection
+
+    def __init__(self, *, loop=None):
+        super().__init__(loop=loop)
+        self.subscriptions = SubscriptionFilter(self.ws)
+
+
+def format_accept_connection(trace):
+    """How the accept POST reached the client: a pooled connection or a new one, and the client's share."""
+    info = trace.info
+    if "accept_server_ms" not in info:
+        return "connection unknown"
+    how = "pooled connection" if info["accept_reused"] else f"new connection {info['accept_connect_ms']:.1f}ms"
+    if info["accept_server_ms"] is None:
+        return how
+    return f"{how}, client {info['accept_server_ms']:.1f}ms"
+
+
+class ClientMonitor:
+    """
+    Watches one League client: its own connector and websocket, state cache,
+    ready-check machine and accept history. Config, notification pools and the
+    latency recorder are shared through the LCU that owns it.
+    """
+
+    def __init__(self, lcu, pid=None, tag="Client", port=None, lockfile=None, discovered=None):
+        self.lcu = lcu
+        self.pid = pid
+        # API port, so a client found by both lockfile and process scan is attached once
+        self.port = port
+        # The discovery.Lockfile this client was found through, if any
+        self.lockfile = lockfile
+        # (source, detection delay) for the time-to-connect measurement
+        self.discovered = discovered
+        self.attached_at = time.monotonic()
+        # Replaced by the account's Riot ID once the client answers
+        self.tag = tag
+        self.connector = LCUConnector(loop=lcu.loop)
+        self.connector.subscriptions.events = lcu.ws_events
+        self.connected = False
         self.paused = False
+        self.task = None
+        # Refreshes the REST connection while queueing, so the accept never opens a new one
+        self.keep_warm = None
+        # Ready-check state machine: dedupes UPDATE bursts and detects re-pops
+        self.ready_check = ReadyCheckTracker()
+        self.acceptor = AcceptExecutor(self.ready_check)
+        # Lobby/gameflow state fed by websocket events, so a pop never waits on HTTP
+        self.state = {
+            "queue_id": None, "queue_name": None, "phase": None,
+            "party_size": None, "position": None, "queue_started": None,
+        }
+        # Rolling accept timestamps; outlives config versions so a reload doesn't reset the limit
+        self.accept_history = new_accept_history()
 
         # Register event handlers
         self.connector.ready(self.connect)
         self.connector.close(self.disconnect)
         self.connector.ws.register('/lol-matchmaking/v1/ready-check', event_types=('UPDATE',))(self.ready_check_changed)
+        self.connector.ws.register('/lol-lobby/v2/lobby', event_types=('CREATE', 'UPDATE', 'DELETE'))(self.lobby_changed)
+        self.connector.ws.register('/lol-gameflow/v1/session', event_types=('CREATE', 'UPDATE', 'DELETE'))(self.gameflow_changed)
+        if lcu.recorder:
+            # A trailing slash makes lcu_driver match every URI under it
+            self.connector.ws.register('/', event_types=('CREATE', 'UPDATE', 'DELETE'))(lcu.recorder.on_event)
+
+    @property
+    def prefix(self):
+        """Log prefix naming this client, once there is more than one to tell apart."""
+        return f"[bold]{self.tag}:[/] " if len(self.lcu.clients) > 1 else ""
+
+    @property
+    def status(self):
+        """Short state for menus and status lines: Paused, the gameflow phase, Connected or Connecting."""
+        if self.paused:
+            return "Paused"
+        if self.connected:
+            return self.state.get("phase") or "Connected"
+        return "Connecting"
+
+    async def run(self, process_or_string):
+        """Connects to the client and serves its websocket until it closes."""
+        connection = self.connector.connection_class(self.connector, process_or_string)
+        self.connector.register_connection(connection)
+        await connection.init()
+
+    async def stop(self):
+        self.stop_keep_warm()
+        connection = self.connector.connection
+        if connection is not None:
+            await connection.close()
 
     async def connect(self, connection):
-        config.console.print("[success]✅ League Client Connected![/]")
-        webhook_status = 'Configured' if self.config.get("webhook_url") else 'Disabled'
-        user_id_status = self.config.get("user_id", "None")
+        # The cache is cold until the first lobby/gameflow event arrives
+        self.clear_state()
+        self.connected = True
+        self.lcu.client_counts["connects"] += 1
+        self.lcu.discovery.record_connect(self)
+        await self.lcu.notifier.start()
+        self.lcu.start_config_watch()
+        self.lcu.spawn_background(self.identify(connection), "Account lookup")
+        self.lcu.spawn_background(self.lcu.refresh_queues(connection), "Queue list update")
+        self.lcu.clients_changed()
+        config.console.print(f"[success]✅ {self.prefix}League Client Connected![/]")
+        snapshot = self.lcu.config
+        webhook_status = 'Configured' if snapshot.get("webhook_url") else 'Disabled'
+        user_id_status = snapshot.get("user_id", "None")
         
-        config.console.print(Panel(
+        config.print_panel(
             f"[bold]Monitoring Queue...[/]\n"
             f"Webhook: [dim]{webhook_status}[/]\n"
             f"User ID: [dim]{user_id_status}[/]",
-            title="Status", border_style="green"
-        ))
+            title=f"Status: {self.tag}" if len(self.lcu.clients) > 1 else "Status", border_style="green"
+        )
 
     async def disconnect(self, connection):
-        config.console.print("[warning]⚠️  League Client Disconnected. Waiting...[/]")
+        self.clear_state()
+        self.connected = False
+        self.stop_keep_warm()
+        self.lcu.client_counts["disconnects"] += 1
+        config.console.log(f"[info]{self.prefix}Websocket: {self.connector.subscriptions.format_stats()}[/]")
+        config.console.log(f"[info]{self.prefix}{connection.rest.format_stats()}[/]")
+        if not any(monitor.connected for monitor in self.lcu.clients.values()):
+            await self.lcu.notifier.close()
+        config.console.print(f"[warning]⚠️  {self.prefix}League Client Disconnected. Waiting...[/]")
+
+    async def identify(self, connection):
+        """Tags this client with the signed-in account's Riot ID (used in logs, alerts and client_rules)."""
+        response = await connection.request('get', '/lol-summoner/v1/current-summoner')
+        if response.status != 200:
+            response.release()
+            return
+        data = await response.json()
+        name = data.get('gameName')
+        tag = f"{name}#{data.get('tagLine')}" if name and data.get('tagLine') else name or data.get('displayName')
+        if tag:
+            self.tag = tag
+            self.lcu.clients_changed()
+
+    def start_keep_warm(self, connection):
+        # Replayed connections have no REST session to keep warm
+        rest = getattr(connection, "rest", None)
+        if self.keep_warm is None and rest is not None:
+            self.keep_warm = self.lcu.loop.create_task(rest.keep_warm())
+
+    def stop_keep_warm(self):
+        if self.keep_warm is not None:
+            self.keep_warm.cancel()
+            self.keep_warm = None
+
+    # --- State Cache ---
+
+    def clear_state(self):
+        """Marks the lobby/gameflow cache as cold."""
+        self.state.update(queue_id=None, queue_name=None, phase=None, party_size=None, position=None,
+                          queue_started=None)
+
+    def set_cached_queue(self, queue_id):
+        """Stores the queue ID and its display name in the state cache."""
+        if queue_id is None or queue_id < 0:
+            # The client reports -1 when there is no queue selected
+            self.state.update(queue_id=None, queue_name=None)
+            return
+        self.state["queue_id"] = queue_id
+        self.state["queue_name"] = self.lcu.queues.name(queue_id)
+
+    async def lobby_changed(self, connection, event):
+        if event.type.upper() == 'DELETE' or not event.data:
+            self.set_cached_queue(None)
+            self.state.update(party_size=None, position=None)
+            return
+        data = event.data
+        self.set_cached_queue(data.get('gameConfig', {}).get('queueId'))
+        self.state["party_size"] = len(data.get('members') or []) or None
+        self.state["position"] = (data.get('localMember') or {}).get('firstPositionPreference') or None
+
+    async def gameflow_changed(self, connection, event):
+        if event.type.upper() == 'DELETE' or not event.data:
+            self.clear_state()
+            self.stop_keep_warm()
+            return
+        data = event.data
+        previous_phase = self.state["phase"]
+        self.state["phase"] = data.get('phase')
+        if self.state["phase"] != previous_phase:
+            # The tray shows each client's phase
+            self.lcu.clients_changed()
+        # Queue time for the journal; a declined ready check returns to Matchmaking without resetting it
+        if self.state["phase"] == 'Matchmaking' and previous_phase not in ('Matchmaking', 'ReadyCheck'):
+            self.state["queue_started"] = time.time()
+        elif self.state["phase"] not in ('Matchmaking', 'ReadyCheck'):
+            self.state["queue_started"] = None
+        if self.state["phase"] == 'Matchmaking' and previous_phase != 'Matchmaking':
+            # Open webhook connections now so the pop only pays for one round-trip
+            self.lcu.spawn_background(self.lcu.warm_up_sinks(), "Webhook warm-up")
+        # Cache the queue first: it is what a pop reads, and nothing below may skip it
+        queue_id = data.get('gameData', {}).get('queue', {}).get('id')
+        if queue_id is not None and queue_id >= 0:
+            self.set_cached_queue(queue_id)
+        if self.state["phase"] in ('Matchmaking', 'ReadyCheck'):
+            self.start_keep_warm(connection)
+        else:
+            self.stop_keep_warm()
 
     async def get_queue_info(self, connection):
         """
@@ -44,69 +408,446 @@ class LCU:
             if lobby.status == 200:
                 data = await lobby.json()
                 queue_id = data.get('gameConfig', {}).get('queueId')
-                queue_name = config.QUEUE_ID_MAP.get(queue_id, f"Unknown (ID: {queue_id})")
+                self.set_cached_queue(queue_id)
+                queue_name = self.lcu.queues.name(queue_id)
                 return queue_name, queue_id
         except Exception as e:
-            config.console.log(f"[danger]Could not retrieve queue info: {e}[/]")
+            config.console.log(f"[danger]{self.prefix}Could not retrieve queue info: {e}[/]")
         return "Unknown Mode", None
 
+    async def resolve_queue(self, connection):
+        """
+        Resolves the current queue within the accept latency budget.
+        Reads the state cache when warm and only falls back to REST when cold.
+        Returns a tuple of (queue_name, queue_id).
+        """
+        if self.state["queue_id"] is not None:
+            return self.state["queue_name"], self.state["queue_id"]
+
+        try:
+            return await asyncio.wait_for(self.get_queue_info(connection), QUEUE_LOOKUP_TIMEOUT)
+        except asyncio.TimeoutError:
+            config.console.log(f"[yellow]{self.prefix}Queue lookup exceeded {QUEUE_LOOKUP_TIMEOUT}s budget.[/]")
+            return "Unknown Mode", None
+
     async def ready_check_changed(self, connection, event):
-        if self.paused:
+        trace = self.lcu.latency.begin()
+
+        # O(1) for every redundant UPDATE; only a genuinely new pop gets past this
+        if not self.ready_check.observe(event.data):
             return
 
-        data = event.data
-        
-        if data['state'] != 'InProgress':
-            self.accepting_match = False
+        trace.info.update(check_id=self.ready_check.check_id, client=self.tag)
+        if self.state["queue_started"] is not None:
+            trace.info["queue_time_s"] = trace.wall_time - self.state["queue_started"]
+
+        if self.paused or self.lcu.paused:
+            self.ready_check.skip()
+            trace.info["decision"] = "skip:paused"
+            self.lcu.record_pop(trace)
             return
 
-        if data['state'] == 'InProgress' and data['playerResponse'] == 'None':
-            if self.accepting_match:
-                return
-            self.accepting_match = True
-            
-            game_mode, queue_id = await self.get_queue_info(connection)
-            
-            # --- Selective Accept Logic ---
-            allowed_queues = self.config.get("allowed_queue_ids", [])
-            if allowed_queues and queue_id not in allowed_queues:
-                config.console.log(f"[yellow]Skipping queue '{game_mode}' as it's not in your allowed list.[/]")
-                self.accepting_match = False # Reset for the next real pop
-                return
-            
-            config.console.print(Panel(
-                f"[bold white]Mode: {game_mode}[/]\n[dim]Accepting match...[/]",
-                title="⚡ QUEUE POPPED ⚡",
-                style="danger",
-                padding=(1, 2)
-            ))
-            
-            # --- Actions ---
-            # 1. Send Desktop Notification
-            if self.config.get("desktop_notifications"):
-                send_desktop_notification(game_mode)
-
-            # 2. Send Discord Ping
-            await send_discord_ping(
-                webhook_url=self.config.get("webhook_url"),
-                user_id=self.config.get("user_id"),
-                game_mode=game_mode
+        # One config version for the whole pop, even if the settings change mid-accept
+        snapshot = self.lcu.config
+
+        # --- Accept Decision ---
+        game_mode, queue_id = await self.resolve_queue(connection)
+        trace.mark("queue_resolved")
+        trace.info.update(queue_id=queue_id, queue_name=game_mode)
+        
+        # --- Accept Policy ---
+        accept, reason = snapshot.policy_for(self.tag).decide(queue_id, self.state, self.accept_history)
+        trace.mark("decided")
+        trace.info["decision"] = "accept" if accept else f"skip:{reason}"
+        self.lcu.latency.record(trace)
+        if not accept:
+            config.console.log(f"[yellow]{self.prefix}Skipping queue '{game_mode}': {REASONS[reason]}.[/]")
+            self.ready_check.skip()
+            self.lcu.record_pop(trace)
+            return
+        
+        # --- Accept Match ---
+        # Sent before any rendering or notification work so nothing can delay it.
+        self.ready_check.begin_accept()
+        result = await self.acceptor.accept(connection, event.data.get('timer'), trace)
+        trace.info.update(
+            accepted=result["accepted"],
+            accept_attempts=result["attempts"],
+            accept_verified=result["verified"],
+            budget_used=result["budget_used"],
+        )
+        # Queued for the journal's writer thread; gives the trace its journal_uid
+        self.lcu.record_pop(trace)
+        if result["accepted"]:
+            self.accept_history.append(time.time())
+        else:
+            config.console.print(
+                f"[danger]❌ {self.prefix}Could not accept the match "
+                f"({result['attempts']} attempt(s), last status: {result['last_status']}).[/]"
             )
-            
-            # 3. Accept Match
-            await connection.request('post', '/lol-matchmaking/v1/ready-check/accept')
-            config.console.print("[success]✅ Match Accepted![/]")
+            return
+
+        # --- Notifications (detached) ---
+        client = self.tag if len(self.lcu.clients) > 1 else None
+        self.lcu.dispatch_notifications(game_mode, trace=trace, snapshot=snapshot, client=client)
+
+        config.print_panel(
+            f"[bold white]Mode: {game_mode}[/]\n[dim]Match accepted.[/]",
+            title=f"⚡ QUEUE POPPED: {client} ⚡" if client else "⚡ QUEUE POPPED ⚡",
+            style="danger",
+            padding=(1, 2)
+        )
+        config.console.print(f"[success]✅ {self.prefix}Match Accepted![/]")
+        if result["by_player"]:
+            config.console.log(f"[dim]{self.prefix}Accepted in the client before queueBot sent its accept.[/]")
+        if not result["verified"]:
+            config.console.log(f"[yellow]{self.prefix}The client never confirmed the accept.[/]")
+        config.console.log(
+            f"[dim]Timing: {self.lcu.latency.format_trace(trace)} "
+            f"({result['budget_used']:.0%} of the ready-check timer used, {result['attempts']} attempt(s), "
+            f"{format_accept_connection(trace)})[/]"
+        )
+        config.console.log(f"[dim]{self.lcu.latency.status_line()}[/]")
+
+
+class LCU:
+    """
+    Supervises every League client on this machine from one event loop.
+    Each client gets a ClientMonitor; config, notification delivery and latency
+    tracking are shared between them.
+    """
+
+    def __init__(self, config, capture_path=None, config_path=None, desktop_notifications=True,
+                 journal_path=None, metrics_port=None, queue_cache_path=None, discovery_state_path=None):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        # Everything below belongs to the loop; other threads go through commands
+        self.commands = CommandChannel(self)
+        # Set once start() has returned and the loop is closed
+        self.stopped = threading.Event()
+        self._shutting_down = False
+        # Versioned config snapshots; config_path enables hot reload of edits on disk
+        self.config_store = ConfigStore(config, path=config_path)
+        self._config_watch = None
+        # Pauses every client; each ClientMonitor also has its own flag
+        self.paused = False
+        # ClientMonitors by pid (or by id() for clients attached from a lockfile string)
+        self.clients = {}
+        # Called (from the LCU thread) whenever a client connects, disconnects or is renamed
+        self.on_clients_changed = None
+        # Lockfile watching plus a backed-off process scan; discovery_state_path remembers install dirs
+        self.discovery = ClientDiscovery(self, state_path=discovery_state_path)
+        self._supervisor = None
+        self._monitors_created = 0
+        # Strong references to detached notification tasks so they aren't GC'd mid-flight
+        self._background_tasks = set()
+        # Pooled HTTP client for webhooks, opened on the first connect and closed on stop
+        self.notifier = NotificationClient()
+        # Worker thread for plyer toasts, which block while the window is created.
+        # Headless mode turns toasts off regardless of config.
+        self.desktop_notifier = DesktopNotifier()
+        self.desktop_notifications = desktop_notifications
+        # Per-sink delivery workers with retry and rate-limit handling
+        self.dispatcher = NotificationDispatcher(max_age=NOTIFICATION_MAX_AGE)
+        self._sinks_version = None
+        # Pop-to-accept timing spans for the last N ready checks, across all clients
+        self.latency = LatencyRecorder()
+        # Queue ID -> name, loaded from the on-disk cache; refetched when a client's version changes
+        self.queues = QueueCatalog(queue_cache_path)
+        # Lifetime counters for the metrics endpoint; bumped only after the accept is sent
+        self.pop_counts = Counter()
+        self.client_counts = Counter()
+        self.accept_latency = Histogram(ACCEPT_LATENCY_BUCKETS)
+        self.ws_events = Counter()
+        # Optional Prometheus endpoint on this loop; --metrics-port overrides config.json
+        port = metrics_port if metrics_port is not None else self.config.get("metrics_port")
+        self.exporter = MetricsExporter(self, port) if port else None
+
+        # Every ready check and notification outcome, persisted by a background writer
+        self.journal = self.open_journal(journal_path) if journal_path else None
+        if self.journal:
+            self.dispatcher.on_outcome = self.record_notification
+
+        # Optional capture of every websocket event for later replay
+        self.recorder = EventRecorder(capture_path) if capture_path else None
+
+        # Last status(), for readers that can't wait for the loop (e.g. the tray menu)
+        self.status_snapshot = self.status()
+
+    @property
+    def config(self):
+        """The current ConfigSnapshot. Read it once per operation so one pop sees one version."""
+        return self.config_store.current
+
+    @config.setter
+    def config(self, data):
+        # On the LCU loop; other threads submit commands.ApplyConfig
+        self.config_store.replace(data)
+
+    # --- Clients ---
+
+    def create_monitor(self, pid=None, **options):
+        """Registers a ClientMonitor without connecting it (attach() also connects)."""
+        self._monitors_created += 1
+        monitor = ClientMonitor(self, pid=pid, tag=f"Client {self._monitors_created}", **options)
+        self.clients[pid if pid is not None else id(monitor)] = monitor
+        return monitor
+
+    def attach(self, process_or_string, pid=None, **options):
+        """
+        Starts monitoring a client, given its psutil process or a lockfile-style string.
+        options (port, lockfile, discovered) are passed on to the ClientMonitor.
+        """
+        monitor = self.create_monitor(pid=pid, **options)
+        key = pid if pid is not None else id(monitor)
+        monitor.task = self.loop.create_task(monitor.run(process_or_string))
+        monitor.task.add_done_callback(lambda task: self._detach(key, task))
+        return monitor
+
+    def _detach(self, key, task):
+        monitor = self.clients.pop(key, None)
+        if not task.cancelled() and task.exception() is not None:
+            config.console.log(f"[yellow]Lost {monitor.tag if monitor else 'client'}: {task.exception()}[/]")
+        # The client may be restarting (e.g. for a patch); look for it again right away
+        self.discovery.wake()
+        self.clients_changed()
+
+    def clients_changed(self):
+        self.status()
+        if self.on_clients_changed:
+            try:
+                self.on_clients_changed()
+            except Exception as e:
+                config.console.log(f"[yellow]Client list listener failed: {e}[/]")
+
+    def status(self):
+        """A plain-data summary of every client and the shared state; also kept as status_snapshot."""
+        snapshot = {
+            "paused": self.paused,
+            "clients": [
+                {
+                    "key": key,
+                    "tag": monitor.tag,
+                    "status": monitor.status,
+                    "connected": monitor.connected,
+                    "paused": monitor.paused,
+                    "queue_name": monitor.state.get("queue_name"),
+                }
+                for key, monitor in self.clients.items()
+            ],
+            "config_version": self.config.version,
+            "latency": self.latency.status_line(),
+            "notifications": self.dispatcher.format_stats(),
+            "pending_notifications": self.dispatcher.pending(),
+            "discovery": self.discovery.format_stats(),
+        }
+        self.status_snapshot = snapshot
+        return snapshot
+
+    async def refresh_queues(self, connection):
+        if await self.queues.refresh(connection, self.loop):
+            # Names cached before the update may have been "Unknown (ID: ...)"
+            for monitor in self.clients.values():
+                if monitor.state["queue_id"] is not None:
+                    monitor.state["queue_name"] = self.queues.name(monitor.state["queue_id"])
+            self.clients_changed()
+
+    # --- Config Hot Reload ---
+
+    def start_config_watch(self):
+        if self.config_store.path and self._config_watch is None:
+            self._config_watch = self.loop.create_task(self.watch_config())
+
+    async def watch_config(self):
+        """Polls config.json's mtime on the LCU loop and swaps in edits made on disk."""
+        while True:
+            snapshot = self.config_store.reload_if_changed()
+            if snapshot is not None:
+                config.console.log(f"[info]Reloaded config.json (version {snapshot.version}).[/]")
+                for error in snapshot.errors:
+                    config.console.log(f"[danger]Ignoring invalid accept rule: {error}[/]")
+            await asyncio.sleep(config.CONFIG_POLL_INTERVAL)
+
+    def stop_config_watch(self):
+        if self._config_watch is not None:
+            self._config_watch.cancel()
+            self._config_watch = None
+
+    # --- Pop Journal ---
+
+    def open_journal(self, path):
+        try:
+            return PopJournal(path)
+        except sqlite3.Error as e:
+            config.console.log(f"[yellow]Pop journal disabled, could not open {path}: {e}[/]")
+            return None
+
+    def record_pop(self, trace):
+        """Counts a settled ready check and queues it for the journal. Never called before the accept POST."""
+        info = trace.info
+        self.pop_counts[info.get("queue_name") or "Unknown Mode", info.get("decision", "unknown"),
+                        bool(info.get("accepted"))] += 1
+        if info.get("accept_attempts"):
+            self.client_counts["accept_retries"] += info["accept_attempts"] - 1
+        if info.get("accept_reused") is False:
+            self.client_counts["accept_new_connections"] += 1
+        if "accept_acked" in trace.spans:
+            self.accept_latency.observe(trace.spans["accept_acked"] / 1000)
+        if self.journal:
+            self.journal.record_pop(trace)
+
+    def record_notification(self, notification, sink, outcome):
+        trace = notification.trace
+        pop_uid = trace.info.get("journal_uid") if trace is not None else None
+        if pop_uid is not None:
+            self.journal.record_notification(pop_uid, sink, outcome, trace.spans.get(f"notify_{sink}"))
+
+    # --- Notifications ---
+
+    def spawn_background(self, coro, name, timeout=NOTIFICATION_TIMEOUT):
+        """
+        Schedules a coroutine as a detached task with its own timeout.
+        Failures are logged and never propagate back into the accept path.
+        """
+        async def runner():
+            try:
+                await asyncio.wait_for(coro, timeout)
+            except asyncio.TimeoutError:
+                config.console.log(f"[yellow]{name} timed out after {timeout}s.[/]")
+            except Exception as e:
+                config.console.log(f"[yellow]{name} failed: {e}[/]")
+
+        task = self.loop.create_task(runner())
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+        return task
+
+    def build_sinks(self, snapshot):
+        """Creates the notification sinks enabled by a config snapshot. Invalid entries are skipped."""
+        sinks = []
+        if self.desktop_notifications and snapshot.get("desktop_notifications"):
+            sinks.append(DesktopSink(self.desktop_notifier))
+        for spec in sink_specs(snapshot.to_dict()):
+            errors = validate_sink(spec)
+            if errors:
+                for error in errors:
+                    config.console.log(f"[danger]Ignoring notification sink: {error}[/]")
+                continue
+            sinks.append(create_sink(spec, self.notifier))
+        return sinks
+
+    def ensure_sinks(self, snapshot):
+        if self._sinks_version != snapshot.version:
+            # New config version (e.g. from the settings window); rebuild sinks once
+            self.dispatcher.set_sinks(self.build_sinks(snapshot))
+            self._sinks_version = snapshot.version
+
+    async def warm_up_sinks(self):
+        self.ensure_sinks(self.config)
+        await asyncio.gather(*(sink.warm_up() for sink in self.dispatcher.sinks.values()))
+
+    def dispatch_notifications(self, game_mode, trace=None, snapshot=None, client=None):
+        """Queues the pop alert on every configured sink without awaiting delivery."""
+        snapshot = snapshot or self.config
+        self.ensure_sinks(snapshot)
+        self.dispatcher.submit(Notification(game_mode, trace=trace, client=client))
+
+    # --- Lifecycle ---
 
     def start(self):
-        """Starts the LCU connector. This is a blocking call."""
+        """
+        Monitors every League client until stop() (or a Shutdown command). This is a
+        blocking call; it returns once the loop is closed, and then sets `stopped`.
+        """
         config.console.print("[info]Searching for League Client...[/]")
-        self.connector.start()
+        for error in self.config.errors:
+            config.console.print(f"[warning]Ignoring invalid accept rule: {error}[/]")
+        try:
+            if self.exporter:
+                self.loop.run_until_complete(self.start_exporter())
+            self.loop.create_task(self.commands.serve())
+            self._supervisor = self.loop.create_task(self.discovery.run())
+            try:
+                self.loop.run_until_complete(self._supervisor)
+            except asyncio.CancelledError:
+                pass
+            except KeyboardInterrupt:
+                logger.info('Event loop interrupted by keyboard')
+            self.loop.run_until_complete(self.cancel_remaining())
+        finally:
+            self.commands.cancel_pending()
+            self.loop.close()
+            self.stopped.set()
+
+    async def cancel_remaining(self):
+        """Cancels every task still on the loop (the command server, stragglers) and waits for them."""
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def shutdown(self, drain_timeout=None):
+        """
+        Disconnects every client, delivers what notifications it can within drain_timeout,
+        then closes the notification pools and ends start(). Runs on the LCU loop.
+        """
+        if self._shutting_down:
+            return
+        self._shutting_down = True
+        self.stop_config_watch()
+        monitors = list(self.clients.values())
+        for monitor in monitors:
+            await monitor.stop()
+        tasks = [monitor.task for monitor in monitors if monitor.task is not None]
+        if tasks:
+            # Clients still waiting for their API to come up never finish on their own
+            _, pending = await asyncio.wait(tasks, timeout=MONITOR_STOP_TIMEOUT)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        drain_timeout = NOTIFICATION_DRAIN_TIMEOUT if drain_timeout is None else drain_timeout
+        if not await self.dispatcher.drain(drain_timeout):
+            config.console.log(
+                f"[yellow]Notifications still undelivered after {drain_timeout:g}s; dropping them.[/]"
+            )
+        config.console.log(f"[info]Notification delivery: {self.dispatcher.format_stats()}[/]")
+        await self.dispatcher.stop()
+        self._sinks_version = None
+        self.desktop_notifier.stop()
+        await self.notifier.close()
+        if self.recorder:
+            self.recorder.close()
+        if self.exporter:
+            await self.exporter.stop()
+        if self.journal:
+            # Commits the last batch; blocking, so off the loop
+            await self.loop.run_in_executor(None, self.journal.close)
+        if self._supervisor is not None:
+            self._supervisor.cancel()
+
+    async def start_exporter(self):
+        try:
+            await self.exporter.start()
+        except (OSError, ValueError, TypeError) as e:
+            config.console.log(f"[yellow]Metrics endpoint disabled (port {self.exporter.port!r}): {e}[/]")
+            self.exporter = None
 
-    def stop(self):
-        """Safely stops the LCU connector from another thread."""
+    def stop(self, timeout=SHUTDOWN_TIMEOUT):
+        """
+        Shuts down from another thread and waits for start() to return. If the shutdown
+        takes longer than timeout, whatever is left on the loop is cancelled.
+        Returns True once the loop has exited.
+        """
+        if self.stopped.is_set():
+            return True
         config.console.print("[warning]Stopping LCU connector...[/]")
-        if self.loop.is_running():
-            # Schedule the stop on the LCU's own event loop
-            self.loop.call_soon_threadsafe(self.connector.stop)
-            # Give it a moment to process the stop command
-            self.loop.call_soon_threadsafe(self.loop.stop)
+        self.commands.submit(Shutdown())
+        if self.stopped.wait(timeout):
+            return True
+        config.console.log(f"[yellow]LCU shutdown did not finish in {timeout:g}s; cancelling it.[/]")
+        try:
+            self.loop.call_soon_threadsafe(self._supervisor.cancel)
+        except (RuntimeError, AttributeError):
+            # Loop already closed, or start() never got as far as discovery
+            pass
+        return self.stopped.wait(1.0)
@@ -0,0 +1,220 @@
+"""
+Non-blocking console output and log file.
+
+Callers (the LCU loop, notifier threads, the tray) only append a small record to a
+deque, which is atomic in CPython, so logging never takes a lock or waits on the
+console. One writer thread renders the records with rich (or as plain lines) and
+appends them to a size-rotated log file.
+
+The last HISTORY_SIZE records are kept in memory. While the console window is hidden
+nothing is rendered to it; showing it again replays what was missed.
+"""
+import atexit
+import itertools
+import json
+import logging
+import logging.handlers
+import re
+import sys
+import threading
+import time
+from collections import deque
+
+# Records waiting for the writer; if it falls this far behind, the oldest are dropped
+PENDING_LIMIT = 4096
+# Records kept for replay when the console is shown
+HISTORY_SIZE = 1000
+LOG_FILE_MAX_BYTES = 1024 * 1024
+LOG_FILE_BACKUPS = 3
+# How long flush() (and interpreter exit) waits for the writer
+FLUSH_TIMEOUT = 2.0
+
+# Rich markup tags such as [success], [bold red] and [/]
+MARKUP_TAG = re.compile(r"\[/?[a-z][a-z ]*\]|\[/\]")
+
+
+def strip_markup(text):
+    return MARKUP_TAG.sub("", text)
+
+
+class PlainConsole:
+    """
+    The subset of rich's Console that queueBot uses, writing plain lines.
+    Markup tags are stripped; log() adds a timestamp like rich does.
+    """
+
+    def __init__(self, file=None):
+        self.file = file
+
+    def _write(self, text):
+        stream = self.file or sys.stdout
+        stream.write(text + "\n")
+        stream.flush()
+
+    def print(self, *objects, markup=True, highlight=False, **kwargs):
+        text = " ".join(str(obj) for obj in objects)
+        self._write(strip_markup(text) if markup else text)
+
+    def log(self, *objects, **kwargs):
+        text = strip_markup(" ".join(str(obj) for obj in objects))
+        self._write(f"[{time.strftime('%H:%M:%S')}] {text}")
+
+    def print_json(self, data=None, **kwargs):
+        self._write(json.dumps(data, indent=2))
+
+
+class BufferedConsole:
+    """
+    Drop-in for the console: print(), log(), print_json() and panel() return immediately
+    and a background thread does the rendering. Wraps a rich Console or a PlainConsole.
+    """
+
+    def __init__(self, target, pending_limit=PENDING_LIMIT, history_size=HISTORY_SIZE):
+        self.target = target
+        self.history = deque(maxlen=history_size)
+        self.visible = True
+        self.dropped = 0
+        self._pending = deque(maxlen=pending_limit)
+        self._sequence = itertools.count()
+        self._hidden_from = None
+        self._wakeup = threading.Event()
+        self._busy = False
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._log_file = None
+        atexit.register(self.close)
+
+    # --- Producer side (any thread) ---
+    def _emit(self, kind, payload, options):
+        if len(self._pending) == self._pending.maxlen:
+            self.dropped += 1
+        # (sequence, wall time, kind, payload, options); rendered later by the writer
+        self._pending.append((next(self._sequence), time.time(), kind, payload, options))
+        if self._thread is None:
+            self._start()
+        if not self._wakeup.is_set():
+            self._wakeup.set()
+
+    def print(self, *objects, **options):
+        self._emit("print", objects, options)
+
+    def log(self, *objects, **options):
+        self._emit("log", objects, options)
+
+    def print_json(self, data=None, **options):
+        self._emit("json", data, options)
+
+    def panel(self, body, title, **options):
+        """Prints body in a rich Panel (options go to Panel), or as plain lines on a PlainConsole."""
+        self._emit("panel", (body, title), options)
+
+    def show(self):
+        """Resumes console output, first replaying what was logged while it was hidden."""
+        self._emit("show", None, None)
+
+    def hide(self):
+        """Stops rendering to the console; records still reach the history and log file."""
+        self._emit("hide", None, None)
+
+    def open_log_file(self, path, max_bytes=LOG_FILE_MAX_BYTES, backups=LOG_FILE_BACKUPS):
+        """Also writes every record, without markup, to path (rotated at max_bytes)."""
+        handler = logging.handlers.RotatingFileHandler(
+            path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8", delay=True
+        )
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        self._log_file = handler
+
+    def flush(self, timeout=FLUSH_TIMEOUT):
+        """Waits until everything logged so far has been written. Returns False on timeout."""
+        deadline = time.monotonic() + timeout
+        while (self._pending or self._busy) and self._thread is not None:
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def close(self):
+        self.flush()
+        if self._log_file:
+            self._log_file.close()
+
+    # --- Writer thread ---
+    def _start(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="Log writer", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            # Cleared before draining, so a record appended mid-drain sets it again
+            self._wakeup.clear()
+            self._busy = True
+            try:
+                while self._pending:
+                    self._write(self._pending.popleft())
+            finally:
+                self._busy = False
+
+    def _write(self, record):
+        # show/hide travel through the queue so they apply in order with the output
+        if record[2] == "hide":
+            if self.visible:
+                self.visible = False
+                self._hidden_from = record[0]
+            return
+        if record[2] == "show":
+            self._replay()
+            return
+        self.history.append(record)
+        if self.visible:
+            self._render(record)
+        if self._log_file:
+            self._write_file(record)
+
+    def _replay(self):
+        if self.visible:
+            return
+        missed = [record for record in self.history if record[0] >= self._hidden_from]
+        skipped = missed[0][0] - self._hidden_from - 1 if missed else 0
+        if skipped > 0:
+            self._render((0, missed[0][1], "print", (f"[dim]... {skipped} older line(s) not shown[/]",), {}))
+        for record in missed:
+            self._render(record)
+        self.visible = True
+
+    def _render(self, record):
+        _, created, kind, payload, options = record
+        target = self.target
+        try:
+            if kind == "print":
+                target.print(*payload, **options)
+            elif kind == "log":
+                # Stamped with when it was logged, not when the writer got to it
+                target.print(f"[dim][{time.strftime('%H:%M:%S', time.localtime(created))}][/]", *payload, **options)
+            elif kind == "json":
+                target.print_json(data=payload, **options)
+            elif kind == "panel":
+                body, title = payload
+                if isinstance(target, PlainConsole):
+                    target.print(f"== {title} ==\n{body}")
+                else:
+                    from rich.panel import Panel
+                    target.print(Panel(body, title=title, **options))
+        except Exception:
+            # A closed or broken console must not stop the writer (or the log file)
+            pass
+
+    def _write_file(self, record):
+        _, created, kind, payload, options = record
+        if kind == "json":
+            text = json.dumps(payload)
+        elif kind == "panel":
+            text = strip_markup(f"== {payload[1]} == {payload[0]}".replace("\n", " | "))
+        else:
+            text = " ".join(str(obj) for obj in payload)
+            if options.get("markup", True):
+                text = strip_markup(text)
+        stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(created))
+        self._log_file.handle(logging.makeLogRecord({"msg": f"{stamp} {text.strip()}"}))
@@ -2,28 +2,31 @@ import argparse
 import sys
 import os
 import threading
-import ctypes
 
-# --- PyInstaller Hooks ---
-# This section is to help PyInstaller find hidden imports.
-try:
-    from plyer.platforms.win import notification
-except ImportError:
-    pass  # This will fail on other platforms, which is fine.
-# --- End PyInstaller Hooks ---
+# Started first so the profile covers every import below
+from startup import StartupProfiler
+PROFILER = StartupProfiler()
 
+# Heavy modules are imported lazily, off the main thread where possible.
+# ctypes is only needed for the Windows console and mutex, so helpers import it when called.
+# plyer's Windows backend is listed in queueBot.spec's hiddenimports for PyInstaller.
 import config as cfg
-from lcu import LCU
-from tray import TrayIcon
 from _version import __version__
 
+# Imported on the LCU thread, each timed separately (order matters: later ones reuse earlier ones)
+LCU_IMPORTS = ("aiohttp", "lcu_driver", "lcu")
+# Imported on the main thread while the LCU thread is already searching for the client
+TRAY_IMPORTS = ("PIL.Image", "pystray", "tray")
+
 def get_console_window():
     """Returns the handle to the console window."""
+    import ctypes
     kernel32 = ctypes.WinDLL('kernel32')
     return kernel32.GetConsoleWindow()
 
 def ensure_console_created():
     """Allocates a console window if one doesn't exist and enables VT processing."""
+    import ctypes
     kernel32 = ctypes.WinDLL('kernel32')
     hWnd = kernel32.GetConsoleWindow()
     
@@ -47,6 +50,7 @@ def ensure_console_created():
 
 def set_console_visibility(visible):
     """Shows or hides the console window."""
+    import ctypes
     user32 = ctypes.WinDLL('user32')
     kernel32 = ctypes.WinDLL('kernel32')
     hWnd = kernel32.GetConsoleWindow()
@@ -58,8 +62,16 @@ def set_console_visibility(visible):
         else:
             user32.ShowWindow(hWnd, 0) # SW_HIDE
 
+    # Nothing is rendered while hidden; showing replays the missed output from memory
+    if cfg.console:
+        if visible:
+            cfg.console.show()
+        else:
+            cfg.console.hide()
+
 def is_console_visible():
     """Returns True if the console window is currently visible."""
+    import ctypes
     user32 = ctypes.WinDLL('user32')
     kernel32 = ctypes.WinDLL('kernel32')
     hWnd = kernel32.GetConsoleWindow()
@@ -72,31 +84,80 @@ def toggle_console():
     visible = is_console_visible()
     set_console_visibility(not visible)
 
+def acquire_instance_mutex():
+    """
+    Returns False if another queueBot already holds the single-instance mutex.
+    One instance monitors every League client on this PC, so a second one would
+    only accept each pop twice. Windows only; elsewhere it always returns True.
+    """
+    if sys.platform != "win32":
+        return True
+    import ctypes
+    kernel32 = ctypes.WinDLL('kernel32')
+    # Kept open for the life of the process; Windows releases it on exit
+    kernel32.CreateMutexW(None, False, "Global\\queueBot_Instance_Mutex")
+    return kernel32.GetLastError() != 183  # ERROR_ALREADY_EXISTS
+
+def start_lcu(settings, capture_path, metrics_port, result, ready):
+    """
+    Imports and starts the LCU connector. Runs on its own thread so client discovery
+    overlaps with tray and icon setup. Publishes the LCU (or the error) via result/ready.
+    """
+    try:
+        for name in LCU_IMPORTS:
+            PROFILER.import_module(name)
+        from lcu import LCU
+        result["lcu"] = LCU(config=settings, capture_path=capture_path, config_path=cfg.CONFIG_FILE,
+                            journal_path=cfg.JOURNAL_FILE, metrics_port=metrics_port,
+                            queue_cache_path=cfg.QUEUE_CACHE_FILE, discovery_state_path=cfg.DISCOVERY_FILE)
+    except Exception as e:
+        result["error"] = e
+        ready.set()
+        return
+
+    ready.set()
+    PROFILER.mark("monitoring started")
+    result["lcu"].start()
+
 def main():
     """
     Main function to handle configuration and launch the tray icon.
     """
     parser = argparse.ArgumentParser(description=f"queueBot Tool {__version__}")
     parser.add_argument("--update", action="store_true", help="Force update of settings")
+    parser.add_argument("--capture", metavar="PATH", help="Record every LCU websocket event to PATH for replay")
+    parser.add_argument("--startup-profile", action="store_true", help="Report per-phase and per-import startup timings")
+    parser.add_argument("--headless", action="store_true",
+                        help="Run without tray, console window or GUI; control with signals (see headless.py)")
+    parser.add_argument("--config", metavar="PATH", help="Use this config file instead of config.json next to the app")
+    parser.add_argument("--metrics-port", type=int, metavar="PORT",
+                        help="Serve Prometheus metrics on 127.0.0.1:PORT (overrides metrics_port in config.json; 0 disables)")
     args = parser.parse_args()
 
+    if args.config:
+        cfg.CONFIG_FILE = os.path.abspath(args.config)
+
+    # --- Headless Daemon ---
+    if args.headless:
+        if not acquire_instance_mutex():
+            print("queueBot is already running! It monitors every League client on this PC.")
+            sys.exit(0)
+        import headless
+        sys.exit(headless.run(capture_path=args.capture, profiler=PROFILER if args.startup_profile else None,
+                              metrics_port=args.metrics_port))
+
     # --- ALWAYS Ensure Console Exists ---
     # We need a console for background threads to log to, even if hidden.
     ensure_console_created()
     set_console_visibility(False)
+    PROFILER.mark("console ready")
 
     # --- Single Instance Check ---
-    # Create a named mutex. If it already exists, another instance is running.
-    mutex_name = "Global\\queueBot_Instance_Mutex"
-    kernel32 = ctypes.WinDLL('kernel32')
-    mutex = kernel32.CreateMutexW(None, False, mutex_name)
-    last_error = kernel32.GetLastError()
-    
-    if last_error == 183:  # ERROR_ALREADY_EXISTS
+    if not acquire_instance_mutex():
         # If the console is visible (e.g. dev mode), print a message. 
         # Otherwise, just exit silently to avoid popping up a confusing window.
         if cfg.console:
-            cfg.console.print("[warning]queueBot is already running![/]")
+            cfg.console.print("[warning]queueBot is already running! It monitors every League client on this PC.[/]")
         else:
             print("queueBot is already running!")
         sys.exit(0)
@@ -111,18 +172,41 @@ def main():
 
     # --- Load Settings ---
     settings = cfg.load_or_create_config()
+    cfg.console.open_log_file(cfg.LOG_FILE)
+    PROFILER.mark("config loaded")
 
     # --- LCU Connector in a background thread ---
-    try:
-        lcu_connector = LCU(config=settings)
-        lcu_thread = threading.Thread(target=lcu_connector.start, daemon=True)
-        lcu_thread.start()
-    except Exception as e:
+    lcu_result = {}
+    lcu_ready = threading.Event()
+    lcu_thread = threading.Thread(
+        target=start_lcu,
+        args=(settings, args.capture, args.metrics_port, lcu_result, lcu_ready),
+        name="LCU",
+        daemon=True
+    )
+    lcu_thread.start()
+
+    # --- Tray imports overlap with LCU imports and discovery ---
+    for name in TRAY_IMPORTS:
+        PROFILER.import_module(name)
+    from tray import TrayIcon
+    PROFILER.mark("tray imported")
+
+    lcu_ready.wait()
+    if "error" in lcu_result:
         set_console_visibility(True)
-        cfg.console.print(f"\n[danger]An unexpected error occurred during LCU setup: {e}[/]")
+        cfg.console.print(f"\n[danger]An unexpected error occurred during LCU setup: {lcu_result['error']}[/]")
         cfg.console.print("[info]Please ensure the League of Legends client is running.[/]")
+        cfg.console.flush()
         input("Press Enter to exit...")
         sys.exit(1)
+    lcu_connector = lcu_result["lcu"]
+
+    def on_tray_visible():
+        PROFILER.mark("tray visible")
+        if args.startup_profile:
+            PROFILER.report(cfg.console)
+            PROFILER.dump_json(os.path.join(cfg.BASE_DIR, "startup-profile.json"))
 
     # --- System Tray Icon in the main thread ---
     tray_icon = TrayIcon(
@@ -130,8 +214,11 @@ def main():
         toggle_console_callback=toggle_console,
         is_visible_callback=is_console_visible
     )
-    tray_icon.run()
+    tray_icon.run(on_visible=on_tray_visible)
 
+    # The tray has exited; shut down on the LCU loop (bounded) and let its thread finish
+    lcu_connector.stop()
+    lcu_thread.join(timeout=1.0)
     cfg.console.print("[yellow]Application has been shut down.[/]")
 
 
@@ -143,6 +230,7 @@ if __name__ == "__main__":
         # But we must be careful if console isn't init yet.
         if cfg.console:
             cfg.console.print(f"[bold red]FATAL ERROR: {e}[/]")
+            cfg.console.flush()
         else:
             print(f"FATAL ERROR: {e}")
             
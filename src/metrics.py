@@ -0,0 +1,134 @@
+import bisect
+import json
+import math
+import time
+from collections import deque
+
+# Ordered stages of a ready check. Each span is milliseconds since the websocket event arrived.
+STAGES = (
+    "event_received",
+    "queue_resolved",
+    "decided",
+    "accept_sent",
+    "accept_acked",
+    "accept_verified",
+)
+
+
+class PopTrace:
+    """High-resolution timing spans for a single ready check."""
+
+    def __init__(self):
+        self.started_ns = time.perf_counter_ns()
+        self.wall_time = time.time()
+        self.spans = {"event_received": 0.0}
+        self.info = {}
+
+    def mark(self, stage):
+        """Records the elapsed time for a stage, in milliseconds."""
+        self.spans[stage] = (time.perf_counter_ns() - self.started_ns) / 1_000_000
+
+    def to_dict(self):
+        return {"time": self.wall_time, "spans_ms": dict(self.spans), **self.info}
+
+
+# Upper bounds (seconds) of the accept-latency histogram buckets
+ACCEPT_LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram, cheap enough to update on every pop.
+    Counts are per bucket; cumulative() gives Prometheus-style 'le' totals.
+    """
+
+    def __init__(self, bounds):
+        self.bounds = tuple(bounds)
+        # The last slot is +Inf
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        """[(upper bound, observations <= bound)], ending with (inf, count)."""
+        total = 0
+        result = []
+        for bound, count in zip(self.bounds + (math.inf,), self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(math.ceil(pct / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+class LatencyRecorder:
+    """
+    Keeps the most recent PopTraces in a fixed-size ring buffer
+    and summarizes each stage as p50/p95/p99.
+    """
+
+    def __init__(self, capacity=256):
+        self.traces = deque(maxlen=capacity)
+
+    def begin(self):
+        return PopTrace()
+
+    def record(self, trace):
+        self.traces.append(trace)
+
+    def stage_names(self):
+        """Known stages first, then any extra spans (e.g. notification sinks) in first-seen order."""
+        names = list(STAGES)
+        for trace in self.traces:
+            for stage in trace.spans:
+                if stage not in names:
+                    names.append(stage)
+        return names
+
+    def summary(self):
+        """Returns {stage: {"count", "p50", "p95", "p99"}} for every stage seen."""
+        result = {}
+        for stage in self.stage_names():
+            values = sorted(trace.spans[stage] for trace in self.traces if stage in trace.spans)
+            if values:
+                result[stage] = {
+                    "count": len(values),
+                    "p50": percentile(values, 50),
+                    "p95": percentile(values, 95),
+                    "p99": percentile(values, 99),
+                }
+        return result
+
+    def status_line(self):
+        """Short accept-latency summary for the tray menu."""
+        accepted = self.summary().get("accept_acked")
+        if not accepted:
+            return "Accept latency: no pops yet"
+        return (
+            f"Accept latency: p50 {accepted['p50']:.1f}ms / "
+            f"p95 {accepted['p95']:.1f}ms (n={accepted['count']})"
+        )
+
+    def format_trace(self, trace):
+        """One-line rendering of a single trace for the console."""
+        return " → ".join(f"{stage} {ms:.1f}ms" for stage, ms in trace.spans.items())
+
+    def dump_json(self, path):
+        """Writes the raw traces and their summary to a JSON file for offline analysis."""
+        with open(path, "w") as f:
+            json.dump({
+                "summary": self.summary(),
+                "traces": [trace.to_dict() for trace in self.traces],
+            }, f, indent=2)
+        return path
@@ -1,7 +1,14 @@
+import asyncio
+import json
 import sys
 import os
+import queue
+import shlex
+import threading
+import time
+from collections.abc import Mapping
+from functools import lru_cache
 import aiohttp
-from plyer import notification
 import config
 
 
@@ -16,12 +23,20 @@ def resource_path(relative_path):
     return os.path.join(base_path, relative_path)
 
 
+@lru_cache(maxsize=None)
+def get_icon_path():
+    """Resolves the notification icon once and caches it."""
+    return resource_path("assets/gnome-thresh.ico")
+
+
 def send_desktop_notification(game_mode):
     """
-    Sends a native desktop notification.
+    Sends a native desktop notification. Blocking; use DesktopNotifier from async code.
     """
     try:
-        icon_path = resource_path("assets/gnome-thresh.ico")
+        # Imported here (on the notifier thread) so plyer stays off the startup path
+        from plyer import notification
+        icon_path = get_icon_path()
         notification.notify(
             title="Queue Popped!",
             message=f"Accepting match for {game_mode}.",
@@ -34,21 +49,684 @@ def send_desktop_notification(game_mode):
         config.console.log(f"[yellow]Failed to send desktop notification: {e}[/]")
 
 
-async def send_discord_ping(webhook_url, user_id, game_mode):
+class DesktopNotifier:
     """
-    Sends a notification to the configured Discord webhook.
+    Shows desktop notifications from a single worker thread.
+    plyer blocks while the toast window is built, so it must never run on the event loop.
+    The pending queue is bounded; when it backs up, the oldest notification is dropped.
     """
-    if not webhook_url:
-        return
-        
-    mention = f"<@{user_id}>" if user_id else ""
-    
-    async with aiohttp.ClientSession() as session:
+
+    def __init__(self, max_pending=2):
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = None
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="DesktopNotifier", daemon=True)
+                self._thread.start()
+
+    def _put_latest(self, item):
+        """Enqueues without blocking, discarding the oldest pending item if full."""
+        while True:
+            try:
+                self._queue.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    self._queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def submit(self, game_mode):
+        """Queues a notification. Never blocks the caller."""
+        self._ensure_started()
+        self._put_latest(game_mode)
+
+    def stop(self):
+        """Asks the worker thread to exit after the notification it is currently showing."""
+        if self._thread is not None and self._thread.is_alive():
+            self._put_latest(None)
+
+    def _run(self):
+        while True:
+            game_mode = self._queue.get()
+            if game_mode is None:
+                break
+            send_desktop_notification(game_mode)
+
+
+class NotificationClient:
+    """
+    Long-lived HTTP client for outbound notifications.
+    Keeps a keep-alive connection pool open so a pop costs a single round-trip
+    instead of a fresh DNS lookup, TCP connect and TLS handshake.
+    """
+
+    def __init__(self, pool_size=4, keepalive_timeout=300, request_timeout=10):
+        self.pool_size = pool_size
+        self.keepalive_timeout = keepalive_timeout
+        self.request_timeout = request_timeout
+        self.session = None
+
+    @property
+    def is_open(self):
+        return self.session is not None and not self.session.closed
+
+    async def start(self):
+        """Creates the pooled session. Must run on the event loop that will use it."""
+        if self.is_open:
+            return
+        # Capped per host, not overall, so a slow endpoint can't hold every pooled connection
+        connector = aiohttp.TCPConnector(
+            limit=0,
+            limit_per_host=self.pool_size,
+            keepalive_timeout=self.keepalive_timeout,
+            ttl_dns_cache=self.keepalive_timeout,
+        )
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.request_timeout),
+        )
+
+    async def warm_up(self, url):
+        """
+        Opens a pooled connection to the URL's host ahead of a pop.
+        A GET on a Discord webhook only returns its metadata, so this is side-effect free.
+        """
+        if not url:
+            return
+        await self.start()
         try:
-            payload = {
-                "content": f"{mention} 🚨 **QUEUE POPPED!** 🚨\n**Mode:** {game_mode}\nAccepting match automatically."
-            }
-            await session.post(webhook_url, json=payload)
-            config.console.log("[cyan]Discord notification sent.[/]")
+            async with self.session.get(url) as response:
+                await response.read()
         except Exception as e:
-            config.console.log(f"[yellow]Failed to send Discord ping: {e}[/]")
+            config.console.log(f"[yellow]Notification warm-up failed: {e}[/]")
+
+    async def post_json(self, url, payload, headers=None):
+        """
+        POSTs a JSON payload. The body is always drained so the connection returns to the pool.
+        Returns a tuple of (status, headers, body).
+        """
+        await self.start()
+        async with self.session.post(url, json=payload, headers=headers) as response:
+            body = await response.read()
+            return response.status, response.headers, body
+
+    async def close(self):
+        if self.is_open:
+            await self.session.close()
+        self.session = None
+
+
+# --- Delivery ---
+
+class Notification:
+    """
+    A single pop alert. Its age decides whether it is still worth delivering.
+    If a PopTrace is attached, each sink marks its completion on it.
+    client names the League client it came from when several are running.
+    """
+
+    def __init__(self, game_mode, trace=None, client=None):
+        self.game_mode = game_mode
+        self.trace = trace
+        self.client = client
+        self.created_at = time.monotonic()
+        self.timestamp = time.time()
+
+    @property
+    def label(self):
+        """Game mode, tagged with the client if there is one."""
+        return f"{self.game_mode} ({self.client})" if self.client else self.game_mode
+
+    @property
+    def age(self):
+        return time.monotonic() - self.created_at
+
+    def to_dict(self):
+        """The JSON body sent by the generic HTTP, command and socket sinks."""
+        return {"event": "queue_pop", "game_mode": self.game_mode, "client": self.client, "time": self.timestamp}
+
+
+class RetryLater(Exception):
+    """Raised by a sink when delivery failed transiently. retry_after is in seconds, if known."""
+
+    def __init__(self, reason, retry_after=None):
+        super().__init__(reason)
+        self.retry_after = retry_after
+
+
+def parse_retry_after(headers, body):
+    """Reads Discord's retry delay from the Retry-After header or the JSON body."""
+    value = headers.get("Retry-After")
+    if value is None:
+        try:
+            value = json.loads(body).get("retry_after")
+        except (ValueError, AttributeError):
+            value = None
+    try:
+        return max(float(value), 0.0) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def check_http_status(status, headers, body):
+    """Raises RetryLater for 429/5xx and ValueError for other 4xx responses."""
+    if status == 429:
+        raise RetryLater("rate limited", parse_retry_after(headers, body))
+    if status >= 500:
+        raise RetryLater(f"HTTP {status}")
+    if status >= 400:
+        # Bad URL or deleted endpoint: retrying won't help
+        raise ValueError(f"endpoint rejected the message with HTTP {status}")
+
+
+# --- Sinks ---
+
+class Sink:
+    """
+    Where a pop alert goes. deliver() raises RetryLater (or a network error) for
+    transient failures and anything else for permanent ones.
+    timeout bounds one attempt; concurrency is how many deliveries may run at once.
+    """
+
+    type = None
+    timeout = 10.0
+    concurrency = 1
+
+    def __init__(self, name=None, timeout=None, concurrency=None, spec=None):
+        self.name = name or self.type
+        if timeout is not None:
+            self.timeout = timeout
+        if concurrency is not None:
+            self.concurrency = concurrency
+        # The config entry it was built from; a changed entry resets the sink's circuit breaker
+        self.spec = spec
+
+    async def deliver(self, notification):
+        raise NotImplementedError
+
+    async def warm_up(self):
+        """Prepares for a pop that may come soon (e.g. opens a connection). Optional."""
+
+
+class DesktopSink(Sink):
+    """Hands notifications to the DesktopNotifier thread. Never blocks."""
+
+    type = "desktop"
+    timeout = 1.0
+
+    def __init__(self, notifier, **options):
+        super().__init__(**options)
+        self.notifier = notifier
+
+    async def deliver(self, notification):
+        self.notifier.submit(notification.label)
+
+
+class DiscordSink(Sink):
+    """Posts pop alerts to a Discord webhook over the pooled NotificationClient."""
+
+    type = "discord"
+
+    def __init__(self, client, webhook_url, user_id=None, **options):
+        super().__init__(**options)
+        self.client = client
+        self.webhook_url = webhook_url
+        self.user_id = user_id
+
+    def build_payload(self, game_mode, client=None):
+        mention = f"<@{self.user_id}>" if self.user_id else ""
+        account = f"**Account:** {client}\n" if client else ""
+        return {
+            "content": f"{mention} 🚨 **QUEUE POPPED!** 🚨\n{account}**Mode:** {game_mode}\nAccepting match automatically."
+        }
+
+    async def deliver(self, notification):
+        status, headers, body = await self.client.post_json(
+            self.webhook_url, self.build_payload(notification.game_mode, notification.client)
+        )
+        check_http_status(status, headers, body)
+
+    async def warm_up(self):
+        # A GET on a Discord webhook only returns its metadata
+        await self.client.warm_up(self.webhook_url)
+
+
+class HttpSink(Sink):
+    """POSTs Notification.to_dict() as JSON to any HTTP endpoint, with optional extra headers."""
+
+    type = "http"
+    concurrency = 2
+
+    def __init__(self, client, url, headers=None, **options):
+        super().__init__(**options)
+        self.client = client
+        self.url = url
+        self.headers = dict(headers or {})
+
+    async def deliver(self, notification):
+        status, headers, body = await self.client.post_json(self.url, notification.to_dict(), headers=self.headers)
+        check_http_status(status, headers, body)
+
+
+class CommandSink(Sink):
+    """
+    Runs a local program per pop. The alert is passed as JSON on stdin and as
+    QUEUEBOT_GAME_MODE / QUEUEBOT_CLIENT environment variables. A non-zero exit is a failure.
+    """
+
+    type = "command"
+    concurrency = 2
+
+    def __init__(self, command, **options):
+        super().__init__(**options)
+        if isinstance(command, str):
+            command = shlex.split(command, posix=os.name != "nt")
+        self.args = list(command)
+
+    async def deliver(self, notification):
+        env = dict(os.environ, QUEUEBOT_GAME_MODE=notification.game_mode, QUEUEBOT_CLIENT=notification.client or "")
+        process = await asyncio.create_subprocess_exec(
+            *self.args, stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.DEVNULL, env=env,
+        )
+        try:
+            await process.communicate(json.dumps(notification.to_dict()).encode())
+        except asyncio.CancelledError:
+            # Timed out: don't leave the script running
+            try:
+                process.kill()
+            except ProcessLookupError:
+                pass
+            # Reap it, so it doesn't linger as a zombie with its pipes open
+            await process.wait()
+            raise
+        if process.returncode != 0:
+            raise ValueError(f"{self.args[0]} exited with code {process.returncode}")
+
+
+# asyncio has no Unix domain sockets on Windows
+UNIX_SOCKETS = os.name != "nt" and hasattr(asyncio, "open_unix_connection")
+
+
+class SocketSink(Sink):
+    """
+    Pushes one JSON line per pop to a local listener: "host:port" for TCP,
+    or "unix:/path/to/socket" for a Unix domain socket (not on Windows).
+    """
+
+    type = "socket"
+    timeout = 2.0
+
+    def __init__(self, address, **options):
+        super().__init__(**options)
+        self.address = address
+
+    async def deliver(self, notification):
+        if self.address.startswith("unix:"):
+            if not UNIX_SOCKETS:
+                raise OSError("Unix domain sockets are not supported on this platform")
+            _, writer = await asyncio.open_unix_connection(self.address[len("unix:"):])
+        else:
+            host, _, port = self.address.rpartition(":")
+            _, writer = await asyncio.open_connection(host or "127.0.0.1", int(port))
+        try:
+            writer.write(json.dumps(notification.to_dict()).encode() + b"\n")
+            await writer.drain()
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                # The line was already written; a reset while closing doesn't undo it
+                pass
+
+
+# --- Sink Config ---
+# Entries of the "sinks" config list. Every type also takes optional
+# "name", "enabled", "timeout" (seconds per attempt) and "concurrency".
+SINK_TYPES = {
+    "discord": ("url",),
+    "http": ("url",),
+    "command": ("command",),
+    "socket": ("address",),
+}
+MAX_SINK_CONCURRENCY = 8
+
+
+def sink_target(spec):
+    """The URL, command or address a sink entry points at, for display."""
+    target = spec.get(SINK_TYPES.get(spec.get("type"), ("url",))[0])
+    return " ".join(target) if isinstance(target, (list, tuple)) else str(target or "")
+
+
+def validate_sink(spec):
+    """Returns a list of human-readable problems with one sink entry."""
+    if not isinstance(spec, Mapping):
+        return [f"Sink entries must be objects, got {spec!r}."]
+    kind = spec.get("type")
+    label = spec.get("name") or kind
+    if kind not in SINK_TYPES:
+        return [f"Sink {label!r}: type must be one of {', '.join(SINK_TYPES)}."]
+
+    errors = []
+    for key in SINK_TYPES[kind]:
+        if not spec.get(key):
+            errors.append(f"Sink {label!r} needs a {key}.")
+    url = spec.get("url")
+    if url and not (isinstance(url, str) and url.startswith(("http://", "https://"))):
+        errors.append(f"Sink {label!r}: url must start with http:// or https://.")
+    command = spec.get("command")
+    if command and not (isinstance(command, str) or
+                        (isinstance(command, (list, tuple)) and all(isinstance(arg, str) for arg in command))):
+        errors.append(f"Sink {label!r}: command must be a string or a list of strings.")
+    address = spec.get("address")
+    if address and not (isinstance(address, str) and (
+            address.startswith("unix:") or address.rpartition(":")[2].isdigit())):
+        errors.append(f"Sink {label!r}: address must be host:port or unix:/path.")
+    elif address and address.startswith("unix:") and not UNIX_SOCKETS:
+        errors.append(f"Sink {label!r}: unix: addresses aren't supported on this platform; use host:port.")
+    headers = spec.get("headers")
+    if headers is not None and not (isinstance(headers, Mapping) and
+                                    all(isinstance(v, str) for v in headers.values())):
+        errors.append(f"Sink {label!r}: headers must map names to strings.")
+    timeout = spec.get("timeout")
+    if timeout is not None and (isinstance(timeout, bool) or not isinstance(timeout, (int, float)) or timeout <= 0):
+        errors.append(f"Sink {label!r}: timeout must be a positive number of seconds.")
+    concurrency = spec.get("concurrency")
+    if concurrency is not None and (not isinstance(concurrency, int) or not 1 <= concurrency <= MAX_SINK_CONCURRENCY):
+        errors.append(f"Sink {label!r}: concurrency must be 1-{MAX_SINK_CONCURRENCY}.")
+    return errors
+
+
+def validate_sinks(specs):
+    """Returns the problems with a "sinks" config list."""
+    if not isinstance(specs, (list, tuple)):
+        return ["sinks must be a list."]
+    return [error for spec in specs for error in validate_sink(spec)]
+
+
+def sink_specs(settings):
+    """
+    Every sink entry a config enables: the settings window's webhook_url first,
+    then the "sinks" list. Names are made unique ("discord", "discord-2", ...).
+    """
+    specs = []
+    if settings.get("webhook_url"):
+        specs.append({"type": "discord", "url": settings["webhook_url"], "user_id": settings.get("user_id")})
+    extra = settings.get("sinks") or []
+    if isinstance(extra, (list, tuple)):
+        specs.extend(spec for spec in extra if not isinstance(spec, Mapping) or spec.get("enabled", True))
+
+    seen = set()
+    named = []
+    for spec in specs:
+        if isinstance(spec, Mapping):
+            spec = dict(spec)
+            base = spec.get("name") or spec.get("type") or "sink"
+            name, suffix = base, 2
+            while name in seen:
+                name, suffix = f"{base}-{suffix}", suffix + 1
+            seen.add(name)
+            spec["name"] = name
+        named.append(spec)
+    return named
+
+
+def create_sink(spec, client):
+    """Builds the Sink for a validated entry; client is the shared NotificationClient."""
+    options = {"name": spec["name"], "timeout": spec.get("timeout"),
+               "concurrency": spec.get("concurrency"), "spec": spec}
+    kind = spec["type"]
+    if kind == "discord":
+        return DiscordSink(client, spec["url"], spec.get("user_id"), **options)
+    if kind == "http":
+        return HttpSink(client, spec["url"], spec.get("headers"), **options)
+    if kind == "command":
+        return CommandSink(spec["command"], **options)
+    return SocketSink(spec["address"], **options)
+
+
+# --- Dispatch ---
+
+class CircuitBreaker:
+    """
+    Stops calling a sink after `threshold` failures in a row. After `cooldown` seconds
+    one trial delivery is let through: success closes the circuit, failure reopens it.
+    """
+
+    def __init__(self, threshold=5, cooldown=30.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+
+    @property
+    def is_open(self):
+        return self.opened_at is not None
+
+    def allow(self):
+        if self.opened_at is None:
+            return True
+        if self._trial or time.monotonic() - self.opened_at < self.cooldown:
+            return False
+        self._trial = True
+        return True
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+
+    def record_failure(self):
+        """Counts a failure. Returns True if this one opened the circuit."""
+        self.failures += 1
+        was_open = self.opened_at is not None
+        if self._trial or self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+            self._trial = False
+            return not was_open
+        return False
+
+
+class NotificationDispatcher:
+    """
+    Delivers notifications through per-sink worker tasks.
+    Each sink has its own bounded queue, `concurrency` workers and circuit breaker, so a
+    slow or dead endpoint never holds up the others and submit() never blocks. Transient
+    failures are retried with exponential backoff (or the server's Retry-After), and
+    alerts older than max_age are dropped as stale.
+    """
+
+    COUNTERS = ("sent", "retried", "rate_limited", "failed", "dropped", "expired", "short_circuited")
+
+    def __init__(self, max_pending=8, max_age=60.0, base_delay=0.5, max_delay=15.0,
+                 breaker_threshold=5, breaker_cooldown=30.0):
+        self.max_pending = max_pending
+        self.max_age = max_age
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self.sinks = {}
+        self.stats = {}
+        self.breakers = {}
+        # Called as on_outcome(notification, sink_name, outcome) once each delivery settles
+        self.on_outcome = None
+        self._queues = {}
+        self._workers = {}
+
+    def set_sinks(self, sinks):
+        """Replaces the active sinks. Must run on the event loop."""
+        new_sinks = {sink.name: sink for sink in sinks}
+
+        for name in list(self._workers):
+            if name not in new_sinks:
+                for worker in self._workers.pop(name):
+                    worker.cancel()
+                pending = self._queues.pop(name)
+                # Its queued alerts will never go out; count them like stop() does
+                while not pending.empty():
+                    self._settle(name, pending.get_nowait(), "dropped")
+
+        for name, sink in new_sinks.items():
+            self.stats.setdefault(name, dict.fromkeys(self.COUNTERS, 0))
+            previous = self.sinks.get(name)
+            if name not in self.breakers or previous is None or previous.spec != sink.spec:
+                # New or reconfigured endpoint: give it a clean slate
+                self.breakers[name] = CircuitBreaker(self.breaker_threshold, self.breaker_cooldown)
+            if name not in self._queues:
+                self._queues[name] = asyncio.Queue(maxsize=self.max_pending)
+                self._workers[name] = []
+            workers = self._workers[name]
+            while len(workers) < sink.concurrency:
+                workers.append(asyncio.create_task(self._worker(name)))
+            while len(workers) > sink.concurrency:
+                workers.pop().cancel()
+
+        self.sinks = new_sinks
+
+    def submit(self, notification):
+        """Queues a notification for every sink without waiting for delivery."""
+        for name, pending in self._queues.items():
+            if pending.full():
+                # Keep the newest alert; the oldest is the least useful
+                self._settle(name, pending.get_nowait(), "dropped")
+                pending.task_done()
+            pending.put_nowait(notification)
+
+    def pending(self):
+        return sum(pending.qsize() for pending in self._queues.values())
+
+    def queue_depth(self, name):
+        pending = self._queues.get(name)
+        return pending.qsize() if pending is not None else 0
+
+    def _settle(self, name, notification, outcome):
+        """Counts a delivery's final outcome and reports it to on_outcome."""
+        self.stats[name][outcome] += 1
+        if self.on_outcome:
+            try:
+                self.on_outcome(notification, name, outcome)
+            except Exception as e:
+                config.console.log(f"[yellow]Notification outcome listener failed: {e}[/]")
+
+    def backoff_delay(self, attempt):
+        return min(self.base_delay * (2 ** attempt), self.max_delay)
+
+    def _record_failure(self, name, reason):
+        breaker = self.breakers[name]
+        if breaker.record_failure():
+            config.console.log(
+                f"[yellow]{name} failed {breaker.failures} time(s) in a row ({reason}); "
+                f"pausing it for {breaker.cooldown:.0f}s.[/]"
+            )
+
+    async def _deliver(self, name, notification):
+        """Delivers one notification to one sink, retrying until it succeeds or goes stale."""
+        stats = self.stats[name]
+        attempt = 0
+        while True:
+            sink = self.sinks.get(name)
+            if sink is None:
+                return
+            if notification.age > self.max_age:
+                self._settle(name, notification, "expired")
+                config.console.log(f"[yellow]Dropped stale {name} notification.[/]")
+                return
+            breaker = self.breakers[name]
+            if not breaker.allow():
+                # Fail fast while the endpoint is known to be down, so its queue can't back up
+                self._settle(name, notification, "short_circuited")
+                return
+
+            try:
+                await asyncio.wait_for(sink.deliver(notification), sink.timeout)
+                breaker.record_success()
+                if notification.trace is not None:
+                    notification.trace.mark(f"notify_{name}")
+                self._settle(name, notification, "sent")
+                config.console.log(f"[cyan]{name.capitalize()} notification sent.[/]")
+                return
+            except RetryLater as e:
+                if e.retry_after is not None:
+                    # Throttled, not broken: the endpoint answered, so the breaker isn't charged
+                    stats["rate_limited"] += 1
+                    breaker.record_success()
+                    delay = e.retry_after
+                else:
+                    self._record_failure(name, e)
+                    delay = self.backoff_delay(attempt)
+                reason = str(e)
+            except (asyncio.TimeoutError, aiohttp.ClientError, OSError) as e:
+                reason = str(e) or type(e).__name__
+                self._record_failure(name, reason)
+                delay = self.backoff_delay(attempt)
+            except Exception as e:
+                self._record_failure(name, e)
+                self._settle(name, notification, "failed")
+                config.console.log(f"[yellow]Failed to send {name} notification: {e}[/]")
+                return
+
+            if notification.age + delay > self.max_age:
+                self._settle(name, notification, "expired")
+                config.console.log(f"[yellow]Giving up on {name} notification ({reason}).[/]")
+                return
+
+            stats["retried"] += 1
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def _worker(self, name):
+        pending = self._queues[name]
+        while True:
+            notification = await pending.get()
+            try:
+                await self._deliver(name, notification)
+            except asyncio.CancelledError:
+                # Stopped (or the sink removed) mid-delivery; it still gets an outcome
+                self._settle(name, notification, "dropped")
+                raise
+            finally:
+                pending.task_done()
+
+    def format_stats(self):
+        """Returns a one-line summary of delivery counters per sink."""
+        parts = []
+        for name, stats in self.stats.items():
+            counters = ", ".join(f"{key}={value}" for key, value in stats.items() if value)
+            breaker = self.breakers.get(name)
+            if breaker is not None and breaker.is_open:
+                counters = f"{counters}, circuit open" if counters else "circuit open"
+            parts.append(f"{name}: {counters or 'idle'}")
+        return " | ".join(parts) or "no sinks"
+
+    async def drain(self, timeout):
+        """Waits up to timeout for every queued and in-flight delivery to settle. Returns True if they all did."""
+        queues = list(self._queues.values())
+        if not queues:
+            return True
+        try:
+            await asyncio.wait_for(asyncio.gather(*(pending.join() for pending in queues)), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def stop(self):
+        """Cancels all workers. Notifications still queued are counted as dropped; drain() first to deliver them."""
+        workers = [worker for workers in self._workers.values() for worker in workers]
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        for name, pending in self._queues.items():
+            while not pending.empty():
+                self._settle(name, pending.get_nowait(), "dropped")
+        self._workers.clear()
+        self._queues.clear()
+        self.sinks = {}
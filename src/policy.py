@@ -0,0 +1,173 @@
+"""
+Accept policy: config rules compiled once into lookup tables, so deciding on a pop
+is a handful of constant-time checks with no I/O.
+
+Config keys (all optional; empty or 0 means "no restriction"):
+    allowed_queue_ids   list of queue IDs to accept
+    accept_windows      list of {"start": "HH:MM", "end": "HH:MM"} local-time windows;
+                        a window whose end is before its start wraps past midnight
+    max_pops_per_hour   accept at most this many pops in any rolling hour
+    max_party_size      skip pops when the lobby has more members than this
+    allowed_roles       positions (e.g. "MIDDLE") the local player must have picked first
+"""
+import time
+from collections import deque
+
+MINUTES_PER_DAY = 24 * 60
+ROLES = ("TOP", "JUNGLE", "MIDDLE", "BOTTOM", "UTILITY", "FILL")
+UNPICKED_POSITIONS = (None, "", "UNSELECTED", "NONE")
+
+# Decision reasons, also used as skip messages
+REASONS = {
+    "ok": "accepted by policy",
+    "queue": "queue is not in your allowed list",
+    "schedule": "outside your accept windows",
+    "rate": "hourly pop limit reached",
+    "party_size": "party is larger than your limit",
+    "role": "your position is not in your allowed roles",
+}
+
+
+class PolicyError(ValueError):
+    """Raised when config rules can't be compiled. args[0] lists every problem."""
+
+
+def parse_clock(value):
+    """Parses 'HH:MM' into minutes since midnight."""
+    hours, minutes = value.strip().split(":")
+    hours, minutes = int(hours), int(minutes)
+    if not (0 <= hours < 24 and 0 <= minutes < 60):
+        raise ValueError(value)
+    return hours * 60 + minutes
+
+
+def _key_errors(config):
+    """Maps each invalid policy key in config to its problems."""
+    errors = {}
+
+    queue_ids = config.get("allowed_queue_ids") or []
+    if not isinstance(queue_ids, list) or not all(isinstance(q, int) for q in queue_ids):
+        errors.setdefault("allowed_queue_ids", []).append("allowed_queue_ids must be a list of queue IDs.")
+
+    windows = config.get("accept_windows") or []
+    if not isinstance(windows, list):
+        errors.setdefault("accept_windows", []).append("accept_windows must be a list.")
+        windows = []
+    for window in windows:
+        try:
+            parse_clock(window["start"])
+            parse_clock(window["end"])
+        except (KeyError, TypeError, ValueError, AttributeError):
+            errors.setdefault("accept_windows", []).append(
+                f"Invalid accept window {window!r}; use HH:MM start and end times."
+            )
+
+    for key in ("max_pops_per_hour", "max_party_size"):
+        value = config.get(key) or 0
+        if not isinstance(value, int) or value < 0:
+            errors.setdefault(key, []).append(f"{key} must be a whole number (0 for no limit).")
+
+    roles = config.get("allowed_roles") or []
+    if not isinstance(roles, list) or any(role not in ROLES for role in roles):
+        errors.setdefault("allowed_roles", []).append(f"allowed_roles may only contain {', '.join(ROLES)}.")
+
+    return errors
+
+
+def validate(config):
+    """Returns a list of human-readable problems with the policy rules in config."""
+    return [message for messages in _key_errors(config).values() for message in messages]
+
+
+def sanitize(config):
+    """
+    Returns (clean_config, errors): a copy of config without the invalid policy keys,
+    so one bad rule disables only itself.
+    """
+    errors = _key_errors(config)
+    clean = {key: value for key, value in config.items() if key not in errors}
+    return clean, [message for messages in errors.values() for message in messages]
+
+
+def build_minute_table(windows):
+    """One flag per minute of the day: 1 if any window covers it. start == end covers the whole day."""
+    table = bytearray(MINUTES_PER_DAY)
+    for window in windows:
+        start, end = parse_clock(window["start"]), parse_clock(window["end"])
+        minute = start
+        while True:
+            table[minute] = 1
+            minute = (minute + 1) % MINUTES_PER_DAY
+            if minute == end:
+                break
+    return bytes(table)
+
+
+class AcceptPolicy:
+    """
+    Compiled, immutable accept rules. Build with compile_policy().
+    Rolling-hour accounting lives in a deque owned by the caller, so recompiling
+    on a config change doesn't reset it.
+    """
+
+    __slots__ = ("queue_ids", "minute_table", "max_pops_per_hour", "max_party_size", "roles")
+
+    def __init__(self, queue_ids=None, minute_table=None, max_pops_per_hour=0, max_party_size=0, roles=None):
+        self.queue_ids = queue_ids
+        self.minute_table = minute_table
+        self.max_pops_per_hour = max_pops_per_hour
+        self.max_party_size = max_party_size
+        self.roles = roles
+
+    def decide(self, queue_id, lobby_state, recent_accepts, now=None):
+        """
+        Returns (accept, reason) for a pop. lobby_state is LCU's cached state dict;
+        recent_accepts is a deque of accept timestamps (time.time()).
+        """
+        if self.queue_ids is not None and queue_id not in self.queue_ids:
+            return False, "queue"
+
+        now = time.time() if now is None else now
+        if self.minute_table is not None:
+            local = time.localtime(now)
+            if not self.minute_table[local.tm_hour * 60 + local.tm_min]:
+                return False, "schedule"
+
+        if self.max_party_size and (lobby_state.get("party_size") or 1) > self.max_party_size:
+            return False, "party_size"
+
+        position = lobby_state.get("position")
+        # Queues without position select (ARAM, TFT, ...) aren't subject to the role rule
+        if self.roles is not None and position not in UNPICKED_POSITIONS and position not in self.roles:
+            return False, "role"
+
+        if self.max_pops_per_hour:
+            while recent_accepts and now - recent_accepts[0] > 3600:
+                recent_accepts.popleft()
+            if len(recent_accepts) >= self.max_pops_per_hour:
+                return False, "rate"
+
+        return True, "ok"
+
+
+def compile_policy(config):
+    """Compiles the rules in a config dict. Raises PolicyError if any are invalid."""
+    errors = validate(config)
+    if errors:
+        raise PolicyError(errors)
+
+    queue_ids = config.get("allowed_queue_ids") or []
+    windows = config.get("accept_windows") or []
+    roles = config.get("allowed_roles") or []
+    return AcceptPolicy(
+        queue_ids=frozenset(queue_ids) if queue_ids else None,
+        minute_table=build_minute_table(windows) if windows else None,
+        max_pops_per_hour=config.get("max_pops_per_hour") or 0,
+        max_party_size=config.get("max_party_size") or 0,
+        roles=frozenset(roles) if roles else None,
+    )
+
+
+def new_accept_history():
+    """Rolling record of accept timestamps for max_pops_per_hour."""
+    return deque()
@@ -0,0 +1,137 @@
+"""
+Queue catalog: queue ID -> display name for every queue the client knows about.
+
+The list comes from /lol-game-queues/v1/queues, fetched at most once per client
+version and cached in queues.json. Startup and every pop read names from an
+in-memory dict; nothing waits on HTTP. BUILTIN_QUEUES covers the common queues
+until the first fetch and keeps their familiar names afterwards.
+"""
+import json
+
+import config
+
+GAME_VERSION_URI = "/lol-patch/v1/game-version"
+QUEUES_URI = "/lol-game-queues/v1/queues"
+# Bump when the cache layout changes; older files are ignored and refetched
+CACHE_FORMAT = 1
+
+BUILTIN_QUEUES = {
+    1090: "TFT Normal", 1100: "TFT Ranked", 1130: "TFT Hyper Roll",
+    1160: "TFT Double Up", 420: "Ranked Solo/Duo", 440: "Ranked Flex",
+    400: "Draft Pick", 430: "Blind Pick", 450: "ARAM", 1700: "Arena",
+    1220: "Tocker's Trials"
+}
+
+
+def unknown_name(queue_id):
+    return f"Unknown (ID: {queue_id})"
+
+
+def parse_queues(raw):
+    """
+    Turns the client's queue list (JSON bytes) into {id: (name, available)}.
+    Custom-game queues are left out; they never pop a ready check.
+    """
+    queues = {}
+    for queue in json.loads(raw):
+        queue_id = queue.get("id")
+        if not isinstance(queue_id, int) or queue_id < 0 or queue.get("isCustom"):
+            continue
+        name = queue.get("name") or queue.get("description") or queue.get("shortName") or unknown_name(queue_id)
+        queues[queue_id] = (name, queue.get("queueAvailability") == "Available")
+    return queues
+
+
+class QueueCatalog:
+    """
+    ID-to-name index backed by the on-disk cache. Lookups are plain dict reads and
+    refresh() swaps whole dicts, so it can be read from any thread.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.version = None
+        self.names = dict(BUILTIN_QUEUES)
+        # Queues currently selectable in the client; the settings window lists these first
+        self.available = frozenset(BUILTIN_QUEUES)
+        self._refreshing = False
+        if path:
+            self.load()
+
+    def name(self, queue_id):
+        return self.names.get(queue_id) or unknown_name(queue_id)
+
+    def entries(self):
+        """[(queue_id, name, available)] with available queues first, each group sorted by name."""
+        return sorted(
+            ((queue_id, name, queue_id in self.available) for queue_id, name in self.names.items()),
+            key=lambda entry: (not entry[2], entry[1].lower(), entry[0]),
+        )
+
+    def _apply(self, version, queues):
+        names = {queue_id: name for queue_id, (name, _) in queues.items()}
+        # The curated names win for the queues most people pick
+        names.update(BUILTIN_QUEUES)
+        self.names = names
+        self.available = frozenset(
+            queue_id for queue_id, (_, available) in queues.items() if available
+        ) | frozenset(BUILTIN_QUEUES)
+        self.version = version
+
+    def load(self):
+        """Reads the cache file. A missing or unreadable cache leaves the built-in names."""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+            if not isinstance(data, dict) or data.get("format") != CACHE_FORMAT:
+                return False
+            queues = {int(queue_id): (name, bool(available)) for queue_id, name, available in data["queues"]}
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError, TypeError, KeyError) as e:
+            config.console.log(f"[yellow]Ignoring queue cache {self.path}: {e}[/]")
+            return False
+        self._apply(data.get("version"), queues)
+        return True
+
+    def save(self, version, queues):
+        """Writes the compact cache: one [id, name, available] triple per queue."""
+        config.write_json_atomic(self.path, {
+            "format": CACHE_FORMAT,
+            "version": version,
+            "queues": [[queue_id, name, available] for queue_id, (name, available) in sorted(queues.items())],
+        }, indent=None)
+
+    async def refresh(self, connection, loop):
+        """
+        Fetches the queue list if the client's version differs from the cached one.
+        Returns True if the catalog changed. Runs on the LCU loop; parsing and the file
+        write happen in the executor.
+        """
+        if self._refreshing:
+            return False
+        self._refreshing = True
+        try:
+            response = await connection.request('get', GAME_VERSION_URI)
+            if response.status != 200:
+                response.release()
+                return False
+            version = await response.json()
+            if not version or version == self.version:
+                return False
+
+            response = await connection.request('get', QUEUES_URI)
+            if response.status != 200:
+                response.release()
+                return False
+            raw = await response.read()
+            queues = await loop.run_in_executor(None, parse_queues, raw)
+            if not queues:
+                return False
+            self._apply(version, queues)
+            if self.path:
+                await loop.run_in_executor(None, self.save, version, queues)
+            config.console.log(f"[info]Queue list updated for client {version} ({len(queues)} queues).[/]")
+            return True
+        finally:
+            self._refreshing = False
@@ -0,0 +1,213 @@
+import asyncio
+import time
+
+import aiohttp
+
+# --- Ready Check States ---
+IDLE = "Idle"
+POPPED = "Popped"
+ACCEPTING = "Accepting"
+ACCEPTED = "Accepted"
+DECLINED = "Declined"
+EXPIRED = "Expired"
+# Terminal for checks we deliberately let run out (filtered queue or paused)
+SKIPPED = "Skipped"
+
+ACTIVE_STATES = (POPPED, ACCEPTING)
+
+# How long after a check ends a late InProgress update still counts as the old check
+DEDUPE_WINDOW = 1.0
+
+# --- Accept Deadline ---
+# Length of the client's ready-check window; the event's timer counts up towards it
+READY_CHECK_SECONDS = 12.0
+# Stop retrying this long before the window closes; a late POST is wasted work
+DEADLINE_MARGIN = 0.25
+# Pauses between accept attempts after transient errors (last one repeats)
+RETRY_DELAYS = (0.05, 0.1, 0.2, 0.4)
+# How long to wait for the playerResponse event after a successful POST
+VERIFY_TIMEOUT = 1.0
+
+
+class ReadyCheckTracker:
+    """
+    State machine for the client's ready check:
+
+        Idle → Popped → Accepting → Accepted / Declined / Expired
+                  ╰──→ Skipped
+
+    Each check gets an increasing check_id. A check is identified by its timer:
+    the client counts it up from zero, so a timer that goes backwards is a new pop
+    (e.g. a re-pop after someone dodged) even without an intervening end event.
+
+    observe() is synchronous and O(1), so concurrent handler tasks see consistent
+    transitions and redundant UPDATEs never trigger a second lookup or accept.
+    """
+
+    def __init__(self, dedupe_window=DEDUPE_WINDOW):
+        self.dedupe_window = dedupe_window
+        self.state = IDLE
+        self.check_id = 0
+        self.last_timer = None
+        self.ended_at = None
+        self.outcome = None
+        # Set when the current check settles (accepted, declined or ended)
+        self.settled = asyncio.Event()
+
+    def _is_new_check(self, timer):
+        if self.state == IDLE:
+            # A straggling update for the check that just ended isn't a new pop
+            recently_ended = self.ended_at is not None and time.monotonic() - self.ended_at < self.dedupe_window
+            return not (recently_ended and self.last_timer is not None and timer >= self.last_timer)
+        return self.last_timer is not None and timer < self.last_timer
+
+    def observe(self, data):
+        """
+        Feeds one ready-check event into the machine.
+        Returns True exactly once per check: when a new pop needs an accept decision.
+        """
+        timer = data.get('timer') or 0.0
+        response = data.get('playerResponse')
+
+        if data.get('state') != 'InProgress':
+            if self.state != IDLE:
+                if self.state in ACTIVE_STATES and response == 'Accepted':
+                    self.state = ACCEPTED
+                self._end(DECLINED if response == 'Declined' else EXPIRED)
+            return False
+
+        if self._is_new_check(timer):
+            if self.state != IDLE:
+                # Re-pop without an end event; the previous check is over
+                self._end(EXPIRED)
+            self.check_id += 1
+            self.state = POPPED
+            self.outcome = None
+            self.last_timer = timer
+            self.settled.clear()
+            self._apply_response(response)
+            return self.state == POPPED
+
+        self.last_timer = timer
+        if self.state in ACTIVE_STATES:
+            self._apply_response(response)
+        return False
+
+    def _apply_response(self, response):
+        if response == 'Accepted':
+            self.state = ACCEPTED
+            self.settled.set()
+        elif response == 'Declined':
+            self.state = DECLINED
+            self.settled.set()
+
+    def begin_accept(self):
+        """Popped → Accepting, once the policy said yes."""
+        if self.state == POPPED:
+            self.state = ACCEPTING
+
+    def skip(self):
+        """Popped → Skipped, for pops we intentionally leave alone."""
+        if self.state == POPPED:
+            self.state = SKIPPED
+
+    def _end(self, fallback):
+        """Closes the current check and returns to Idle, keeping its final outcome."""
+        self.outcome = self.state if self.state in (ACCEPTED, DECLINED, SKIPPED) else fallback
+        self.state = IDLE
+        self.ended_at = time.monotonic()
+        self.settled.set()
+
+
+class AcceptExecutor:
+    """
+    Accepts the current ready check before its timer runs out.
+
+    The deadline comes from the event's timer. Transient LCU errors (5xx, connection
+    errors, timeouts) are retried with tight backoff until the deadline. A 2xx POST is
+    confirmed by the next playerResponse event; if that never shows up, the POST is
+    re-sent, since accepting twice is harmless and a lagging client may have dropped it.
+    """
+
+    def __init__(self, tracker, window=READY_CHECK_SECONDS, margin=DEADLINE_MARGIN,
+                 retry_delays=RETRY_DELAYS, verify_timeout=VERIFY_TIMEOUT):
+        self.tracker = tracker
+        self.window = window
+        self.margin = margin
+        self.retry_delays = retry_delays
+        self.verify_timeout = verify_timeout
+
+    async def accept(self, connection, timer, trace):
+        """
+        Runs the accept for the current check. Marks accept_sent/accept_acked/accept_verified
+        on the trace and returns a dict with accepted, verified, attempts, last_status,
+        by_player and budget_used (fraction of the ready-check window consumed).
+        """
+        # The pop this accept is for; the tracker may have moved on while the policy ran
+        check_id = trace.info.get("check_id", self.tracker.check_id)
+        received_at = trace.started_ns / 1_000_000_000
+        deadline = received_at + (self.window - (timer or 0.0)) - self.margin
+        result = {"accepted": False, "verified": False, "attempts": 0, "last_status": None, "by_player": False}
+
+        if self.tracker.check_id == check_id and ACCEPTED in (self.tracker.state, self.tracker.outcome):
+            # The player accepted in the client while the lookup or policy check ran; nothing left to send
+            result.update(accepted=True, verified=True, by_player=True)
+
+        while not result["by_player"] and time.perf_counter() < deadline:
+            if self.tracker.check_id != check_id or self.tracker.state != ACCEPTING:
+                break
+
+            result["attempts"] += 1
+            if result["attempts"] == 1:
+                trace.mark("accept_sent")
+            try:
+                response = await asyncio.wait_for(
+                    connection.request('post', '/lol-matchmaking/v1/ready-check/accept'),
+                    max(deadline - time.perf_counter(), 0.01),
+                )
+                result["last_status"] = response.status
+                response.release()
+                timing = getattr(response, "timing", None)
+                if timing is not None and "accept_server_ms" not in trace.info:
+                    # Connection setup vs the client's own processing, for the first answered POST
+                    trace.info.update(accept_reused=timing.reused, accept_connect_ms=timing.connect_ms,
+                                      accept_server_ms=timing.server_ms)
+            except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
+                result["last_status"] = type(e).__name__
+                await self._backoff(result["attempts"], deadline)
+                continue
+
+            if 200 <= response.status < 300:
+                result["accepted"] = True
+                if "accept_acked" not in trace.spans:
+                    trace.mark("accept_acked")
+                if await self._verify(check_id, deadline):
+                    result["verified"] = True
+                    trace.mark("accept_verified")
+                    break
+                # No confirmation: the check either ended or the client sat on it; re-send
+                continue
+            if response.status >= 500:
+                await self._backoff(result["attempts"], deadline)
+                continue
+            # 4xx: there is no ready check to accept anymore
+            break
+
+        elapsed = time.perf_counter() - received_at
+        result["budget_used"] = min(((timer or 0.0) + elapsed) / self.window, 1.0)
+        return result
+
+    async def _verify(self, check_id, deadline):
+        """Waits for the playerResponse event. True once the check is confirmed accepted."""
+        timeout = min(self.verify_timeout, max(deadline - time.perf_counter(), 0.0))
+        try:
+            await asyncio.wait_for(self.tracker.settled.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        if self.tracker.check_id != check_id:
+            return False
+        return self.tracker.state == ACCEPTED or self.tracker.outcome == ACCEPTED
+
+    async def _backoff(self, attempt, deadline):
+        delay = self.retry_delays[min(attempt - 1, len(self.retry_delays) - 1)]
+        await asyncio.sleep(max(min(delay, deadline - time.perf_counter()), 0.0))
@@ -0,0 +1,252 @@
+"""
+Keep-alive REST session for one League client's local API.
+
+lcu_driver's session lets idle connections go after aiohttp's default 15 seconds,
+so the accept POST after a long queue paid for a fresh TCP connect and TLS
+handshake. LCURestSession keeps its connections for the life of the client,
+builds the auth header and SSL context once, and is warmed up on connect and when
+matchmaking starts. An accept is then one request on an open TLS connection.
+
+Every request is timed with aiohttp's tracing hooks: time spent opening a connection
+(zero when a pooled one was reused) versus time the client took to answer.
+"""
+import asyncio
+import base64
+import ssl
+import time
+from collections import Counter, deque
+
+import aiohttp
+
+from metrics import percentile
+
+# The client serves a self-signed certificate on 127.0.0.1; the lockfile password is the auth
+SSL_CONTEXT = ssl.create_default_context()
+SSL_CONTEXT.check_hostname = False
+SSL_CONTEXT.verify_mode = ssl.CERT_NONE
+
+# Idle connections are kept this long (the client stays on one port until it exits)
+KEEPALIVE_TIMEOUT = 3600
+# Concurrent requests to one client; the accept never waits behind the startup lookups
+POOL_SIZE = 4
+# Cheap, always-available endpoint used to open and refresh the pooled connection
+WARM_UP_URI = "/riotclient/region-locale"
+# While queueing, a pooled connection idle this long is refreshed before a pop needs it
+KEEP_WARM_INTERVAL = 30.0
+# How often to retry while the client's API is still starting up
+API_READY_INTERVAL = 0.1
+TIMINGS_KEPT = 100
+
+
+class RequestTiming:
+    """Timing of one request, in milliseconds from when it was issued."""
+
+    __slots__ = ("method", "uri", "status", "started", "connect_ms", "queued_ms", "sent_ms", "total_ms")
+
+    def __init__(self, method, uri):
+        self.method = method.upper()
+        self.uri = uri
+        self.status = None
+        self.started = time.perf_counter()
+        # None when a pooled connection was reused
+        self.connect_ms = None
+        # Waiting for a free connection when the pool was busy
+        self.queued_ms = 0.0
+        self.sent_ms = None
+        self.total_ms = None
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+    @property
+    def reused(self):
+        return self.connect_ms is None
+
+    @property
+    def server_ms(self):
+        """Headers sent to response headers back: the client's own processing plus loopback."""
+        if self.total_ms is None or self.sent_ms is None:
+            return None
+        return self.total_ms - self.sent_ms
+
+    def to_dict(self):
+        return {
+            "method": self.method, "uri": self.uri, "status": self.status, "reused": self.reused,
+            "connect_ms": self.connect_ms, "queued_ms": self.queued_ms,
+            "server_ms": self.server_ms, "total_ms": self.total_ms,
+        }
+
+
+# --- aiohttp trace hooks; trace_request_ctx is the request's RequestTiming ---
+
+async def _on_connection_create_start(session, context, params):
+    context.connect_started = time.perf_counter()
+
+
+async def _on_connection_create_end(session, context, params):
+    timing = context.trace_request_ctx
+    if timing is not None:
+        timing.connect_ms = (time.perf_counter() - context.connect_started) * 1000
+
+
+async def _on_connection_queued_start(session, context, params):
+    context.queued_started = time.perf_counter()
+
+
+async def _on_connection_queued_end(session, context, params):
+    timing = context.trace_request_ctx
+    if timing is not None:
+        timing.queued_ms = (time.perf_counter() - context.queued_started) * 1000
+
+
+async def _on_request_headers_sent(session, context, params):
+    timing = context.trace_request_ctx
+    if timing is not None:
+        timing.sent_ms = timing.elapsed_ms()
+
+
+def _trace_config():
+    trace = aiohttp.TraceConfig()
+    trace.on_connection_create_start.append(_on_connection_create_start)
+    trace.on_connection_create_end.append(_on_connection_create_end)
+    trace.on_connection_queued_start.append(_on_connection_queued_start)
+    trace.on_connection_queued_end.append(_on_connection_queued_end)
+    trace.on_request_headers_sent.append(_on_request_headers_sent)
+    return trace
+
+
+class LCURestSession:
+    """
+    Pooled HTTPS session to one client's API. Create and use it on the loop that runs
+    the client's connection. request() returns the aiohttp response, like
+    lcu_driver's Connection.request, with its RequestTiming attached as .timing.
+    """
+
+    def __init__(self, port, auth_key, pool_size=POOL_SIZE, keepalive_timeout=KEEPALIVE_TIMEOUT):
+        self.base_url = f"https://127.0.0.1:{port}"
+        self.headers = {
+            "Authorization": "Basic " + base64.b64encode(f"riot:{auth_key}".encode()).decode(),
+            "Accept": "application/json",
+            "Content-Type": "application/json",
+        }
+        self.pool_size = pool_size
+        self.keepalive_timeout = keepalive_timeout
+        self.session = None
+        self.closed = False
+        self.last_used = None
+        self.requests = 0
+        self.connections_opened = 0
+        self.connect_ms_total = 0.0
+        self.by_uri = Counter()
+        self.timings = deque(maxlen=TIMINGS_KEPT)
+
+    @property
+    def is_open(self):
+        return self.session is not None and not self.session.closed
+
+    def start(self):
+        if self.is_open:
+            return
+        if self.closed:
+            raise aiohttp.ClientConnectionError("LCU session is closed")
+        connector = aiohttp.TCPConnector(
+            ssl=SSL_CONTEXT,
+            limit=self.pool_size,
+            keepalive_timeout=self.keepalive_timeout,
+        )
+        self.session = aiohttp.ClientSession(
+            self.base_url,
+            connector=connector,
+            headers=self.headers,
+            trace_configs=[_trace_config()],
+            # Accept and lookups apply their own deadlines
+            timeout=aiohttp.ClientTimeout(total=None),
+        )
+
+    async def request(self, method, uri, **kwargs):
+        """Sends a request; `data` is JSON-encoded. The caller reads or releases the response."""
+        self.start()
+        if "data" in kwargs:
+            kwargs["json"] = kwargs.pop("data")
+        timing = RequestTiming(method, uri)
+        try:
+            response = await self.session.request(method, uri, trace_request_ctx=timing, **kwargs)
+        finally:
+            timing.total_ms = timing.elapsed_ms()
+            self._record(timing)
+        timing.status = response.status
+        response.timing = timing
+        return response
+
+    def _record(self, timing):
+        self.last_used = time.monotonic()
+        self.requests += 1
+        self.by_uri[(timing.method, timing.uri)] += 1
+        if not timing.reused:
+            self.connections_opened += 1
+            self.connect_ms_total += timing.connect_ms
+        self.timings.append(timing)
+
+    async def warm_up(self):
+        """Opens a pooled connection (or refreshes the idle one). Returns True once the API answered."""
+        try:
+            response = await self.request("get", WARM_UP_URI)
+            await response.read()
+            return True
+        except (aiohttp.ClientError, OSError):
+            return False
+
+    async def wait_until_ready(self, interval=API_READY_INTERVAL):
+        """Polls until the client's API accepts requests, leaving the connection in the pool."""
+        while not self.closed and not await self.warm_up():
+            await asyncio.sleep(interval)
+
+    async def keep_warm(self, interval=KEEP_WARM_INTERVAL):
+        """
+        Refreshes the pooled connection whenever it has sat idle for `interval`, so the
+        client never closes it under us mid-queue. Runs until cancelled or closed.
+        """
+        while not self.closed:
+            idle = time.monotonic() - self.last_used if self.last_used is not None else interval
+            if idle >= interval:
+                await self.warm_up()
+                idle = 0.0
+            await asyncio.sleep(interval - idle)
+
+    def stats(self):
+        """Totals plus p50/p95 connect and server times for recent requests to each endpoint."""
+        endpoints = {}
+        for timing in self.timings:
+            endpoints.setdefault(f"{timing.method} {timing.uri}", []).append(timing)
+        result = {
+            "requests": self.requests,
+            "connections_opened": self.connections_opened,
+            "avg_connect_ms": self.connect_ms_total / self.connections_opened if self.connections_opened else None,
+            "endpoints": {},
+        }
+        for name, timings in endpoints.items():
+            server = sorted(t.server_ms for t in timings if t.server_ms is not None)
+            total = sorted(t.total_ms for t in timings)
+            result["endpoints"][name] = {
+                "count": len(timings),
+                "reused": sum(1 for t in timings if t.reused),
+                "server_p50_ms": percentile(server, 50),
+                "total_p50_ms": percentile(total, 50),
+                "total_p95_ms": percentile(total, 95),
+            }
+        return result
+
+    def format_stats(self):
+        """One line for the console, e.g. when the client disconnects."""
+        if not self.requests:
+            return "REST: no requests"
+        line = f"REST: {self.requests} request(s) over {self.connections_opened} connection(s)"
+        if self.connections_opened:
+            line += f" (avg setup {self.connect_ms_total / self.connections_opened:.1f}ms)"
+        return line
+
+    async def close(self):
+        self.closed = True
+        if self.is_open:
+            await self.session.close()
+        self.session = None
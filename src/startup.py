@@ -0,0 +1,55 @@
+import importlib
+import json
+import threading
+import time
+
+
+class StartupProfiler:
+    """
+    Records how long each startup phase and heavy import takes, relative to process start.
+    Thread-safe, so the LCU thread and the tray thread can both report into it.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.phases = []
+        self.imports = []
+        self._lock = threading.Lock()
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.started) * 1000
+
+    def mark(self, phase):
+        """Records that a phase finished now."""
+        with self._lock:
+            self.phases.append((phase, self.elapsed_ms(), threading.current_thread().name))
+
+    def import_module(self, name):
+        """Imports a module and records how long it took (0 if it was already loaded)."""
+        started = time.perf_counter()
+        module = importlib.import_module(name)
+        with self._lock:
+            self.imports.append((name, (time.perf_counter() - started) * 1000, threading.current_thread().name))
+        return module
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "phases_ms": [{"phase": p, "at_ms": round(t, 2), "thread": th} for p, t, th in self.phases],
+                "imports_ms": [{"module": m, "took_ms": round(t, 2), "thread": th} for m, t, th in self.imports],
+            }
+
+    def report(self, console):
+        """Prints the per-phase and per-import timings."""
+        data = self.to_dict()
+        console.print("[highlight]Startup profile[/]")
+        for phase in data["phases_ms"]:
+            console.print(f"  {phase['at_ms']:>8.1f} ms  {phase['phase']} [dim]({phase['thread']})[/]")
+        console.print("[highlight]Imports[/]")
+        for entry in data["imports_ms"]:
+            console.print(f"  {entry['took_ms']:>8.1f} ms  {entry['module']} [dim]({entry['thread']})[/]")
+
+    def dump_json(self, path):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        return path
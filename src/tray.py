@@ -4,6 +4,12 @@ from pystray import Icon, Menu, MenuItem as item
 from PIL import Image
 
 import config
+from commands import ApplyConfig, ExportLatency, SessionStats, StatusQuery, TogglePause, WatchClients
+
+# The menu waits at most this long for a live status before showing the last one
+STATUS_TIMEOUT = 0.5
+# Reading the journal waits for its writer to flush first
+SESSION_STATS_TIMEOUT = 5.0
 
 def resource_path(relative_path):
     """ Get absolute path to resource, works for dev and for PyInstaller """
@@ -16,20 +22,85 @@ def resource_path(relative_path):
     return os.path.join(base_path, relative_path)
 
 class TrayIcon:
+    """
+    The tray runs on its own thread, so it never touches LCU state directly: actions
+    are commands on lcu_connector.commands, and the menu is built from status dicts.
+    """
+
     def __init__(self, lcu_connector, toggle_console_callback=None, is_visible_callback=None):
         self.lcu_connector = lcu_connector
         self.toggle_console_callback = toggle_console_callback
         self.is_visible_callback = is_visible_callback
         self.icon = None
+        # Rebuild the client section whenever a client connects, disconnects or is renamed.
+        # The LCU loop is already running, so the listener is handed over as a command.
+        self.lcu_connector.commands.submit(WatchClients(self.refresh_menu))
 
     def _create_menu(self):
-        """Creates the menu items for the tray icon."""
+        """Creates the tray menu. Its items are regenerated each time it is refreshed."""
+        return Menu(self._menu_items)
+
+    def _status(self):
+        """
+        The LCU's current status. The menu is also rebuilt on the LCU thread (via
+        on_clients_changed), where waiting isn't allowed, so fall back to its last snapshot.
+        """
+        try:
+            return self.lcu_connector.commands.call(StatusQuery(), timeout=STATUS_TIMEOUT)
+        except Exception:
+            return self.lcu_connector.status_snapshot
+
+    def _status_text(self, status):
+        clients = status["clients"]
+        connected = sum(1 for client in clients if client["connected"])
+        if not clients:
+            return "Status: Searching for League Client"
+        return f"Status: {connected} of {len(clients)} client(s) connected"
+
+    def _client_items(self, status):
+        """One submenu per League client, with its state and its own Pause/Resume."""
+        items = []
+        for client in status["clients"]:
+            queue = client["queue_name"] or "No queue selected"
+            items.append(item(f"{client['tag']}: {client['status']}", Menu(
+                item(queue, None, enabled=False),
+                item("Resume" if client["paused"] else "Pause", self._client_pause_action(client)),
+            )))
+        return items
+
+    def _client_pause_action(self, client):
+        def toggle(icon, menu_item):
+            try:
+                paused = self.lcu_connector.commands.call(TogglePause(client=client["key"]))
+            except Exception as e:
+                icon.notify(f"{client['tag']}: could not change monitoring: {e}")
+                return
+            icon.notify(f"{client['tag']}: monitoring has been {'Paused' if paused else 'Resumed'}.")
+        return toggle
+
+    def refresh_menu(self):
+        if self.icon:
+            self.icon.update_menu()
+
+    def _menu_items(self):
+        # One status per build: a single wait on the loop, and every item shows the same moment
+        status = self._status()
         menu_items = [
-            item('Status: Running', None, enabled=False),
+            item(self._status_text(status), None, enabled=False),
+            item(status["latency"], None, enabled=False),
+        ]
+        client_items = self._client_items(status)
+        if client_items:
+            menu_items.append(Menu.SEPARATOR)
+            menu_items.extend(client_items)
+        menu_items += [
             Menu.SEPARATOR,
             item('Settings', self.open_settings),
-            item('Pause/Resume', self.toggle_pause)
+            item('Pause/Resume', self.toggle_pause),
+            item('Export Latency Report', self.export_latency)
         ]
+        if self.lcu_connector.journal:
+            menu_items.append(item('Session Stats', self.show_session_stats))
         
         if self.toggle_console_callback:
             if self.is_visible_callback:
@@ -41,25 +112,26 @@ class TrayIcon:
             
         menu_items.append(item('Exit', self.exit_app))
         
-        return Menu(*menu_items)
+        return menu_items
 
     def open_settings(self, icon, menu_item):
         """Opens the configuration GUI."""
         # Note: This will block the tray icon's thread while the window is open.
         # Since we are using pystray, this is the main thread unless run in detached mode.
         # But LCU logic is in a background thread, so it keeps working!
-        # We just need to reload config after it closes.
+        # Saved settings are handed to the LCU loop as a command; reading the snapshot is safe here.
         def apply_config(new_config):
-            self.lcu_connector.config = new_config
+            self.lcu_connector.commands.submit(ApplyConfig(new_config))
 
         new_config = config.open_settings_ui(
-            self.lcu_connector.config,
-            on_save_callback=apply_config
+            self.lcu_connector.config.to_dict(),
+            on_save_callback=apply_config,
+            catalog=self.lcu_connector.queues
         )
         
         # Update LCU connector with new config
         if new_config:
-            self.lcu_connector.config = new_config
+            self.lcu_connector.commands.submit(ApplyConfig(new_config))
             # Optional: Notify user
             icon.notify("Configuration updated successfully.")
 
@@ -71,21 +143,43 @@ class TrayIcon:
             self.icon.menu = self._create_menu()
 
     def toggle_pause(self, icon, menu_item):
-        """Toggles the paused state of the LCU connector."""
-        self.lcu_connector.paused = not self.lcu_connector.paused
+        """Toggles the paused state of every client at once."""
+        try:
+            paused = self.lcu_connector.commands.call(TogglePause())
+        except Exception as e:
+            icon.notify(f"Could not change monitoring: {e}")
+            return
         # This is a simple way to show state, though pystray doesn't easily support dynamic menu item text.
         # A better UX would be to change the icon, or have separate Pause and Resume items.
         # For now, a notification is clear.
-        status = "Paused" if self.lcu_connector.paused else "Resumed"
+        status = "Paused" if paused else "Resumed"
         icon.notify(f"Monitoring has been {status}.")
 
+    def export_latency(self, icon, menu_item):
+        """Dumps the recorded pop timings next to config.json."""
+        path = os.path.join(config.BASE_DIR, "latency.json")
+        try:
+            self.lcu_connector.commands.call(ExportLatency(path))
+            icon.notify(f"Latency report saved to {path}")
+        except Exception as e:
+            icon.notify(f"Failed to save latency report: {e}")
+
+    def show_session_stats(self, icon, menu_item):
+        """Shows this session's pops from the journal as a toast and in the console."""
+        try:
+            lines = self.lcu_connector.commands.call(SessionStats(), timeout=SESSION_STATS_TIMEOUT)
+        except Exception as e:
+            icon.notify(f"Failed to read session stats: {e}")
+            return
+        icon.notify("\n".join(lines))
+        config.print_panel("\n".join(lines), title="Session Stats", border_style="cyan")
+
     def exit_app(self, icon, menu_item):
-        """Stops the LCU connector and the tray icon."""
-        self.lcu_connector.stop()
+        """Stops the tray icon; main() then shuts the LCU down once run() returns."""
         icon.stop()
 
-    def run(self):
-        """Creates and runs the system tray icon."""
+    def run(self, on_visible=None):
+        """Creates and runs the system tray icon. on_visible is called once the icon is shown."""
         icon_path = resource_path("assets/gnome-thresh.ico")
         image = Image.open(icon_path)
         self.icon = Icon(
@@ -94,4 +188,9 @@ class TrayIcon:
             title="queueBot",
             menu=self._create_menu()
         )
-        self.icon.run()
+        def setup(icon):
+            icon.visible = True
+            if on_visible:
+                on_visible()
+
+        self.icon.run(setup=setup)
@@ -0,0 +1,248 @@
+"""
+End-to-end accept-latency benchmark.
+
+Drives a real LCU instance against FakeLeagueClient (and FakeWebhook) on the same
+event loop, fires scripted ready checks and measures pop-to-accept latency
+(websocket frame sent -> accept POST received) plus websocket event throughput.
+
+Usage:
+    python tests/bench_accept.py [--pops 50] [--output bench.json] [--max-p95-ms 50] [--journal pops.db]
+
+Exits non-zero if any scenario misses an accept or exceeds --max-p95-ms.
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import platform
+import sys
+import time
+
+import aiohttp
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "src"))
+sys.path.insert(0, HERE)
+
+
+import config
+from _version import __version__
+from lcu import LCU
+from metrics import percentile
+from fake_lcu import FakeLeagueClient, FakeWebhook
+
+# name -> scenario settings
+SCENARIOS = {
+    "cold_cache": {"warm_cache": False},
+    "warm_cache": {"warm_cache": True},
+    "lagging_client": {"warm_cache": False, "lobby_delay": 0.25},
+    "slow_webhook": {"warm_cache": True, "webhook_delay": 2.0},
+    "throttled_webhook": {"warm_cache": True, "rate_limit": 3},
+    # Client ignores per-topic subscriptions, so unwanted frames must be skipped locally
+    "firehose_client": {"warm_cache": True, "ignore_topics": True},
+    # Each pop arrives as a burst of identical UPDATEs; exactly one accept POST is expected
+    "update_burst": {"warm_cache": False, "duplicates": 5},
+    # The client fails the first two accept POSTs of every pop; the executor must retry
+    "flaky_accept": {"warm_cache": True, "accept_failures": 2},
+    # Three clients on one LCU loop, all popping at once; each must be accepted independently
+    "multi_client": {"warm_cache": True, "clients": 3},
+}
+
+
+def lockfile_connection_string(lockfile_path):
+    """Converts a client lockfile into the 'pid:pid:port:password' string lcu_driver accepts."""
+    with open(lockfile_path) as f:
+        _, pid, port, password, _ = f.read().strip().split(":")
+    return f"{pid}:{pid}:{port}:{password}"
+
+
+def summarize(values_ms):
+    values = sorted(values_ms)
+    if not values:
+        return {"count": 0}
+    return {
+        "count": len(values),
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "max": values[-1],
+    }
+
+
+async def wait_until(predicate, timeout=10.0, interval=0.01):
+    deadline = time.perf_counter() + timeout
+    while not predicate():
+        if time.perf_counter() > deadline:
+            raise TimeoutError("condition not met in time")
+        await asyncio.sleep(interval)
+
+
+async def scrape_metrics(port, interval=0.01):
+    """Scrapes /metrics in a loop, as an aggressive Prometheus would. Returns the last body via the task."""
+    body = ""
+    async with aiohttp.ClientSession() as session:
+        try:
+            while True:
+                async with session.get(f"http://127.0.0.1:{port}/metrics") as response:
+                    body = await response.text()
+                await asyncio.sleep(interval)
+        except asyncio.CancelledError:
+            return body
+
+
+async def run_scenario(lcu, pops, flood, warm_cache=False, lobby_delay=0.0, webhook_delay=0.0,
+                       rate_limit=0, ignore_topics=False, duplicates=0, accept_failures=0, clients=1):
+    fakes = [
+        await FakeLeagueClient(lobby_delay=lobby_delay, ignore_topics=ignore_topics,
+                               accept_failures=accept_failures).start()
+        for _ in range(clients)
+    ]
+    webhook = await FakeWebhook(delay=webhook_delay, rate_limit_next=rate_limit, retry_after=0.2).start()
+    lcu.config = {
+        "webhook_url": webhook.url,
+        "user_id": "",
+        # Desktop toasts need a real session; the benchmark measures the accept path only
+        "desktop_notifications": False,
+        "allowed_queue_ids": [],
+    }
+
+    scraper = None
+    if lcu.exporter:
+        await lcu.start_exporter()
+        scraper = asyncio.ensure_future(scrape_metrics(lcu.exporter.port))
+
+    monitors = [lcu.attach(lockfile_connection_string(fake.lockfile_path)) for fake in fakes]
+    await wait_until(lambda: all(any(fake.sockets.values()) for fake in fakes))
+
+    if warm_cache:
+        for fake in fakes:
+            await fake.set_phase("Matchmaking")
+            await fake.set_lobby(fake.queue_id)
+        await wait_until(lambda: all(monitor.state["queue_id"] is not None for monitor in monitors))
+
+    latencies = []
+    missed = 0
+    for _ in range(pops):
+        # Every client pops at once, as when several accounts queue together
+        popped = [await fake.pop(duplicates=duplicates) for fake in fakes]
+        for sent_at, accepted in popped:
+            try:
+                accepted_at = await asyncio.wait_for(accepted, timeout=5.0)
+                latencies.append((accepted_at - sent_at) * 1000)
+            except asyncio.TimeoutError:
+                missed += 1
+        for fake in fakes:
+            await fake.end_ready_check()
+        await asyncio.sleep(0.01)
+
+    events_per_sec = None
+    if flood:
+        client = fakes[0]
+        started = time.perf_counter()
+        await client.flood(flood)
+        _, accepted = await client.pop()
+        await asyncio.wait_for(accepted, timeout=30.0)
+        events_per_sec = (flood + 1) / (time.perf_counter() - started)
+        await client.end_ready_check()
+
+    # Give in-flight retries a moment; a slow webhook is expected to leave a backlog behind
+    await asyncio.sleep(webhook_delay + 0.5)
+    notifications = {name: dict(stats) for name, stats in lcu.dispatcher.stats.items()}
+
+    lobby_gets = sum(
+        1 for fake in fakes for method, path, _ in fake.requests if method == "GET" and path.endswith("/lobby")
+    )
+    subscriptions = [monitor.connector.subscriptions for monitor in monitors]
+    # Read before shutdown closes the connections
+    rest = [monitor.connector.connection.rest.stats() for monitor in monitors if monitor.connector.connection]
+    metrics_body = None
+    if scraper:
+        scraper.cancel()
+        metrics_body = await scraper
+        scrapes = lcu.exporter.scrapes
+    await lcu.shutdown()
+    for fake in fakes:
+        await fake.stop()
+    await webhook.stop()
+    await asyncio.wait_for(asyncio.gather(*(monitor.task for monitor in monitors)), timeout=5.0)
+
+    result = {
+        "clients": clients,
+        "pop_to_accept_ms": summarize(latencies),
+        "missed_accepts": missed,
+        "accept_posts": sum(len(fake.accepts) for fake in fakes),
+        "accept_connections": sum(len(fake.accept_connections) for fake in fakes),
+        "rest": rest,
+        "events_per_sec": events_per_sec,
+        "lobby_gets": lobby_gets,
+        "webhook_received": len(webhook.received),
+        "webhook_rate_limited": webhook.rate_limited,
+        "notifications": notifications,
+        "handler_spans_ms": lcu.latency.summary(),
+        "ws_frames_decoded": sum(sub.decoded for sub in subscriptions),
+        "ws_frames_skipped": sum(sub.skipped for sub in subscriptions),
+        "ws_decode_ms_saved": sum(sub.estimated_seconds_saved() for sub in subscriptions) * 1000,
+    }
+    if metrics_body is not None:
+        result["metrics_scrapes"] = scrapes
+        result["metrics_accepts"] = sum(
+            float(line.rsplit(" ", 1)[1]) for line in metrics_body.splitlines()
+            if line.startswith("queuebot_accepts_total")
+        )
+    if lcu.journal:
+        # shutdown() committed every queued row, so this reads back the whole scenario
+        result["journal"] = lcu.journal.session_stats()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="queueBot end-to-end accept benchmark")
+    parser.add_argument("--pops", type=int, default=50, help="Ready checks per scenario")
+    parser.add_argument("--flood", type=int, default=2000, help="Unrelated events sent before the throughput pop")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="Run only these scenarios")
+    parser.add_argument("--output", help="Write JSON results to this file instead of stdout")
+    parser.add_argument("--max-p95-ms", type=float, help="Fail if any scenario's p95 accept latency exceeds this")
+    parser.add_argument("--verbose", action="store_true", help="Show queueBot's console output")
+    parser.add_argument("--journal", metavar="PATH", help="Also record every pop to this SQLite journal")
+    parser.add_argument("--metrics-port", type=int, metavar="PORT",
+                        help="Serve /metrics on this port and scrape it every 10ms during each scenario")
+    args = parser.parse_args()
+
+    if args.verbose:
+        config.init_console()
+    else:
+        config.init_console(file=io.StringIO())
+
+    results = {
+        "version": __version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "pops": args.pops,
+        "scenarios": {},
+    }
+    failed = False
+    for name in args.scenario or SCENARIOS:
+        lcu = LCU(config={}, journal_path=args.journal, metrics_port=args.metrics_port)
+        result = lcu.loop.run_until_complete(run_scenario(lcu, args.pops, args.flood, **SCENARIOS[name]))
+        lcu.loop.close()
+        results["scenarios"][name] = result
+
+        p95 = result["pop_to_accept_ms"].get("p95")
+        expected_posts = args.pops * result["clients"] + (1 if args.flood else 0)
+        if result["missed_accepts"] or result["accept_posts"] != expected_posts or (args.max_p95_ms is not None and p95 is not None and p95 > args.max_p95_ms):
+            failed = True
+        print(f"{name}: p95={p95 if p95 is None else round(p95, 2)}ms "
+              f"missed={result['missed_accepts']} accept_connections={result['accept_connections']}", file=sys.stderr)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Client discovery benchmark.
+
+Runs the real ClientDiscovery against FakeLeagueClient and measures:
+  * time-to-connect: lockfile written -> client API connected, for the first start
+    and for restarts after short and long idle gaps (restarts and patches)
+  * the same via the process-scan fallback, using a decoy LeagueClientUx process
+  * idle cost: discovery wakeups per minute and CPU time while no client runs
+
+Usage:
+    python tests/bench_discovery.py [--restarts 5] [--idle 60] [--output discovery.json]
+
+Exits non-zero if a client is never connected.
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "src"))
+sys.path.insert(0, HERE)
+
+import config
+from _version import __version__
+from discovery import SCAN_INTERVAL_MAX
+from lcu import LCU
+from metrics import percentile
+from fake_lcu import FakeLeagueClient
+
+# Pauses between a client exiting and starting again; the long one lets discovery back off fully
+RESTART_GAPS = (0.0, 1.0, 10.0)
+
+
+def summarize(values_ms):
+    values = sorted(values_ms)
+    if not values:
+        return {"count": 0}
+    return {"count": len(values), "p50": percentile(values, 50), "max": values[-1]}
+
+
+async def wait_until(predicate, timeout):
+    deadline = time.perf_counter() + timeout
+    while not predicate():
+        if time.perf_counter() > deadline:
+            return False
+        await asyncio.sleep(0.005)
+    return True
+
+
+async def start_and_connect(lcu, workdir, timeout, decoy=False):
+    """
+    Starts a fake client and returns ms from its lockfile being written until queueBot is
+    ready for a pop (its websocket subscribed), or None if that never happens.
+    """
+    client = await FakeLeagueClient(workdir=workdir).start()
+    written = time.perf_counter()
+    process = client.spawn_ux_process() if decoy else None
+    ok = await wait_until(lambda: any(client.sockets.values()), timeout)
+    elapsed = (time.perf_counter() - written) * 1000 if ok else None
+    await client.stop()
+    if process:
+        process.terminate()
+        process.wait()
+    await wait_until(lambda: not lcu.clients, timeout)
+    return elapsed
+
+
+async def measure_idle(lcu, seconds):
+    """Wakeups and process CPU while discovery polls for a client that never comes."""
+    discovery = lcu.discovery
+    # Let the intervals back off first, as they would on a machine left idle
+    await asyncio.sleep(min(seconds, 30.0))
+    wakeups, scans, cpu = discovery.wakeups, discovery.scans, time.process_time()
+    await asyncio.sleep(seconds)
+    per_minute = 60.0 / seconds
+    return {
+        "seconds": seconds,
+        "wakeups_per_min": (discovery.wakeups - wakeups) * per_minute,
+        "process_scans_per_min": (discovery.scans - scans) * per_minute,
+        "cpu_ms_per_min": (time.process_time() - cpu) * 1000 * per_minute,
+        # What one scan of this machine's process list costs; the old loop ran 120 a minute
+        "cpu_ms_per_scan": discovery.scan_cpu_seconds * 1000 / max(discovery.scans, 1),
+    }
+
+
+async def run(lcu, workdir, restarts, idle, timeout):
+    task = asyncio.ensure_future(lcu.discovery.run())
+    result = {}
+    try:
+        result["idle"] = await measure_idle(lcu, idle)
+        result["first_connect_ms"] = await start_and_connect(lcu, workdir, timeout)
+        restart_ms = {}
+        for gap in RESTART_GAPS:
+            times = []
+            for _ in range(restarts):
+                await asyncio.sleep(gap)
+                times.append(await start_and_connect(lcu, workdir, timeout))
+            restart_ms[f"after_{gap:g}s"] = times
+        result["restart_connect_ms"] = {
+            gap: summarize([t for t in times if t is not None]) for gap, times in restart_ms.items()
+        }
+        result["missed"] = sum(t is None for times in restart_ms.values() for t in times)
+        result["missed"] += result["first_connect_ms"] is None
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+    result["connects"] = list(lcu.discovery.connects)
+    return result
+
+
+async def run_scan(lcu, workdir, timeout):
+    """A client in an install dir discovery doesn't know yet: found by the process scan, then remembered."""
+    task = asyncio.ensure_future(lcu.discovery.run())
+    try:
+        # Start from a fully backed-off scan interval, the worst case
+        await asyncio.sleep(1.0)
+        lcu.discovery.scan_interval = SCAN_INTERVAL_MAX
+        lcu.discovery._next_scan = time.monotonic() + SCAN_INTERVAL_MAX
+        scan_ms = await start_and_connect(lcu, workdir, timeout + SCAN_INTERVAL_MAX, decoy=True)
+        learned = os.path.normpath(workdir) in lcu.discovery.lockfiles
+        lockfile_ms = await start_and_connect(lcu, workdir, timeout)
+    finally:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+    return {"scan_connect_ms": scan_ms, "install_dir_learned": learned, "then_lockfile_connect_ms": lockfile_ms}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="queueBot client discovery benchmark")
+    parser.add_argument("--restarts", type=int, default=5, help="Client restarts per idle gap")
+    parser.add_argument("--idle", type=float, default=60.0, help="Seconds to measure idle wakeups and CPU")
+    parser.add_argument("--timeout", type=float, default=10.0, help="Seconds to wait for each connect")
+    parser.add_argument("--output", help="Write JSON results to this file instead of stdout")
+    parser.add_argument("--verbose", action="store_true", help="Show queueBot's console output")
+    args = parser.parse_args()
+
+    config.init_console(file=None if args.verbose else io.StringIO())
+    results = {
+        "version": __version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+    }
+
+    with tempfile.TemporaryDirectory(prefix="queuebot-discovery-") as workdir:
+        lcu = LCU(config={}, discovery_state_path=os.path.join(workdir, "clients.json"))
+        lcu.discovery.add_install_dir(workdir, save=False)
+        results["lockfile"] = lcu.loop.run_until_complete(run(lcu, workdir, args.restarts, args.idle, args.timeout))
+        lcu.loop.run_until_complete(lcu.shutdown())
+        lcu.loop.close()
+
+        scan_dir = os.path.join(workdir, "elsewhere")
+        os.mkdir(scan_dir)
+        lcu = LCU(config={}, discovery_state_path=os.path.join(workdir, "clients.json"))
+        results["process_scan"] = lcu.loop.run_until_complete(run_scan(lcu, scan_dir, args.timeout))
+        lcu.loop.run_until_complete(lcu.shutdown())
+        lcu.loop.close()
+
+    idle = results["lockfile"]["idle"]
+    print(f"idle: {idle['wakeups_per_min']:.0f} wakeups/min, {idle['process_scans_per_min']:.1f} scans/min, "
+          f"{idle['cpu_ms_per_min']:.1f}ms CPU/min ({idle['cpu_ms_per_scan']:.1f}ms per scan)", file=sys.stderr)
+    print(f"lockfile: first connect {results['lockfile']['first_connect_ms']}ms, "
+          f"restarts {results['lockfile']['restart_connect_ms']}", file=sys.stderr)
+    print(f"process scan: {results['process_scan']}", file=sys.stderr)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+    missed = results["lockfile"]["missed"] + (results["process_scan"]["scan_connect_ms"] is None)
+    sys.exit(1 if missed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,7 @@
+"""Lets the tests import queueBot's flat src/ modules and the fakes next to them, like the benchmarks do."""
+import os
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, "..", "src"))
+sys.path.insert(0, HERE)
@@ -0,0 +1,348 @@
+"""
+Local stand-in for the League Client (LCU) and a Discord webhook.
+
+FakeLeagueClient serves the REST endpoints queueBot uses over HTTPS, speaks the
+client's WAMP websocket dialect, and writes a lockfile the way the real client does.
+FakeWebhook is a plain HTTP endpoint that can be told to be slow or to answer 429.
+
+Both run on whatever asyncio loop starts them, so a benchmark can share the LCU's loop.
+"""
+import asyncio
+import base64
+import json
+import os
+import secrets
+import shutil
+import ssl
+import subprocess
+import sys
+import tempfile
+import time
+
+from aiohttp import web, WSMsgType
+
+READY_CHECK_URI = "/lol-matchmaking/v1/ready-check"
+LOBBY_URI = "/lol-lobby/v2/lobby"
+GAMEFLOW_URI = "/lol-gameflow/v1/session"
+SUMMONER_URI = "/lol-summoner/v1/current-summoner"
+GAME_VERSION_URI = "/lol-patch/v1/game-version"
+QUEUES_URI = "/lol-game-queues/v1/queues"
+
+# A slice of the real queue list: common queues, an unavailable one, a custom one
+FAKE_QUEUES = [
+    {"id": 420, "name": "Ranked Solo/Duo", "queueAvailability": "Available", "isCustom": False},
+    {"id": 450, "name": "ARAM", "queueAvailability": "Available", "isCustom": False},
+    {"id": 1100, "name": "Ranked TFT", "queueAvailability": "Available", "isCustom": False},
+    {"id": 490, "name": "Quickplay", "queueAvailability": "Available", "isCustom": False},
+    {"id": 900, "name": "ARURF", "queueAvailability": "PlatformDisabled", "isCustom": False},
+    {"id": 0, "name": "Custom", "queueAvailability": "Available", "isCustom": True},
+]
+
+
+def make_self_signed_cert(directory):
+    """Creates a throwaway localhost certificate with the openssl CLI."""
+    if shutil.which("openssl") is None:
+        raise RuntimeError("openssl is required to run the fake client over HTTPS")
+    cert = os.path.join(directory, "fake-lcu.pem")
+    key = os.path.join(directory, "fake-lcu.key")
+    subprocess.check_call(
+        ["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+         "-subj", "/CN=127.0.0.1", "-keyout", key, "-out", cert],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    return cert, key
+
+
+def topic_for(uri):
+    """WAMP topic the client publishes an endpoint's events on."""
+    return "OnJsonApiEvent" + uri.replace("/", "_")
+
+
+class FakeLeagueClient:
+    """
+    Minimal HTTPS + WAMP server that behaves like LeagueClientUx for queueBot's purposes.
+    lobby_delay adds latency to the lobby GET to simulate a lagging client.
+    ignore_topics sends every event to every socket, as if per-topic subscriptions were unsupported.
+    accept_failures answers the first N accept POSTs of every pop with HTTP 500.
+    riot_id ("Name#TAG") is the signed-in account; None answers the summoner lookup with 404.
+    game_version and queues back the patch version and queue list endpoints.
+    """
+
+    def __init__(self, queue_id=420, lobby_delay=0.0, ignore_topics=False, accept_failures=0,
+                 riot_id=None, workdir=None, game_version="14.20.615.1234", queues=None):
+        self.queue_id = queue_id
+        self.game_version = game_version
+        self.queues = FAKE_QUEUES if queues is None else queues
+        self.riot_id = riot_id
+        self.lobby_delay = lobby_delay
+        self.ignore_topics = ignore_topics
+        self.accept_failures = accept_failures
+        self._failures_left = 0
+        self.password = secrets.token_urlsafe(16)
+        self.port = None
+        self.workdir = workdir or tempfile.mkdtemp(prefix="fake-lcu-")
+        self.lockfile_path = os.path.join(self.workdir, "lockfile")
+        self.sockets = {}
+        self.accepts = []
+        # Client ports the accept POSTs arrived from; one entry means one reused connection
+        self.accept_connections = set()
+        self.requests = []
+        self.ready_check_id = 0
+        self.popped_at = None
+        # topic -> perf_counter time it was first subscribed to
+        self.subscribed_at = {}
+        self._pending_pops = {}
+        self._runner = None
+
+    # --- Lifecycle ---
+
+    async def start(self, port=0):
+        app = web.Application()
+        app.router.add_get("/", self.handle_ws)
+        app.router.add_get("/riotclient/region-locale", self.handle_region_locale)
+        app.router.add_get(LOBBY_URI, self.handle_lobby)
+        app.router.add_get(SUMMONER_URI, self.handle_summoner)
+        app.router.add_get(GAME_VERSION_URI, self.handle_game_version)
+        app.router.add_get(QUEUES_URI, self.handle_queues)
+        app.router.add_post(READY_CHECK_URI + "/accept", self.handle_accept)
+        app.router.add_route("*", "/{tail:.*}", self.handle_other)
+
+        cert, key = make_self_signed_cert(self.workdir)
+        ssl_context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+        ssl_context.load_cert_chain(cert, key)
+
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", port, ssl_context=ssl_context)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        self.write_lockfile()
+        return self
+
+    def write_lockfile(self):
+        """Writes 'name:pid:port:password:protocol', the real client's lockfile format."""
+        with open(self.lockfile_path, "w") as f:
+            f.write(f"LeagueClient:{os.getpid()}:{self.port}:{self.password}:https")
+
+    def spawn_ux_process(self):
+        """
+        Starts an idle decoy process whose command line looks like LeagueClientUx's,
+        carrying this server's port and password, so an unmodified queueBot build
+        discovers the fake client the same way it finds the real one.
+        Returns the Popen; the caller terminates it.
+        """
+        return subprocess.Popen(
+            ["LeagueClientUx.exe", "-c", "import time; time.sleep(3600)",
+             f"--app-port={self.port}", f"--app-pid={os.getpid()}",
+             f"--remoting-auth-token={self.password}", f"--install-directory={self.workdir}"],
+            executable=sys.executable,
+        )
+
+    def remove_lockfile(self):
+        if os.path.exists(self.lockfile_path):
+            os.remove(self.lockfile_path)
+
+    async def stop(self):
+        for ws in list(self.sockets):
+            await ws.close()
+        if self._runner is not None:
+            await self._runner.cleanup()
+        self.remove_lockfile()
+
+    # --- HTTP handlers ---
+
+    def _authorized(self, request):
+        auth = request.headers.get("Authorization", "")
+        expected = "Basic " + base64.b64encode(f"riot:{self.password}".encode()).decode()
+        return auth == expected
+
+    async def handle_region_locale(self, request):
+        return web.json_response({"locale": "en_US", "region": "NA"})
+
+    async def handle_lobby(self, request):
+        self.requests.append(("GET", LOBBY_URI, time.perf_counter()))
+        if self.lobby_delay:
+            await asyncio.sleep(self.lobby_delay)
+        if self.queue_id is None:
+            return web.json_response({"message": "LOBBY_NOT_FOUND"}, status=404)
+        return web.json_response({"gameConfig": {"queueId": self.queue_id}})
+
+    async def handle_summoner(self, request):
+        if self.riot_id is None:
+            return web.json_response({"message": "not logged in"}, status=404)
+        name, _, tag = self.riot_id.partition("#")
+        return web.json_response({"gameName": name, "tagLine": tag, "displayName": name})
+
+    async def handle_game_version(self, request):
+        return web.json_response(self.game_version)
+
+    async def handle_queues(self, request):
+        self.requests.append(("GET", QUEUES_URI, time.perf_counter()))
+        return web.json_response(self.queues)
+
+    async def handle_accept(self, request):
+        now = time.perf_counter()
+        if not self._authorized(request):
+            return web.Response(status=401)
+        self.requests.append(("POST", READY_CHECK_URI + "/accept", now))
+        self.accept_connections.add(request.transport.get_extra_info("peername")[1])
+        if self._failures_left > 0:
+            self._failures_left -= 1
+            return web.json_response({"errorCode": "RPC_ERROR", "message": "lagging"}, status=500)
+        self.accepts.append(now)
+        future = self._pending_pops.pop(self.ready_check_id, None)
+        if future is not None and not future.done():
+            future.set_result(now)
+        await self.publish(READY_CHECK_URI, "Update", self.ready_check_payload("Accepted"))
+        return web.Response(status=204)
+
+    async def handle_other(self, request):
+        self.requests.append((request.method, request.path, time.perf_counter()))
+        return web.json_response({"errorCode": "RPC_ERROR", "message": "not faked"}, status=404)
+
+    # --- WAMP websocket ---
+
+    async def handle_ws(self, request):
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.sockets[ws] = set()
+        # WELCOME, as sent by the real client on connect
+        await ws.send_str(json.dumps([0, secrets.token_hex(8), 1, "fake-lcu"]))
+        try:
+            async for msg in ws:
+                if msg.type != WSMsgType.TEXT:
+                    continue
+                message = json.loads(msg.data)
+                if message[0] == 5:
+                    self.subscribed_at.setdefault(message[1], time.perf_counter())
+                    self.sockets[ws].add(message[1])
+                elif message[0] == 6:
+                    self.sockets[ws].discard(message[1])
+        finally:
+            self.sockets.pop(ws, None)
+        return ws
+
+    def listening_since(self, uri):
+        """When a socket first subscribed to the endpoint's events (its topic or the firehose), or None."""
+        times = [self.subscribed_at[t] for t in (topic_for(uri), "OnJsonApiEvent") if t in self.subscribed_at]
+        return min(times) if times else None
+
+    def subscribers(self, uri):
+        topic = topic_for(uri)
+        return [
+            ws for ws, topics in self.sockets.items()
+            if "OnJsonApiEvent" in topics or topic in topics or (self.ignore_topics and topics)
+        ]
+
+    async def publish(self, uri, event_type, data):
+        """Sends an EVENT frame to every socket subscribed to the endpoint's topic."""
+        topic = topic_for(uri)
+        for ws in self.subscribers(uri):
+            frame = [8, "OnJsonApiEvent" if "OnJsonApiEvent" in self.sockets.get(ws, ()) else topic,
+                     {"uri": uri, "eventType": event_type, "data": data}]
+            # Compact separators, like the real client
+            await ws.send_str(json.dumps(frame, separators=(",", ":")))
+
+    def ready_check_payload(self, player_response="None", state="InProgress"):
+        # Like the client, timer counts the seconds elapsed since the pop
+        timer = time.perf_counter() - self.popped_at if self.popped_at is not None else 0.0
+        return {
+            "declinerIds": [],
+            "dodgeWarning": "None",
+            "playerResponse": player_response,
+            "state": state,
+            "suppressUx": False,
+            "timer": timer,
+        }
+
+    async def set_lobby(self, queue_id):
+        """Changes the lobby's queue and announces it like the client does."""
+        self.queue_id = queue_id
+        await self.publish(LOBBY_URI, "Update", {"gameConfig": {"queueId": queue_id}})
+
+    async def set_phase(self, phase):
+        await self.publish(GAMEFLOW_URI, "Update", {
+            "phase": phase,
+            "gameData": {"queue": {"id": self.queue_id if self.queue_id is not None else -1}},
+        })
+
+    async def pop(self, duplicates=0):
+        """
+        Starts a new ready check. Returns (sent_at, future) where the future
+        resolves to the perf_counter time the accept POST arrived.
+        duplicates sends that many extra identical UPDATEs, like the client's bursts.
+        """
+        self.ready_check_id += 1
+        future = asyncio.get_running_loop().create_future()
+        self._pending_pops[self.ready_check_id] = future
+        self._failures_left = self.accept_failures
+        sent_at = self.popped_at = time.perf_counter()
+        for _ in range(duplicates + 1):
+            await self.publish(READY_CHECK_URI, "Update", self.ready_check_payload())
+        return sent_at, future
+
+    async def end_ready_check(self):
+        """Clears the ready check, e.g. after champ select starts or the pop expires."""
+        self._pending_pops.pop(self.ready_check_id, None)
+        await self.publish(READY_CHECK_URI, "Update", self.ready_check_payload(state="Invalid"))
+
+    async def flood(self, count, uri="/lol-chat/v1/friends/noise"):
+        """Publishes unrelated events, like the firehose the client emits in champ select."""
+        payload = {"availability": "chat", "name": "noise", "statusMessage": "x" * 64}
+        for _ in range(count):
+            await self.publish(uri, "Update", payload)
+
+
+class FakeWebhook:
+    """
+    Plain-HTTP stand-in for a Discord webhook.
+    delay slows every response; rate_limit_next answers that many requests with 429.
+    """
+
+    def __init__(self, delay=0.0, rate_limit_next=0, retry_after=0.5):
+        self.delay = delay
+        self.rate_limit_next = rate_limit_next
+        self.retry_after = retry_after
+        self.received = []
+        # Every request, including warm-up GETs and rate-limited POSTs
+        self.hits = 0
+        self.rate_limited = 0
+        self.url = None
+        self._runner = None
+
+    async def start(self, port=0):
+        app = web.Application()
+        app.router.add_route("*", "/api/webhooks/{id}/{token}", self.handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.url = f"http://127.0.0.1:{port}/api/webhooks/1/fake"
+        return self
+
+    async def handle(self, request):
+        self.hits += 1
+        if request.method != "POST":
+            # Warm-up GETs return webhook metadata, like Discord
+            return web.json_response({"id": "1", "name": "fake"})
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.rate_limit_next > 0:
+            self.rate_limit_next -= 1
+            self.rate_limited += 1
+            return web.json_response(
+                {"message": "You are being rate limited.", "retry_after": self.retry_after, "global": False},
+                status=429, headers={"Retry-After": str(self.retry_after)},
+            )
+        try:
+            payload = await request.json()
+        except ConnectionResetError:
+            # The bot shut down while we were stalling; nothing was delivered
+            return web.Response(status=499)
+        self.received.append((time.perf_counter(), payload))
+        return web.Response(status=204)
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
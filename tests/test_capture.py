@@ -0,0 +1,83 @@
+"""Replay runs the real handlers but must never reach the outside world."""
+import asyncio
+import io
+import threading
+
+import pytest
+
+import config
+from capture import EventRecorder, EventReplayer, replay_lcu
+from fake_lcu import FakeWebhook
+
+READY_CHECK_URI = "/lol-matchmaking/v1/ready-check"
+GAMEFLOW_URI = "/lol-gameflow/v1/session"
+
+
+def ready_check(timer, player_response="None", state="InProgress"):
+    return {"state": state, "playerResponse": player_response, "timer": timer}
+
+
+def write_capture(path):
+    """A queue that pops once and is accepted, as the client would report it."""
+    recorder = EventRecorder(path)
+    recorder.write(GAMEFLOW_URI, "Update", {"phase": "Matchmaking", "gameData": {"queue": {"id": 420}}}, 0.0)
+    recorder.write(GAMEFLOW_URI, "Update", {"phase": "ReadyCheck", "gameData": {"queue": {"id": 420}}}, 0.1)
+    recorder.write(READY_CHECK_URI, "Update", ready_check(0.0), 0.1)
+    recorder.write(READY_CHECK_URI, "Update", ready_check(0.5, "Accepted"), 0.2)
+    recorder.write(READY_CHECK_URI, "Update", ready_check(1.0, "Accepted", state="EveryoneReady"), 0.3)
+    recorder.close()
+
+
+@pytest.fixture
+def webhook():
+    """A fake webhook on its own loop and thread, so it is up before the replay LCU exists."""
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    hook = asyncio.run_coroutine_threadsafe(FakeWebhook().start(), loop).result(10)
+    yield hook
+    asyncio.run_coroutine_threadsafe(hook.stop(), loop).result(10)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(10)
+    loop.close()
+
+
+def test_replay_sends_no_notifications(tmp_path, webhook):
+    config.init_console(file=io.StringIO())
+    capture = tmp_path / "session.ndjson"
+    write_capture(capture)
+
+    # Settings that would notify on every pop outside of replay
+    lcu = replay_lcu({
+        "webhook_url": webhook.url,
+        "sinks": [{"type": "discord", "url": webhook.url}],
+        "desktop_notifications": True,
+    })
+    try:
+        lcu.loop.run_until_complete(EventReplayer(lcu, str(capture), speed=0).run())
+        # Outbound notifications all go through the pooled session, which must never have opened
+        assert lcu.notifier.session is None
+        assert not lcu.dispatcher.sinks
+        assert webhook.hits == 0
+        # The pop itself still went through the accept path
+        assert sum(lcu.pop_counts.values()) == 1
+    finally:
+        lcu.loop.run_until_complete(lcu.shutdown())
+        lcu.loop.close()
+    assert webhook.hits == 0
+
+
+def test_replay_resolves_queue_from_gameflow(tmp_path):
+    config.init_console(file=io.StringIO())
+    capture = tmp_path / "session.ndjson"
+    write_capture(capture)
+
+    lcu = replay_lcu({})
+    try:
+        stats = lcu.loop.run_until_complete(EventReplayer(lcu, str(capture), speed=0).run())
+        # The gameflow event cached the queue, so the pop never needed the lobby lookup
+        assert "GET /lol-lobby/v2/lobby" not in stats["rest_calls"]
+        assert lcu.pop_counts == {("Ranked Solo/Duo", "accept", True): 1}
+    finally:
+        lcu.loop.run_until_complete(lcu.shutdown())
+        lcu.loop.close()
@@ -0,0 +1,61 @@
+"""The command channel: other threads drive the LCU loop only through commands."""
+import io
+import threading
+import time
+
+import pytest
+
+import config
+from commands import Pause, SessionStats, StatusQuery, TogglePause, WatchClients
+from lcu import LCU
+
+
+@pytest.fixture
+def running_lcu():
+    """An LCU started on its own thread, like main() runs it beside the tray."""
+    config.init_console(file=io.StringIO())
+    created = {}
+    ready = threading.Event()
+
+    def run():
+        created["lcu"] = LCU(config={})
+        ready.set()
+        created["lcu"].start()
+
+    thread = threading.Thread(target=run, name="LCU", daemon=True)
+    thread.start()
+    ready.wait(10)
+    lcu = created["lcu"]
+    yield lcu
+    lcu.stop()
+    thread.join(5)
+
+
+def test_pause_is_applied_on_the_loop(running_lcu):
+    assert running_lcu.commands.call(TogglePause()) is True
+    assert running_lcu.commands.call(StatusQuery())["paused"] is True
+    assert running_lcu.commands.call(TogglePause()) is False
+    with pytest.raises(KeyError):
+        running_lcu.commands.call(Pause(client="no such client"))
+
+
+def test_watch_clients_runs_listener_on_the_loop(running_lcu):
+    threads = []
+    running_lcu.commands.call(WatchClients(lambda: threads.append(threading.current_thread().name)))
+    running_lcu.commands.call(Pause())
+    assert threads and set(threads) == {"LCU"}
+
+
+def test_session_stats_without_journal(running_lcu):
+    assert running_lcu.commands.call(SessionStats()) is None
+
+
+def test_stop_waits_for_the_loop_to_close(running_lcu):
+    started = time.perf_counter()
+    assert running_lcu.stop()
+    assert time.perf_counter() - started < 5
+    assert running_lcu.stopped.is_set()
+    assert running_lcu.loop.is_closed()
+    # Commands sent after shutdown fail at once instead of waiting forever
+    with pytest.raises(RuntimeError):
+        running_lcu.commands.submit(StatusQuery()).result(1)
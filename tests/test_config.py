@@ -0,0 +1,95 @@
+"""ConfigStore versioning and hot reload from config.json."""
+import json
+import os
+
+from config import ConfigStore, save_config
+
+
+def touch(path, seconds):
+    """Moves the file's mtime forward, as a later save would."""
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + int(seconds * 1e9)))
+
+
+def make_store(tmp_path, data):
+    path = str(tmp_path / "config.json")
+    save_config(data, path)
+    return ConfigStore(data, path=path), path
+
+
+def test_replace_bumps_the_version():
+    store = ConfigStore({"max_party_size": 2})
+    snapshot = store.replace({"max_party_size": 3})
+    assert snapshot is store.current
+    assert snapshot.version == 2
+    assert snapshot["max_party_size"] == 3
+
+
+def test_replace_with_equal_data_is_a_no_op():
+    store = ConfigStore({"allowed_queue_ids": [420], "max_party_size": 2})
+    current = store.current
+    assert store.replace({"max_party_size": 2, "allowed_queue_ids": [420]}) is current
+    assert store.current.version == 1
+
+
+def test_reload_picks_up_an_edit(tmp_path):
+    store, path = make_store(tmp_path, {"allowed_queue_ids": [420]})
+    assert store.reload_if_changed() is None
+
+    save_config({"allowed_queue_ids": [420, 450]}, path)
+    touch(path, 1)
+    snapshot = store.reload_if_changed()
+    assert snapshot is store.current
+    assert snapshot.version == 2
+    assert snapshot.to_dict() == {"allowed_queue_ids": [420, 450]}
+    # The same stamp isn't read again
+    assert store.reload_if_changed() is None
+
+
+def test_reload_of_identical_content_keeps_the_version(tmp_path):
+    store, path = make_store(tmp_path, {"allowed_queue_ids": [420]})
+    current = store.current
+
+    # Saved again without changes: the stamp moves but the config doesn't
+    save_config({"allowed_queue_ids": [420]}, path)
+    touch(path, 1)
+    assert store.reload_if_changed() is None
+    assert store.reload_if_changed(force=True) is None
+    assert store.current is current
+    assert current.version == 1
+
+
+def test_torn_write_is_retried_on_the_next_poll(tmp_path):
+    store, path = make_store(tmp_path, {"allowed_queue_ids": [420]})
+
+    # An editor that writes in place, caught halfway through
+    with open(path, "w") as f:
+        f.write('{"allowed_queue_ids": [4')
+    touch(path, 1)
+    assert store.reload_if_changed() is None
+    assert store.current.version == 1
+
+    with open(path, "w") as f:
+        json.dump({"allowed_queue_ids": [440]}, f)
+    touch(path, 2)
+    snapshot = store.reload_if_changed()
+    assert snapshot.version == 2
+    assert snapshot["allowed_queue_ids"] == (440,)
+
+
+def test_invalid_rule_is_dropped_on_reload(tmp_path):
+    store, path = make_store(tmp_path, {"max_party_size": 2})
+    save_config({"max_party_size": 3, "allowed_roles": ["SUPPORT"]}, path)
+    touch(path, 1)
+    snapshot = store.reload_if_changed()
+    assert snapshot.version == 2
+    # The bad rule disables only itself
+    assert "allowed_roles" not in snapshot
+    assert snapshot["max_party_size"] == 3
+    assert snapshot.errors and "allowed_roles" in snapshot.errors[0]
+
+
+def test_missing_file_is_ignored(tmp_path):
+    store = ConfigStore({}, path=str(tmp_path / "config.json"))
+    assert store.reload_if_changed(force=True) is None
+    assert store.current.version == 1
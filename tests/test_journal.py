@@ -0,0 +1,80 @@
+"""PopJournal: shared databases, failed batches, latency percentiles and the index that serves them."""
+import sqlite3
+from contextlib import closing
+
+from journal import PopJournal
+from metrics import PopTrace
+
+PERCENTILE_QUERY = (
+    "SELECT accept_acked_ms FROM pops WHERE time >= ? AND accept_acked_ms IS NOT NULL "
+    "ORDER BY accept_acked_ms LIMIT 1 OFFSET ?"
+)
+
+
+def accepted_pop(acked_ms):
+    trace = PopTrace()
+    trace.spans["accept_acked"] = acked_ms
+    trace.info.update(decision="accept", accepted=True)
+    return trace
+
+
+def test_latency_percentiles(tmp_path):
+    journal = PopJournal(str(tmp_path / "pops.db"))
+    for acked_ms in range(100, 0, -1):
+        journal.record_pop(accepted_pop(float(acked_ms)))
+    skipped = PopTrace()
+    skipped.info["decision"] = "skip:queue"
+    journal.record_pop(skipped)
+    assert journal.flush()
+    latency = journal.session_stats()["accept_latency_ms"]
+    journal.close()
+    assert latency == {"count": 100, "p50": 50.0, "p95": 95.0, "p99": 99.0}
+
+
+def test_percentile_query_reads_the_index_in_order(tmp_path):
+    path = str(tmp_path / "pops.db")
+    PopJournal(path).close()
+    with closing(sqlite3.connect(path)) as db:
+        plan = " ".join(row[-1] for row in db.execute("EXPLAIN QUERY PLAN " + PERCENTILE_QUERY, (0, 0)))
+    assert "pops_acked" in plan
+    # No sort: the index already returns rows in accept_acked_ms order
+    assert "TEMP B-TREE" not in plan
+
+
+def count_rows(path, table):
+    with closing(sqlite3.connect(path)) as db:
+        return db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def test_two_processes_share_one_database(tmp_path):
+    path = str(tmp_path / "pops.db")
+    # Both opened before either writes, as a tray and a headless instance would be
+    tray, headless = PopJournal(path), PopJournal(path)
+    for journal in (tray, headless, tray, headless):
+        pop_uid = journal.record_pop(accepted_pop(10.0))
+        journal.record_notification(pop_uid, "webhook", "sent")
+    for journal in (tray, headless):
+        assert journal.flush()
+        journal.close()
+    assert tray.failed == headless.failed == 0
+    assert count_rows(path, "pops") == 4
+    with closing(sqlite3.connect(path)) as db:
+        orphans = db.execute(
+            "SELECT COUNT(*) FROM notifications WHERE pop_uid NOT IN (SELECT uid FROM pops)"
+        ).fetchone()[0]
+    assert orphans == 0
+
+
+def test_bad_row_does_not_discard_its_batch(tmp_path):
+    path = str(tmp_path / "pops.db")
+    journal = PopJournal(path)
+    good = journal.record_pop(accepted_pop(10.0))
+    broken = accepted_pop(20.0)
+    broken.wall_time = None
+    journal.record_pop(broken)
+    journal.record_notification(good, "webhook", "sent")
+    assert journal.flush()
+    journal.close()
+    assert (journal.written, journal.failed) == (2, 1)
+    assert count_rows(path, "pops") == 1
+    assert count_rows(path, "notifications") == 1
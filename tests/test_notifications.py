@@ -0,0 +1,105 @@
+"""Sink cleanup and dispatcher bookkeeping: every notification gets an outcome, nothing is left running."""
+import asyncio
+import sys
+
+import psutil
+import pytest
+
+import notifications
+from notifications import CommandSink, Notification, NotificationDispatcher, Sink, SocketSink, validate_sink
+
+
+class StalledSink(Sink):
+    """Never finishes a delivery."""
+
+    type = "stalled"
+
+    async def deliver(self, notification):
+        await asyncio.Event().wait()
+
+
+def test_command_sink_reaps_a_timed_out_process():
+    sink = CommandSink([sys.executable, "-c", "import time; time.sleep(30)"])
+
+    async def run():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(sink.deliver(Notification("ARAM")), 0.5)
+        # Killed and waited for before the timeout surfaced: no child left, not even a zombie
+        return psutil.Process().children()
+
+    assert asyncio.run(run()) == []
+
+
+def test_socket_sink_closes_its_connection():
+    async def run():
+        received = []
+        closed = asyncio.Event()
+
+        async def handle(reader, writer):
+            received.append(await reader.readline())
+            # EOF once the sink has closed its end
+            await reader.read()
+            closed.set()
+            writer.close()
+
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        await SocketSink(f"127.0.0.1:{port}").deliver(Notification("ARAM"))
+        await asyncio.wait_for(closed.wait(), 1.0)
+        server.close()
+        await server.wait_closed()
+        return received
+
+    received = asyncio.run(run())
+    assert b'"game_mode": "ARAM"' in received[0]
+
+
+def test_removed_sink_counts_its_queue_as_dropped():
+    outcomes = []
+
+    async def run():
+        dispatcher = NotificationDispatcher()
+        dispatcher.on_outcome = lambda notification, sink, outcome: outcomes.append((sink, outcome))
+        dispatcher.set_sinks([StalledSink()])
+        for mode in ("ARAM", "Ranked Solo/Duo", "Quickplay"):
+            dispatcher.submit(Notification(mode))
+        # Let the worker pick up the first one
+        await asyncio.sleep(0.01)
+        dispatcher.set_sinks([])
+        await asyncio.sleep(0.01)
+        await dispatcher.stop()
+        return dispatcher
+
+    dispatcher = asyncio.run(run())
+    # One in flight when the sink was removed, two still queued
+    assert outcomes == [("stalled", "dropped")] * 3
+    assert dispatcher.stats["stalled"]["dropped"] == 3
+
+
+def test_stop_after_drain_timeout_drops_what_is_left():
+    async def run():
+        dispatcher = NotificationDispatcher()
+        dispatcher.set_sinks([StalledSink()])
+        dispatcher.submit(Notification("ARAM"))
+        dispatcher.submit(Notification("ARAM"))
+        drained = await dispatcher.drain(0.05)
+        await dispatcher.stop()
+        return drained, dispatcher
+
+    drained, dispatcher = asyncio.run(run())
+    assert not drained
+    assert dispatcher.stats["stalled"]["dropped"] == 2
+
+
+def test_unix_socket_address_rejected_without_unix_sockets(monkeypatch):
+    spec = {"type": "socket", "address": "unix:/tmp/queuebot.sock"}
+    monkeypatch.setattr(notifications, "UNIX_SOCKETS", True)
+    assert validate_sink(spec) == []
+
+    # As on Windows: refused when saved, and a sink loaded anyway fails with a clear error
+    monkeypatch.setattr(notifications, "UNIX_SOCKETS", False)
+    errors = validate_sink(spec)
+    assert len(errors) == 1 and "unix:" in errors[0]
+    assert validate_sink({"type": "socket", "address": "127.0.0.1:9000"}) == []
+    with pytest.raises(OSError):
+        asyncio.run(SocketSink(spec["address"]).deliver(Notification("ARAM")))
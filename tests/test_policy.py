@@ -0,0 +1,119 @@
+"""Accept policy compilation and decisions."""
+import time
+
+import pytest
+
+from policy import (
+    MINUTES_PER_DAY, PolicyError, build_minute_table, compile_policy, new_accept_history, parse_clock, sanitize, validate,
+)
+
+SOLO_DUO = 420
+ARAM = 450
+
+
+def local_time(hours, minutes):
+    """A timestamp at hours:minutes local time, whatever the machine's timezone."""
+    return time.mktime((2026, 1, 15, hours, minutes, 0, 0, 0, -1))
+
+
+def decide(policy, queue_id=SOLO_DUO, lobby_state=None, recent_accepts=None, now=None):
+    return policy.decide(
+        queue_id,
+        lobby_state or {},
+        new_accept_history() if recent_accepts is None else recent_accepts,
+        now=local_time(12, 0) if now is None else now,
+    )
+
+
+# --- Compiling ---
+
+def test_empty_config_accepts_everything():
+    policy = compile_policy({})
+    assert policy.queue_ids is None and policy.minute_table is None and policy.roles is None
+    assert decide(policy, queue_id=ARAM, lobby_state={"party_size": 5, "position": "TOP"}) == (True, "ok")
+
+
+def test_parse_clock():
+    assert parse_clock("00:00") == 0
+    assert parse_clock(" 23:59 ") == MINUTES_PER_DAY - 1
+    for value in ("24:00", "12:60", "noon"):
+        with pytest.raises(ValueError):
+            parse_clock(value)
+
+
+def test_minute_table_wraps_past_midnight():
+    table = build_minute_table([{"start": "22:00", "end": "02:00"}])
+    assert table[parse_clock("23:30")] and table[parse_clock("01:59")]
+    assert not table[parse_clock("02:00")] and not table[parse_clock("12:00")]
+    assert sum(table) == 4 * 60
+
+
+def test_window_with_equal_ends_covers_the_day():
+    assert sum(build_minute_table([{"start": "08:00", "end": "08:00"}])) == MINUTES_PER_DAY
+
+
+def test_invalid_rules_are_all_reported():
+    config = {
+        "allowed_queue_ids": ["420"],
+        "accept_windows": [{"start": "25:00", "end": "02:00"}, {"start": "08:00"}],
+        "max_pops_per_hour": -1,
+        "max_party_size": "2",
+        "allowed_roles": ["SUPPORT"],
+    }
+    assert len(validate(config)) == 6
+    with pytest.raises(PolicyError) as error:
+        compile_policy(config)
+    assert error.value.args[0] == validate(config)
+
+
+def test_sanitize_drops_only_the_invalid_keys():
+    clean, errors = sanitize({"allowed_queue_ids": [SOLO_DUO], "allowed_roles": ["SUPPORT"], "webhook_url": ""})
+    assert clean == {"allowed_queue_ids": [SOLO_DUO], "webhook_url": ""}
+    assert len(errors) == 1
+
+
+# --- Deciding ---
+
+def test_queue_not_in_allowed_list():
+    policy = compile_policy({"allowed_queue_ids": [SOLO_DUO]})
+    assert decide(policy) == (True, "ok")
+    assert decide(policy, queue_id=ARAM) == (False, "queue")
+
+
+def test_accept_window_over_midnight():
+    policy = compile_policy({"accept_windows": [{"start": "22:00", "end": "02:00"}]})
+    assert decide(policy, now=local_time(23, 0)) == (True, "ok")
+    assert decide(policy, now=local_time(1, 30)) == (True, "ok")
+    assert decide(policy, now=local_time(12, 0)) == (False, "schedule")
+
+
+def test_party_size_limit():
+    policy = compile_policy({"max_party_size": 2})
+    assert decide(policy, lobby_state={"party_size": 2}) == (True, "ok")
+    assert decide(policy, lobby_state={"party_size": 3}) == (False, "party_size")
+    # Unknown party size counts as solo
+    assert decide(policy, lobby_state={"party_size": None}) == (True, "ok")
+
+
+def test_role_limit_ignores_queues_without_positions():
+    policy = compile_policy({"allowed_roles": ["MIDDLE", "FILL"]})
+    assert decide(policy, lobby_state={"position": "MIDDLE"}) == (True, "ok")
+    assert decide(policy, lobby_state={"position": "UTILITY"}) == (False, "role")
+    for position in (None, "", "UNSELECTED", "NONE"):
+        assert decide(policy, lobby_state={"position": position}) == (True, "ok")
+
+
+def test_hourly_limit_rolls_over():
+    policy = compile_policy({"max_pops_per_hour": 2})
+    now = local_time(12, 0)
+    recent = new_accept_history()
+    recent.extend([now - 3700, now - 1800, now - 60])
+    assert decide(policy, recent_accepts=recent, now=now) == (False, "rate")
+    # The accept from more than an hour ago was let go
+    assert list(recent) == [now - 1800, now - 60]
+    assert decide(policy, recent_accepts=recent, now=now + 1801) == (True, "ok")
+
+
+def test_first_failing_rule_is_the_reason():
+    policy = compile_policy({"allowed_queue_ids": [SOLO_DUO], "max_party_size": 1})
+    assert decide(policy, queue_id=ARAM, lobby_state={"party_size": 5}) == (False, "queue")
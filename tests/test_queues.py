@@ -0,0 +1,118 @@
+"""QueueCatalog: parsing the client's queue list, the on-disk cache and version-gated refresh."""
+import asyncio
+import io
+import json
+
+import pytest
+
+import config
+from queues import BUILTIN_QUEUES, GAME_VERSION_URI, QUEUES_URI, QueueCatalog, parse_queues
+
+CLIENT_QUEUES = [
+    {"id": 420, "name": "Ranked Solo/Duo 5v5", "queueAvailability": "Available"},
+    {"id": 900, "name": "", "description": "ARURF", "queueAvailability": "Available"},
+    {"id": 1300, "shortName": "Nexus Blitz", "queueAvailability": "PlatformDisabled"},
+    {"id": 2400, "queueAvailability": "Available"},
+    {"id": 3100, "name": "Custom", "isCustom": True},
+    {"id": -1, "name": "Invalid"},
+    {"name": "No ID"},
+]
+
+
+class FakeResponse:
+    def __init__(self, status, payload):
+        self.status = status
+        self.payload = payload
+
+    async def json(self):
+        return self.payload
+
+    async def read(self):
+        return json.dumps(self.payload).encode()
+
+    def release(self):
+        pass
+
+
+class FakeConnection:
+    """Serves a game version and a queue list, and records each GET."""
+
+    def __init__(self, version, queues=CLIENT_QUEUES):
+        self.version = version
+        self.queues = queues
+        self.requests = []
+
+    async def request(self, method, endpoint, **kwargs):
+        self.requests.append(endpoint)
+        payload = self.version if endpoint == GAME_VERSION_URI else self.queues
+        return FakeResponse(200, payload)
+
+
+@pytest.fixture(autouse=True)
+def quiet_console():
+    config.init_console(file=io.StringIO())
+
+
+def refresh(catalog, connection):
+    async def run():
+        return await catalog.refresh(connection, asyncio.get_running_loop())
+    return asyncio.run(run())
+
+
+def test_parse_queues():
+    queues = parse_queues(json.dumps(CLIENT_QUEUES).encode())
+    assert queues == {
+        420: ("Ranked Solo/Duo 5v5", True),
+        900: ("ARURF", True),
+        1300: ("Nexus Blitz", False),
+        2400: ("Unknown (ID: 2400)", True),
+    }
+
+
+def test_cache_round_trip(tmp_path):
+    path = str(tmp_path / "queues.json")
+    QueueCatalog(path).save("14.20.1", parse_queues(json.dumps(CLIENT_QUEUES).encode()))
+
+    catalog = QueueCatalog(path)
+    assert catalog.version == "14.20.1"
+    assert catalog.name(900) == "ARURF"
+    # Built-in names win over the client's for the common queues
+    assert catalog.name(420) == BUILTIN_QUEUES[420]
+    assert 900 in catalog.available and 1300 not in catalog.available
+    entries = catalog.entries()
+    assert entries.index((1300, "Nexus Blitz", False)) > entries.index((900, "ARURF", True))
+
+
+def test_refresh_skipped_when_version_unchanged(tmp_path):
+    path = str(tmp_path / "queues.json")
+    catalog = QueueCatalog(path)
+    connection = FakeConnection("14.20.1")
+    assert refresh(catalog, connection)
+    assert connection.requests == [GAME_VERSION_URI, QUEUES_URI]
+    assert QueueCatalog(path).name(900) == "ARURF"
+
+    # Same client version, here and after a restart: no queue list fetch
+    assert not refresh(catalog, connection)
+    assert not refresh(QueueCatalog(path), connection)
+    assert connection.requests.count(QUEUES_URI) == 1
+
+    connection.version = "14.21.1"
+    assert refresh(catalog, connection)
+    assert connection.requests.count(QUEUES_URI) == 2
+
+
+@pytest.mark.parametrize("contents", [
+    '{"format": 1, "version": "14.20.1", "queues": [[900, "AR',
+    '{"format": 1, "version": "14.20.1", "queues": [[900]]}',
+    # Older cache layouts are refetched rather than read
+    '{"format": 0, "version": "14.20.1", "queues": {"900": "ARURF"}}',
+    '{"900": "ARURF"}',
+    '[[900, "ARURF", true]]',
+])
+def test_bad_cache_falls_back_to_builtin_queues(tmp_path, contents):
+    path = tmp_path / "queues.json"
+    path.write_text(contents, encoding="utf-8")
+    catalog = QueueCatalog(str(path))
+    assert catalog.version is None
+    assert catalog.names == BUILTIN_QUEUES
+    assert catalog.name(900) == "Unknown (ID: 900)"
@@ -0,0 +1,226 @@
+"""ReadyCheckTracker transitions and AcceptExecutor retry, deadline and race handling."""
+import asyncio
+import time
+
+import aiohttp
+
+from metrics import PopTrace
+from readycheck import (
+    ACCEPTED, ACCEPTING, EXPIRED, IDLE, POPPED, SKIPPED, AcceptExecutor, ReadyCheckTracker,
+)
+
+
+def in_progress(timer, player_response="None"):
+    return {"state": "InProgress", "playerResponse": player_response, "timer": timer}
+
+
+def ended(player_response="None", state="Invalid"):
+    return {"state": state, "playerResponse": player_response, "timer": 0.0}
+
+
+class ScriptedResponse:
+    def __init__(self, status):
+        self.status = status
+
+    def release(self):
+        pass
+
+
+class ScriptedConnection:
+    """Answers each accept POST with the next status in the script (the last one repeats)."""
+
+    def __init__(self, statuses, on_request=None):
+        self.statuses = list(statuses)
+        self.on_request = on_request
+        self.posts = 0
+
+    async def request(self, method, endpoint, **kwargs):
+        self.posts += 1
+        status = self.statuses[min(self.posts, len(self.statuses)) - 1]
+        if self.on_request:
+            self.on_request(self.posts)
+        if isinstance(status, Exception):
+            raise status
+        return ScriptedResponse(status)
+
+
+def popped_tracker():
+    tracker = ReadyCheckTracker()
+    assert tracker.observe(in_progress(0.0))
+    return tracker
+
+
+def run_accept(tracker, connection, timer=0.0, **options):
+    executor = AcceptExecutor(tracker, retry_delays=(0.001,), verify_timeout=0.05, **options)
+    trace = PopTrace()
+    trace.info["check_id"] = tracker.check_id
+    tracker.begin_accept()
+    return asyncio.run(executor.accept(connection, timer, trace)), trace
+
+
+# --- ReadyCheckTracker ---
+
+def test_duplicate_updates_are_one_pop():
+    tracker = popped_tracker()
+    assert not tracker.observe(in_progress(0.0))
+    assert not tracker.observe(in_progress(0.4))
+    assert tracker.state == POPPED
+    assert tracker.check_id == 1
+
+
+def test_timer_going_backwards_is_a_new_pop():
+    tracker = popped_tracker()
+    tracker.begin_accept()
+    assert not tracker.observe(in_progress(3.0))
+    # Someone dodged and the queue popped again without an end event in between
+    assert tracker.observe(in_progress(0.2))
+    assert tracker.check_id == 2
+    assert tracker.state == POPPED
+    assert tracker.outcome is None
+
+
+def test_straggling_update_after_end_is_not_a_new_pop():
+    tracker = popped_tracker()
+    tracker.observe(in_progress(2.0))
+    tracker.observe(ended())
+    assert tracker.state == IDLE
+    assert tracker.outcome == EXPIRED
+    # A late frame of the same check, inside the dedupe window
+    assert not tracker.observe(in_progress(2.5))
+    assert tracker.check_id == 1
+
+
+def test_new_pop_after_dedupe_window():
+    tracker = ReadyCheckTracker(dedupe_window=0.0)
+    tracker.observe(in_progress(2.0))
+    tracker.observe(ended())
+    assert tracker.observe(in_progress(2.5))
+    assert tracker.check_id == 2
+
+
+def test_skip_keeps_its_outcome():
+    tracker = popped_tracker()
+    tracker.skip()
+    assert tracker.state == SKIPPED
+    # Skipped checks don't go back to Accepting
+    tracker.begin_accept()
+    assert tracker.state == SKIPPED
+    tracker.observe(ended())
+    assert tracker.outcome == SKIPPED
+
+
+def test_accepted_end_event_settles_as_accepted():
+    tracker = popped_tracker()
+    tracker.begin_accept()
+    tracker.observe(ended("Accepted", state="EveryoneReady"))
+    assert tracker.outcome == ACCEPTED
+    assert tracker.settled.is_set()
+
+
+# --- AcceptExecutor ---
+
+def test_retries_5xx_until_accepted():
+    tracker = popped_tracker()
+
+    def confirm(posts):
+        if posts == 3:
+            tracker.observe(in_progress(0.5, "Accepted"))
+
+    connection = ScriptedConnection([500, 503, 204], on_request=confirm)
+    result, trace = run_accept(tracker, connection)
+    assert result["accepted"] and result["verified"]
+    assert result["attempts"] == 3
+    assert result["last_status"] == 204
+    assert "accept_sent" in trace.spans and "accept_verified" in trace.spans
+
+
+def test_retries_connection_errors():
+    tracker = popped_tracker()
+
+    def confirm(posts):
+        if posts == 2:
+            tracker.observe(in_progress(0.5, "Accepted"))
+
+    connection = ScriptedConnection([aiohttp.ClientConnectionError(), 204], on_request=confirm)
+    result, _ = run_accept(tracker, connection)
+    assert result["accepted"]
+    assert result["attempts"] == 2
+
+
+def test_stops_on_4xx():
+    tracker = popped_tracker()
+    connection = ScriptedConnection([404, 204])
+    result, _ = run_accept(tracker, connection)
+    assert not result["accepted"]
+    assert result["attempts"] == 1
+    assert result["last_status"] == 404
+
+
+def test_gives_up_at_the_deadline():
+    tracker = popped_tracker()
+    connection = ScriptedConnection([500])
+    started = time.perf_counter()
+    # 11.6s into a 12s window with a 0.25s margin leaves 150ms
+    result, _ = run_accept(tracker, connection, timer=11.6)
+    assert not result["accepted"]
+    assert result["attempts"] > 1
+    assert time.perf_counter() - started < 0.5
+    assert result["budget_used"] <= 1.0
+
+
+def test_no_time_left_sends_nothing():
+    tracker = popped_tracker()
+    connection = ScriptedConnection([204])
+    result, _ = run_accept(tracker, connection, timer=12.0)
+    assert connection.posts == 0
+    assert not result["accepted"]
+
+
+def test_unconfirmed_accept_is_resent():
+    tracker = popped_tracker()
+
+    def confirm(posts):
+        if posts == 2:
+            tracker.observe(in_progress(0.5, "Accepted"))
+
+    connection = ScriptedConnection([204], on_request=confirm)
+    result, _ = run_accept(tracker, connection)
+    assert result["verified"]
+    assert result["attempts"] == 2
+
+
+def test_player_accepted_during_lookup():
+    # The player clicked Accept while the queue lookup ran; the tracker is already Accepted
+    tracker = popped_tracker()
+    trace = PopTrace()
+    trace.info["check_id"] = tracker.check_id
+    tracker.observe(in_progress(0.3, "Accepted"))
+    tracker.begin_accept()
+    assert tracker.state == ACCEPTED
+
+    connection = ScriptedConnection([204])
+    result = asyncio.run(AcceptExecutor(tracker).accept(connection, 0.0, trace))
+    assert result["accepted"] and result["verified"] and result["by_player"]
+    assert connection.posts == 0
+
+
+def test_player_accepted_and_check_ended_during_lookup():
+    tracker = popped_tracker()
+    trace = PopTrace()
+    trace.info["check_id"] = tracker.check_id
+    tracker.observe(ended("Accepted", state="EveryoneReady"))
+    tracker.begin_accept()
+
+    result = asyncio.run(AcceptExecutor(tracker).accept(ScriptedConnection([204]), 0.0, trace))
+    assert result["accepted"] and result["by_player"]
+
+
+def test_earlier_accepted_check_does_not_count_for_a_new_pop():
+    tracker = popped_tracker()
+    tracker.observe(ended("Accepted", state="EveryoneReady"))
+    trace = PopTrace()
+    # A pop whose check_id the tracker never reached is not the accepted one
+    trace.info["check_id"] = tracker.check_id + 1
+    result = asyncio.run(AcceptExecutor(tracker).accept(ScriptedConnection([204]), 0.0, trace))
+    assert not result["accepted"]
+    assert tracker.state != ACCEPTING
@@ -0,0 +1,35 @@
+"""SubscriptionFilter: topic selection, pre-filtering and bounded per-endpoint counts."""
+import json
+
+from lcu import FIREHOSE_TOPIC, OTHER_URIS, SubscriptionFilter, topic_for_uri
+
+READY_CHECK_URI = "/lol-matchmaking/v1/ready-check"
+
+
+class Registrations:
+    def __init__(self, *uris):
+        self.registered_uris = [{"uri": uri} for uri in uris]
+
+
+def frame(uri):
+    return json.dumps([8, FIREHOSE_TOPIC, {"uri": uri, "eventType": "Update", "data": {}}])
+
+
+def test_exact_handlers_get_their_own_topics():
+    subscriptions = SubscriptionFilter(Registrations(READY_CHECK_URI))
+    subscriptions.refresh()
+    assert subscriptions.topics() == [topic_for_uri(READY_CHECK_URI)]
+    assert subscriptions.decode(frame("/lol-chat/v1/friends/1")) is None
+    assert subscriptions.skipped == 1
+    assert subscriptions.decode(frame(READY_CHECK_URI))["uri"] == READY_CHECK_URI
+
+
+def test_firehose_counts_unhandled_endpoints_as_other():
+    # A prefix registration (as capture uses) subscribes to every endpoint
+    subscriptions = SubscriptionFilter(Registrations(READY_CHECK_URI, "/"))
+    subscriptions.refresh()
+    assert subscriptions.topics() == [FIREHOSE_TOPIC]
+    for summoner_id in range(500):
+        assert subscriptions.decode(frame(f"/lol-summoner/v1/summoners/{summoner_id}"))
+    subscriptions.decode(frame(READY_CHECK_URI))
+    assert subscriptions.events == {OTHER_URIS: 500, READY_CHECK_URI: 1}